@@ -0,0 +1,80 @@
+"""
+Benchmark dos prepared statements: as consultas mais usadas dos repositórios executadas
+na mesma conexão sem preparo (parse + plano a cada chamada) x preparadas (DB_PREPARE_THRESHOLD).
+No final mostra, pela view `pg_prepared_statements`, quantas execuções reaproveitaram o
+plano genérico (planejamento economizado).
+
+Precisa de um Postgres com o schema aplicado (mesmas variáveis POSTGRES_* da aplicação).
+
+Uso (a partir da raiz do repositório):
+
+    python benchmarks/bench_prepared.py            # 500 execuções por consulta
+    python benchmarks/bench_prepared.py 2000
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import Awaitable, Callable
+
+# Adiciona o diretório src ao sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from psycopg import AsyncConnection
+
+from db.connection import _configure_conn, make_database_conninfo
+from db.prepared import prepared_stats
+from repository import card_repository, ciclo_repository, fase_repository, usuario_repository
+
+ID_INEXISTENTE = "00000000-0000-0000-0000-000000000000"
+
+CONSULTAS: list[tuple[str, Callable[[AsyncConnection], Awaitable]]] = [
+    ("fase.get_all_fases", fase_repository.get_all_fases),
+    ("fase.get_fase_by_id", lambda conn: fase_repository.get_fase_by_id(conn, ID_INEXISTENTE)),
+    ("ciclo.get_all_ciclos", ciclo_repository.get_all_ciclos),
+    ("usuario.get_all_usuarios", usuario_repository.get_all_usuarios),
+    ("usuario.get_usuario_by_id", lambda conn: usuario_repository.get_usuario_by_id(conn, ID_INEXISTENTE)),
+    ("card.get_all_cards", card_repository.get_all_cards),
+    ("card.get_card_by_id", lambda conn: card_repository.get_card_by_id(conn, ID_INEXISTENTE)),
+]
+
+
+async def medir(conn: AsyncConnection, consulta: Callable, n: int) -> float:
+    await consulta(conn)  # aquecimento (e preparo, se ligado)
+    inicio = time.perf_counter()
+    for _ in range(n):
+        await consulta(conn)
+    await conn.commit()
+    return (time.perf_counter() - inicio) / n
+
+
+async def main(n: int) -> None:
+    async with await AsyncConnection.connect(make_database_conninfo()) as conn:
+        await _configure_conn(conn)
+        limiar = conn.prepare_threshold
+        print(f"{n} execuções por consulta, mesma conexão (limiar de preparo: {limiar})")
+        print(f"{'consulta':<28}{'sem preparo':>14}{'preparada':>14}{'economia/exec':>16}")
+        economia_total = 0.0
+        for nome, consulta in CONSULTAS:
+            conn.prepare_threshold = None
+            sem_preparo = await medir(conn, consulta, n)
+            conn.prepare_threshold = 0
+            preparada = await medir(conn, consulta, n)
+            economia_total += sem_preparo - preparada
+            print(f"{nome:<28}{sem_preparo * 1000:>11.3f} ms{preparada * 1000:>11.3f} ms"
+                  f"{(sem_preparo - preparada) * 1000:>13.3f} ms")
+        print(f"economia média por execução: {economia_total / len(CONSULTAS) * 1000:.3f} ms")
+
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT left(regexp_replace(statement, '\\s+', ' ', 'g'), 60), generic_plans, custom_plans"
+                " FROM pg_prepared_statements ORDER BY generic_plans + custom_plans DESC"
+            )
+            print(f"\n{'statement':<62}{'genérico':>10}{'custom':>8}")
+            for statement, generic, custom in await cursor.fetchall():
+                print(f"{statement:<62}{generic:>10}{custom:>8}")
+        print(f"\ncontadores: {prepared_stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
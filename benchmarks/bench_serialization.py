@@ -0,0 +1,105 @@
+"""
+Benchmark da serialização das listagens: caminho padrão (DTO por linha + validação do
+`response_model` + JSONResponse) x JSON_FAST_PATH (linha recortada + orjson).
+
+Uso (a partir da raiz do repositório):
+
+    python benchmarks/bench_serialization.py            # 10 000 linhas
+    python benchmarks/bench_serialization.py 50000
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List
+
+# Adiciona o diretório src ao sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from model.card_status import CardStatus
+from model.dto.ciclo_dto import CicloResponseDTO
+from model.dto.usuario_dto import UsuarioResponseDTO
+from service.card_service import CardService
+from service.ciclo_service import CicloService
+from utils.pagination import Page
+from utils.serialization import FastJSONResponse, orjson, project_row, response_fields
+
+
+def card_rows(n: int) -> list[dict]:
+    agora = datetime.now(timezone.utc)
+    statuses = [s.value for s in CardStatus]
+    return [{
+        "id": str(uuid.uuid4()),
+        "status": statuses[i % len(statuses)],
+        "tempo_planejado_horas": 4.5,
+        "link": f"http://exemplo.com/tarefa/{i}",
+        "descricao": f"Card de benchmark número {i}",
+        "ciclo_id": str(uuid.uuid4()),
+        "fase_id": str(uuid.uuid4()),
+        "artefato_id": str(uuid.uuid4()),
+        "responsavel_id": str(uuid.uuid4()),
+        "started": agora - timedelta(hours=i),
+        "progress": agora,
+        "version": 1,
+        "created_at": agora - timedelta(hours=i),
+        "updated_at": agora,
+    } for i in range(n)]
+
+
+def ciclo_rows(n: int) -> list[dict]:
+    return [{"id": str(uuid.uuid4()), "nome": f"Ciclo {i}", "versao": f"1.{i}", "projeto_id": str(uuid.uuid4()),
+             "created_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc)} for i in range(n)]
+
+
+def usuario_rows(n: int) -> list[dict]:
+    return [{"id": str(uuid.uuid4()), "nome": f"Usuário {i}", "email": f"usuario{i}@email.com",
+             "created_at": datetime.now(timezone.utc)} for i in range(n)]
+
+
+def caminho_padrao(rows: list, map_dto: Callable, response_type: Any) -> bytes:
+    """O que a rota faz hoje: DTO por linha, validação/serialização do response_model e JSONResponse."""
+    field = create_model_field(name="Response", type_=response_type, mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=Page(rows).map(map_dto)))
+    return JSONResponse(content).body
+
+
+def caminho_rapido(rows: list, map_row: Callable) -> bytes:
+    return FastJSONResponse(Page(rows).map(map_row)).body
+
+
+def medir(func: Callable[[], bytes], repeticoes: int = 5) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main(n: int) -> None:
+    cenarios = [
+        ("card", card_rows(n), CardService._map_to_response_dto, CardService._map_to_response_row, List),
+        ("ciclo", ciclo_rows(n),
+         lambda c: CicloResponseDTO(id=c["id"], nome=c["nome"], versao=c["versao"], projeto_id=c["projeto_id"]),
+         CicloService._map_to_response_row, List[CicloResponseDTO]),
+        ("usuario", usuario_rows(n),
+         lambda u: UsuarioResponseDTO(id=u["id"], nome=u["nome"], email=u["email"]),
+         lambda u: project_row(u, response_fields(UsuarioResponseDTO)), List[UsuarioResponseDTO]),
+    ]
+    print(f"{n} linhas por resposta, melhor de 5 (orjson {'instalado' if orjson else 'ausente: json padrão'})")
+    print(f"{'listagem':<10}{'padrão':>14}{'rápido':>14}{'µs/linha':>20}{'ganho':>8}")
+    for nome, rows, map_dto, map_row, response_type in cenarios:
+        padrao = medir(lambda: caminho_padrao(rows, map_dto, response_type))
+        rapido = medir(lambda: caminho_rapido(rows, map_row))
+        por_linha = f"{padrao / n * 1e6:.2f} -> {rapido / n * 1e6:.2f}"
+        print(f"{nome:<10}{padrao * 1000:>11.1f} ms{rapido * 1000:>11.1f} ms{por_linha:>20}{padrao / rapido:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from psycopg import AsyncCursor
+
+from core.config import settings
+
+
+# |=======| CACHE EM MEMÓRIA (LRU + TTL) |=======|
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU limitado a `maxsize` entradas, cada uma válida por `ttl` segundos.
+
+    Vale só para o processo atual. Quem escreve no banco deve chamar `clear()` (ou
+    `invalidate(...)`) no mesmo processo logo após a escrita.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+        # Incrementada a cada invalidação; ver `cached`
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Retorna o valor ou `MISSING` (ausente ou expirado)."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self.generation += 1
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.invalidations += len(self._data)
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+# |=======| CACHES NOMEADOS |=======|
+_caches: dict[str, TTLCache] = {}
+
+
+def get_cache(name: str) -> TTLCache:
+    """Cache do processo para `name` (ex.: "fases"), criado na primeira chamada."""
+    if name not in _caches:
+        _caches[name] = TTLCache(name, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    return _caches[name]
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+async def cached(cache: TTLCache, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Devolve o valor em cache ou chama `loader()` e guarda o resultado. `None` (não
+    encontrado) não é guardado. Com CACHE_TTL_SECONDS = 0 o cache fica desligado.
+
+    Se o cache for invalidado enquanto `loader()` consulta o banco, o valor lido pode ser
+    anterior à escrita que invalidou: ele é devolvido, mas não é guardado.
+    """
+    if cache.ttl <= 0:
+        return await loader()
+    value = cache.get(key)
+    if value is MISSING:
+        generation = cache.generation
+        value = await loader()
+        if value is not None and cache.generation == generation:
+            cache.set(key, value)
+    return value
+
+
+# |=======| INVALIDAÇÃO ENTRE WORKERS (LISTEN/NOTIFY) |=======|
+# Cada escrita publica, na mesma transação, os caches afetados no canal abaixo; o
+# Postgres só entrega a notificação após o commit. Cada worker escuta o canal (ver
+# core/tasks.py) e limpa os seus caches. A origem identifica o processo, que já limpou
+# os próprios caches ao escrever e ignora as notificações que ele mesmo enviou.
+CACHE_CHANNEL = "cache_invalidation"
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def _origem() -> str:
+    # Calculada na hora: workers criados por fork depois do import têm pids diferentes
+    return f"{os.getpid()}-{_BOOT_ID}"
+
+
+async def publish_invalidation(cursor: AsyncCursor, *names: str) -> None:
+    """Agenda a invalidação dos caches `names` nos demais workers (chamar antes do commit)."""
+    payload = json.dumps({"origem": _origem(), "caches": list(names)})
+    await cursor.execute("SELECT pg_notify(%s, %s)", (CACHE_CHANNEL, payload))
+
+
+def apply_invalidation(payload: str) -> None:
+    """Aplica uma notificação recebida de outro worker."""
+    try:
+        event = json.loads(payload)
+        origem, names = event["origem"], event["caches"]
+    except (ValueError, KeyError, TypeError):
+        logging.warning(f"Notificação de cache inválida: {payload!r}")
+        return
+    if origem == _origem():
+        return
+    for name in names:
+        cache = _caches.get(name)
+        if cache is not None:
+            cache.clear()
+            cache.remote_invalidations += 1
+
+
+def clear_all_caches() -> None:
+    for cache in _caches.values():
+        cache.clear()
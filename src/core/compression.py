@@ -0,0 +1,212 @@
+import hashlib
+import zlib
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.cache import MISSING, get_cache
+from core.config import settings
+
+# Brotli e zstd são opcionais: só entram na negociação se a biblioteca estiver instalada
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# |=======| CODIFICAÇÕES DISPONÍVEIS |=======|
+class _GzipCompressor:
+    def __init__(self):
+        # wbits=31: formato gzip (cabeçalho + crc), não zlib puro
+        self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+# Ordem de preferência do servidor quando o cliente aceita mais de uma com o mesmo peso
+ENCODINGS: dict[str, Callable[[], object]] = {}
+if brotli is not None:
+    ENCODINGS["br"] = _BrotliCompressor
+if zstandard is not None:
+    ENCODINGS["zstd"] = _ZstdCompressor
+ENCODINGS["gzip"] = _GzipCompressor
+
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    compressor = ENCODINGS[encoding]()
+    return compressor.compress(body) + compressor.finish()
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Escolhe a codificação pelo header Accept-Encoding (com pesos `;q=`). Retorna None
+    quando o cliente não aceita nenhuma das disponíveis.
+    """
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+# |=======| MIDDLEWARE |=======|
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _is_cacheable_path(path: str) -> bool:
+    return any(path.startswith(prefix) for prefix in settings.COMPRESSION_CACHE_PATHS)
+
+
+class CompressionMiddleware:
+    """
+    Comprime as respostas JSON/texto conforme o Accept-Encoding do cliente (gzip sempre;
+    br e zstd quando a biblioteca existe).
+
+    - Respostas de um bloco só são comprimidas a partir de COMPRESSION_MIN_SIZE bytes.
+    - Respostas em streaming (ex.: exportação de cards) são comprimidas bloco a bloco.
+    - Nas rotas de dados de referência (COMPRESSION_CACHE_PATHS, ex.: /fases/) o corpo
+      comprimido fica no cache "compressao", indexado pelo hash do corpo original:
+      o mesmo payload não é comprimido de novo a cada acesso.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cacheable = scope["method"] == "GET" and _is_cacheable_path(scope["path"])
+        start: Optional[Message] = None
+        compressor = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    message["status"] < 200 or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(_COMPRESSIBLE_TYPES)
+                ):
+                    await send(message)
+                    return
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or (start is None and compressor is None):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            # Primeiro bloco de uma resposta em streaming: comprime incrementalmente
+            if start is not None and more_body:
+                pending, start = start, None
+                headers = MutableHeaders(scope=pending)
+                _set_encoding_headers(headers, encoding)
+                del headers["content-length"]
+                compressor = ENCODINGS[encoding]()
+                await send(pending)
+                await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+                return
+
+            if compressor is not None:
+                chunk = compressor.compress(body) if more_body else compressor.compress(body) + compressor.finish()
+                if not more_body:
+                    compressor = None
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            # Resposta de um bloco só
+            pending, start = start, None
+            headers = MutableHeaders(scope=pending)
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) < settings.COMPRESSION_MIN_SIZE:
+                await send(pending)
+                await send(message)
+                return
+
+            compressed = _compress_cached(encoding, body) if cacheable else compress_body(encoding, body)
+            _set_encoding_headers(headers, encoding)
+            headers["Content-Length"] = str(len(compressed))
+            await send(pending)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _set_encoding_headers(headers: MutableHeaders, encoding: str) -> None:
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    # O corpo enviado deixa de ser byte a byte o original: o ETag forte vira fraco
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+def _compress_cached(encoding: str, body: bytes) -> bytes:
+    cache = get_cache("compressao")
+    if cache.ttl <= 0:
+        return compress_body(encoding, body)
+    key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+    compressed = cache.get(key)
+    if compressed is MISSING:
+        compressed = compress_body(encoding, body)
+        cache.set(key, compressed)
+    return compressed
@@ -12,11 +12,60 @@ class Settings:
     PROJECT_NAME   : str = "supera"
     PROJECT_VERSION: str = "1.0.0"
 
-    POSTGRES_USER     : str = "admin"
-    POSTGRES_PASSWORD : str = "admin123"
-    POSTGRES_HOST     : str = "postgres"
-    POSTGRES_PORT     : str = "5432" # PORTA PADRÃO DO POSTGRE É 5434
-    POSTGRES_DATABASE : str = "appdb"
+    POSTGRES_USER     : str = os.getenv("POSTGRES_USER", "admin")
+    POSTGRES_PASSWORD : str = os.getenv("POSTGRES_PASSWORD", "admin123")
+    POSTGRES_HOST     : str = os.getenv("POSTGRES_HOST", "postgres")
+    POSTGRES_PORT     : str = os.getenv("POSTGRES_PORT", "5432") # PORTA PADRÃO DO POSTGRE É 5434
+    POSTGRES_DATABASE : str = os.getenv("POSTGRES_DATABASE", "appdb")
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}"
 
-settings = Settings()
\ No newline at end of file
+    # |=======| SERVIDOR DE PRODUÇÃO (python -m server) |=======|
+    SERVER_HOST              : str   = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT              : int   = int(os.getenv("SERVER_PORT", "8000"))
+    WEB_CONCURRENCY          : int   = int(os.getenv("WEB_CONCURRENCY", "0"))                         # processos (workers); 0 = um por núcleo disponível. Cada um tem o seu pool (até DB_POOL_MAX_SIZE conexões)
+    SERVER_GRACEFUL_TIMEOUT  : float = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "25"))              # no SIGTERM, espera as requisições em andamento por até N segundos (deixe abaixo do prazo do orquestrador)
+    SERVER_KEEP_ALIVE        : int   = int(os.getenv("SERVER_KEEP_ALIVE", "5"))                       # segundos que uma conexão HTTP ociosa fica aberta
+    FORWARDED_ALLOW_IPS      : str   = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")                  # proxies cujos X-Forwarded-* são aceitos ("*" = qualquer um)
+
+    # |=======| POOL DE CONEXÕES |=======|
+    DB_POOL_MIN_SIZE         : int   = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE         : int   = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_TIMEOUT          : float = float(os.getenv("DB_POOL_TIMEOUT", "10"))                      # segundos aguardando uma conexão livre
+    DB_POOL_MAX_WAITING      : int   = int(os.getenv("DB_POOL_MAX_WAITING", "0"))                     # tamanho máximo da fila (0 = sem limite)
+    DB_POOL_CHECK_IDLE_AFTER : float = float(os.getenv("DB_POOL_CHECK_IDLE_AFTER", "0"))              # valida (ping) a conexão ociosa há mais de N segundos (0 = sempre)
+    DB_POOL_MAX_IDLE         : float = float(os.getenv("DB_POOL_MAX_IDLE", "600"))                    # fecha conexões excedentes ociosas há mais de N segundos
+    DB_POOL_MAX_LIFETIME     : float = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))               # recicla conexões com mais de N segundos de vida
+    DB_POOL_RECONNECT_TIMEOUT: float = float(os.getenv("DB_POOL_RECONNECT_TIMEOUT", "300"))           # tempo tentando reconectar antes de desistir
+    DB_POOL_LEAK_THRESHOLD   : float = float(os.getenv("DB_POOL_LEAK_THRESHOLD", "30"))               # loga conexões emprestadas há mais de N segundos (0 = desativado)
+    DB_POOL_LEAK_RECLAIM     : float = float(os.getenv("DB_POOL_LEAK_RECLAIM", "0"))                  # recupera à força conexões presas há mais de N segundos (0 = desativado)
+    DB_POOL_LEAK_TRACE       : bool  = os.getenv("DB_POOL_LEAK_TRACE", "true").lower() in ("1", "true", "yes")  # guarda a pilha de quem pegou a conexão
+
+    # |=======| PREPARED STATEMENTS |=======|
+    DB_PREPARE_THRESHOLD     : int   = int(os.getenv("DB_PREPARE_THRESHOLD", "1"))                    # execuções na conexão antes de preparar a consulta (-1 = desativado; use -1 atrás de PgBouncer em modo transaction)
+    DB_PREPARED_MAX          : int   = int(os.getenv("DB_PREPARED_MAX", "100"))                       # máximo de prepared statements por conexão (LRU)
+
+    # |=======| PAGINAÇÃO |=======|
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))                              # itens por página quando `limit` não é informado
+    PAGE_SIZE_MAX    : int = int(os.getenv("PAGE_SIZE_MAX", "500"))                                  # maior `limit` aceito nas listagens
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))                             # linhas lidas do cursor do servidor por vez nas exportações
+    BULK_MAX_ITEMS   : int = int(os.getenv("BULK_MAX_ITEMS", "5000"))                                # máximo de itens por requisição de criação em lote
+
+    # |=======| RESUMOS PRÉ-CALCULADOS |=======|
+    PROJETO_RESUMO_REFRESH_SECONDS: float = float(os.getenv("PROJETO_RESUMO_REFRESH_SECONDS", "60"))  # intervalo de recálculo do resumo dos projetos (0 = desativado)
+
+    # |=======| CACHE EM MEMÓRIA (DADOS DE REFERÊNCIA) |=======|
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "300"))                         # validade de cada entrada (0 = cache desligado)
+    CACHE_MAX_ENTRIES: int   = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))                          # entradas por cache antes de descartar as menos usadas
+    CACHE_LISTEN_INVALIDATION: bool = os.getenv("CACHE_LISTEN_INVALIDATION", "true").lower() in ("1", "true", "yes")  # escuta (LISTEN) as invalidações feitas por outros workers
+
+    # |=======| COMPRESSÃO DAS RESPOSTAS |=======|
+    COMPRESSION_MIN_SIZE      : int   = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))             # respostas menores que N bytes vão sem compressão
+    COMPRESSION_GZIP_LEVEL    : int   = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))               # 1 (rápido) a 9 (menor)
+    COMPRESSION_BROTLI_QUALITY: int   = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))           # 0 a 11 (só com o pacote `brotli`)
+    COMPRESSION_ZSTD_LEVEL    : int   = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))               # 1 a 22 (só com o pacote `zstandard`)
+    COMPRESSION_CACHE_PATHS   : tuple = tuple(p.strip() for p in os.getenv("COMPRESSION_CACHE_PATHS", "/fases/,/artefatos/").split(",") if p.strip())  # rotas cujo corpo comprimido fica em cache
+
+    # |=======| SERIALIZAÇÃO |=======|
+    JSON_FAST_PATH: bool = os.getenv("JSON_FAST_PATH", "false").lower() in ("1", "true", "yes")  # listagens de cards/ciclos/usuários sem DTO, codificadas com orjson
+
+settings = Settings()
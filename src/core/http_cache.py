@@ -0,0 +1,156 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Mapping, Optional
+
+from fastapi import Header, HTTPException, Request, Response, status
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# |=======| ETAG POR VERSÃO DO REGISTRO |=======|
+def make_version_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def if_match_version(if_match: Optional[str] = Header(None, description='ETag recebido no GET/PATCH anterior, ex.: "3"')) -> Optional[int]:
+    """
+    Dependência que lê o header If-Match e devolve a versão esperada do registro.
+
+    Sem o header (ou com `*`) retorna None e a escrita não verifica a versão.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.split(",")[0].strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match inválido"
+        )
+    return int(tag)
+
+
+# |=======| GET CONDICIONAL (If-None-Match / If-Modified-Since) |=======|
+def make_etag(*parts: Any) -> str:
+    """ETag a partir de valores que mudam junto com a representação (ex.: updated_at)."""
+    raw = "|".join(part.isoformat() if isinstance(part, datetime) else str(part) for part in parts)
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()}"'
+
+
+def make_body_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def has_conditional_headers(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(headers: Mapping[str, str], etag: Optional[str], last_modified: Optional[datetime] = None) -> bool:
+    """
+    Avalia os headers condicionais do pedido. If-None-Match tem precedência; só sem ele
+    o If-Modified-Since é considerado (com precisão de segundos, como no header HTTP).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def set_validators(response: Response, etag: Optional[str], last_modified: Optional[datetime] = None) -> None:
+    if etag:
+        response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified_response(etag: Optional[str], last_modified: Optional[datetime] = None) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+# Headers mantidos na resposta 304 (RFC 9110, seção 15.4.5)
+_NOT_MODIFIED_HEADERS = {"etag", "last-modified", "cache-control", "vary", "expires", "content-location", "date"}
+
+
+class ConditionalGetMiddleware:
+    """
+    Para GET/HEAD com resposta 200 em um único bloco (as respostas JSON das rotas), usa
+    o ETag da rota ou calcula um pelo hash do corpo e, se o cliente já tem essa versão
+    (If-None-Match / If-Modified-Since), troca a resposta por um 304 sem corpo.
+
+    Respostas em streaming (ex.: exportação de cards) passam sem alteração.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        start: Optional[Message] = None
+
+        async def send_conditional(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] == 200:
+                    start = message
+                    return
+                await send(message)
+                return
+
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            pending, start = start, None
+            if message.get("more_body", False):
+                await send(pending)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=pending)
+            etag = headers.get("etag")
+            if etag is None:
+                etag = make_body_etag(message.get("body", b""))
+                headers["ETag"] = etag
+            last_modified = None
+            if "last-modified" in headers:
+                try:
+                    last_modified = parsedate_to_datetime(headers["last-modified"])
+                except (TypeError, ValueError):
+                    pass
+
+            if is_not_modified(request_headers, etag, last_modified):
+                kept = [(k, v) for k, v in pending["headers"] if k.decode().lower() in _NOT_MODIFIED_HEADERS]
+                await send({"type": "http.response.start", "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(pending)
+            await send(message)
+
+        await self.app(scope, receive, send_conditional)
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+
+from psycopg import AsyncConnection
+
+from core.cache import CACHE_CHANNEL, apply_invalidation, clear_all_caches
+from core.config import settings
+from db.connection import Connection, make_database_conninfo
+from service.projeto_service import ProjetoService
+
+
+# |=======| TAREFAS PERIÓDICAS EM SEGUNDO PLANO |=======|
+_tasks: list[asyncio.Task] = []
+
+
+async def refresh_projetos_summary_loop(interval: float) -> None:
+    """
+    Recalcula a view materializada `projeto_resumo` a cada `interval` segundos.
+    Com vários workers, só um recalcula por vez (os demais pulam a rodada).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with Connection().connection() as conn:
+                await ProjetoService.refresh_projetos_summary(conn)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Falha ao recalcular o resumo dos projetos: {e}")
+
+
+async def listen_cache_invalidation() -> None:
+    """
+    Escuta o canal de invalidação de cache numa conexão dedicada (fora do pool) e limpa
+    os caches que outros workers alteraram. Se a conexão cair, reconecta com espera
+    crescente e limpa todos os caches, pois notificações podem ter se perdido.
+    """
+    delay = 1.0
+    while True:
+        try:
+            async with await AsyncConnection.connect(make_database_conninfo(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {CACHE_CHANNEL}")
+                clear_all_caches()
+                delay = 1.0
+                async for notify in conn.notifies():
+                    apply_invalidation(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Escuta de invalidação de cache interrompida ({e}); reconectando em {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+def start_background_tasks() -> None:
+    if settings.PROJETO_RESUMO_REFRESH_SECONDS > 0:
+        _tasks.append(asyncio.create_task(refresh_projetos_summary_loop(settings.PROJETO_RESUMO_REFRESH_SECONDS)))
+    if settings.CACHE_TTL_SECONDS > 0 and settings.CACHE_LISTEN_INVALIDATION:
+        _tasks.append(asyncio.create_task(listen_cache_invalidation()))
+
+
+async def stop_background_tasks() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
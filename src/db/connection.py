@@ -1,6 +1,38 @@
+import asyncio
 import logging
-from psycopg2 import pool
+import time
+import traceback
+import weakref
+from contextlib import asynccontextmanager
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from psycopg.pq import TransactionStatus
+from psycopg.types.string import TextLoader
+from psycopg_pool import AsyncConnectionPool, PoolTimeout, TooManyRequests
 from core.config import settings
+from db.prepared import configure_prepared, prepared_stats
+
+
+async def _configure_conn(conn: AsyncConnection) -> None:
+    # Mantém UUIDs como texto (comportamento do psycopg2), pois os DTOs usam `id: str`
+    conn.adapters.register_loader("uuid", TextLoader)
+    configure_prepared(conn)
+
+
+def make_database_conninfo() -> str:
+    return make_conninfo(
+        host=settings.POSTGRES_HOST,
+        dbname=settings.POSTGRES_DATABASE,
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        port=settings.POSTGRES_PORT,
+    )
+
+
+def _reconnect_failed(pool: AsyncConnectionPool) -> None:
+    logging.error(f"Não foi possível reconectar ao banco após {pool.reconnect_timeout}s; o pool seguirá tentando sob demanda.")
+
+
 class Connection:
     _instance = None
     _pool = None
@@ -13,30 +45,201 @@ class Connection:
     def __init__(self):
         if not hasattr(self, "_initialized"):
             try:
-                self._pool = pool.SimpleConnectionPool(
-                    minconn=1,
-                    maxconn=10,
-                    host=settings.POSTGRES_HOST,
-                    database=settings.POSTGRES_DATABASE,
-                    user=settings.POSTGRES_USER,
-                    password=settings.POSTGRES_PASSWORD,
-                    port=settings.POSTGRES_PORT
+                # O pool é aberto sob demanda, dentro do event loop (ver `open`).
+                # Requisições sem conexão livre entram numa fila FIFO e aguardam até
+                # DB_POOL_TIMEOUT segundos antes de falhar com PoolTimeout.
+                # Conexões quebradas (ex.: restart/failover do Postgres) são detectadas
+                # no empréstimo por `_check_conn`, descartadas e substituídas pelo pool.
+                self._pool = AsyncConnectionPool(
+                    conninfo=make_database_conninfo(),
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    max_waiting=settings.DB_POOL_MAX_WAITING,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+                    reconnect_timeout=settings.DB_POOL_RECONNECT_TIMEOUT,
+                    reconnect_failed=_reconnect_failed,
+                    configure=_configure_conn,
+                    check=self._check_conn,
+                    name="appdb",
+                    open=False,
                 )
                 if not self._pool:
                     raise Exception("Falha ao criar o pool de conexões com o banco")
+                self._released_at = weakref.WeakKeyDictionary()
+                # Detecção de vazamentos: conexão emprestada -> (instante do empréstimo, pilha)
+                self._borrowed = {}
+                self._reclaimed = weakref.WeakSet()
+                # Empréstimos longos por natureza (streaming), fora da detecção de vazamentos
+                self._long_lived = set()
+                self._leaks_reported = 0
+                self._leaks_reclaimed = 0
+                self._watchdog = None
+                self._discarded = 0
+                self._wait_time_total = 0.0
+                self._wait_time_max = 0.0
+                self._acquired = 0
+                self._timeouts = 0
                 self._initialized = True
                 print("Conexao criada")
             except Exception as e:
                 print(f"Erro ao inicializar pool de conexões: {e}")
                 raise
 
-    def get_conn(self):
-   
-        return self._pool.getconn()
+    async def _check_conn(self, conn: AsyncConnection) -> None:
+        """Valida a conexão antes de entregá-la; se falhar, o pool a descarta e tenta outra."""
+        released_at = self._released_at.get(conn)
+        if released_at is not None and time.monotonic() - released_at < settings.DB_POOL_CHECK_IDLE_AFTER:
+            return
+        try:
+            await AsyncConnectionPool.check_connection(conn)
+        except Exception as e:
+            self._discarded += 1
+            logging.warning(f"Descartando conexão inválida do pool: {e}")
+            raise
+
+    async def open(self):
+        # Idempotente: não faz nada se o pool já estiver aberto
+        await self._pool.open()
+        if self._watchdog is None and settings.DB_POOL_LEAK_THRESHOLD > 0:
+            self._watchdog = asyncio.create_task(self._leak_watchdog())
+
+    async def get_conn(self, long_lived: bool = False) -> AsyncConnection:
+        """
+        Empresta uma conexão do pool.
+
+        `long_lived=True` marca empréstimos que duram por natureza mais que
+        DB_POOL_LEAK_THRESHOLD (ex.: exportações em streaming): eles não são avisados
+        nem recuperados pelo detector de vazamentos.
+        """
+        await self.open()
+        start = time.perf_counter()
+        try:
+            conn = await self._pool.getconn()
+        except (PoolTimeout, TooManyRequests):
+            self._timeouts += 1
+            logging.warning(f"Pool de conexões esgotado: {self._pool.get_stats()}")
+            raise
+        waited = time.perf_counter() - start
+        if long_lived:
+            self._long_lived.add(conn)
+        else:
+            stack = traceback.format_stack(limit=12)[:-1] if settings.DB_POOL_LEAK_TRACE else None
+            self._borrowed[conn] = [time.monotonic(), stack, False]
+        self._acquired += 1
+        self._wait_time_total += waited
+        self._wait_time_max = max(self._wait_time_max, waited)
+        return conn
+
+    async def release_conn(self, conn: AsyncConnection):
+        if self._borrowed.pop(conn, None) is None and conn not in self._long_lived:
+            if conn in self._reclaimed:
+                logging.warning("Conexão devolvida após ter sido recuperada pelo detector de vazamentos; ignorando.")
+                return
+        # Encerra a transação pendente antes de devolver ao pool. Se ela só leu, o COMMIT
+        # não grava nada e, ao contrário do ROLLBACK, mantém os prepared statements da
+        # conexão (ver db.prepared). Se escreveu fora da unidade de trabalho
+        # (db.transaction), inclusive após um erro no handler, é desfeita.
+        status = conn.info.transaction_status
+        if status in (TransactionStatus.INTRANS, TransactionStatus.INERROR):
+            try:
+                if status == TransactionStatus.INTRANS and await self._read_only(conn):
+                    await conn.commit()
+                else:
+                    await conn.rollback()
+            except Exception as e:
+                logging.warning(f"Falha ao encerrar a transação antes de devolver a conexão: {e}")
+        self._long_lived.discard(conn)
+        # Conexões fechadas ou quebradas são descartadas pelo próprio pool no putconn
+        self._released_at[conn] = time.monotonic()
+        await self._pool.putconn(conn)
+
+    @staticmethod
+    async def _read_only(conn: AsyncConnection) -> bool:
+        """
+        Indica se a transação aberta não escreveu nada: o Postgres só atribui um id de
+        transação (xid) na primeira escrita (ou lock de linha).
+        """
+        cursor = await conn.execute("SELECT pg_current_xact_id_if_assigned() IS NULL")
+        row = await cursor.fetchone()
+        if row[0]:
+            return True
+        logging.warning(
+            "Conexão devolvida com escritas sem commit (fora de db.transaction); desfazendo a transação."
+        )
+        return False
+
+    @asynccontextmanager
+    async def connection(self, long_lived: bool = False):
+        conn = await self.get_conn(long_lived)
+        try:
+            yield conn
+        finally:
+            await self.release_conn(conn)
+
+    async def _leak_watchdog(self):
+        """Verifica periodicamente conexões emprestadas por tempo demais."""
+        interval = max(settings.DB_POOL_LEAK_THRESHOLD / 2, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._check_leaks()
+            except Exception as e:
+                logging.warning(f"Falha na verificação de vazamento de conexões: {e}")
+
+    async def _check_leaks(self):
+        now = time.monotonic()
+        for conn, info in list(self._borrowed.items()):
+            borrowed_at, stack, reported = info
+            held = now - borrowed_at
+            if settings.DB_POOL_LEAK_RECLAIM and held >= settings.DB_POOL_LEAK_RECLAIM:
+                logging.error(
+                    f"Recuperando conexão presa há {held:.1f}s (possível vazamento). Emprestada em:\n"
+                    + "".join(stack or ["<pilha desativada>"])
+                )
+                del self._borrowed[conn]
+                self._reclaimed.add(conn)
+                self._leaks_reclaimed += 1
+                # Conexão fechada é descartada pelo pool, que abre outra no lugar
+                await conn.close()
+                await self._pool.putconn(conn)
+            elif not reported and held >= settings.DB_POOL_LEAK_THRESHOLD:
+                info[2] = True
+                self._leaks_reported += 1
+                logging.warning(
+                    f"Conexão emprestada há {held:.1f}s sem ser devolvida (possível vazamento). Emprestada em:\n"
+                    + "".join(stack or ["<pilha desativada>"])
+                )
 
-    def release_conn(self, conn):
-        self._pool.putconn(conn)
+    def stats(self) -> dict:
+        """Retorna métricas de uso do pool (conexões em uso/ociosas, tempo de espera e prepared statements)."""
+        pool_stats = self._pool.get_stats()
+        now = time.monotonic()
+        size = pool_stats.get("pool_size", 0)
+        idle = pool_stats.get("pool_available", 0)
+        return {
+            "min_size": self._pool.min_size,
+            "max_size": self._pool.max_size,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": pool_stats.get("requests_waiting", 0),
+            "acquired": self._acquired,
+            "timeouts": self._timeouts,
+            "discarded": self._discarded,
+            "leaks_reported": self._leaks_reported,
+            "leaks_reclaimed": self._leaks_reclaimed,
+            "long_lived_in_use": len(self._long_lived),
+            "held_max_s": round(max((now - info[0] for info in self._borrowed.values()), default=0.0), 3),
+            "wait_time_avg_ms": round(self._wait_time_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+            "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            "prepared_statements": prepared_stats(),
+        }
 
-    def close_all(self):
-        self._pool.closeall()
-        logging.info("🔒 Todas as conexões foram fechadas.")
\ No newline at end of file
+    async def close_all(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        await self._pool.close()
+        logging.info("🔒 Todas as conexões foram fechadas.")
@@ -1,11 +1,111 @@
+import functools
+import inspect
+from typing import AsyncIterator
+from fastapi.routing import APIRoute
+from psycopg import AsyncConnection
 from db.connection import Connection
 
 
 _connection = Connection()
 
-def get_db():
-    conn = _connection.get_conn()
+
+class _LazyCursor:
+    """Cursor que só obtém a conexão do pool ao entrar no `async with`."""
+
+    def __init__(self, session: "DatabaseSession", args, kwargs):
+        self._session = session
+        self._args = args
+        self._kwargs = kwargs
+        self._cursor = None
+
+    async def __aenter__(self):
+        conn = await self._session.connection()
+        self._cursor = conn.cursor(*self._args, **self._kwargs)
+        return await self._cursor.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._cursor.__aexit__(exc_type, exc, tb)
+
+
+class DatabaseSession:
+    """
+    Conexão com o banco no escopo de uma requisição.
+
+    A conexão só é retirada do pool na primeira consulta e é devolvida assim que o
+    handler retorna (ver `DatabaseRoute`), antes da validação e serialização da
+    resposta. Expõe a mesma interface usada pelos repositórios (`cursor`, `commit`,
+    `rollback`, `info`).
+    """
+
+    def __init__(self, pool: Connection):
+        self._pool = pool
+        self._conn: AsyncConnection | None = None
+
+    async def connection(self) -> AsyncConnection:
+        if self._conn is None:
+            self._conn = await self._pool.get_conn()
+        return self._conn
+
+    @property
+    def info(self):
+        """`ConnectionInfo` da conexão em uso (None se ainda não houve consulta)."""
+        return self._conn.info if self._conn is not None else None
+
+    def cursor(self, *args, **kwargs) -> _LazyCursor:
+        return _LazyCursor(self, args, kwargs)
+
+    async def commit(self):
+        if self._conn is not None:
+            await self._conn.commit()
+
+    async def rollback(self):
+        if self._conn is not None:
+            await self._conn.rollback()
+
+    async def release(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await self._pool.release_conn(conn)
+
+
+async def get_db() -> AsyncIterator[DatabaseSession]:
+    session = DatabaseSession(_connection)
     try:
-        yield conn
+        yield session
     finally:
-        _connection.release_conn(conn)
\ No newline at end of file
+        await session.release()
+
+
+async def stream_with_db(generator_factory, *args):
+    """
+    Executa um gerador assíncrono com uma conexão própria, mantida durante todo o streaming.
+
+    Respostas em streaming continuam lendo do banco depois que o handler retorna, então
+    não podem usar a sessão de `get_db` (que é devolvida ao pool nesse momento). Uma
+    exportação grande pode levar mais que DB_POOL_LEAK_THRESHOLD, por isso o empréstimo
+    é marcado como longo e fica fora da detecção de vazamentos.
+    """
+    async with _connection.connection(long_lived=True) as conn:
+        async for chunk in generator_factory(conn, *args):
+            yield chunk
+
+
+def _release_after(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            for value in kwargs.values():
+                if isinstance(value, DatabaseSession):
+                    await value.release()
+    return wrapper
+
+
+class DatabaseRoute(APIRoute):
+    """Rota que devolve a conexão da requisição ao pool logo após o handler."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _release_after(endpoint)
+        super().__init__(path, endpoint, **kwargs)
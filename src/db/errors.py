@@ -0,0 +1,2 @@
+class RegistroEmUsoError(Exception):
+    """O registro não pode ser removido: ainda é referenciado por outros (ex.: cards)."""
@@ -0,0 +1,108 @@
+"""
+Executor das migrações versionadas do banco.
+
+As migrações são os arquivos `db/migrations/NNNN_descricao.sql`, aplicados em ordem.
+O nome do arquivo (sem `.sql`) é a versão gravada em `alembic_version`, uma linha por
+migração aplicada.
+
+Por padrão cada arquivo roda numa transação, junto com o registro da versão. Arquivos
+que começam com `-- migrate: no-transaction` (ex.: `CREATE INDEX CONCURRENTLY`) rodam
+em autocommit, um comando por vez. Por isso devem ser idempotentes (`IF NOT EXISTS`) e
+não podem ter `;` dentro de strings.
+
+Uso (no deploy, antes de subir a API):
+
+    python -m db.migrate            # aplica as pendentes
+    python -m db.migrate --list     # só mostra o estado
+"""
+import asyncio
+import logging
+import re
+import sys
+from pathlib import Path
+
+from psycopg import AsyncConnection
+
+from db.connection import make_database_conninfo
+
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+# Chave do pg_advisory_lock: impede duas instâncias migrando ao mesmo tempo
+LOCK_KEY = 720_150_009
+
+
+def available_migrations() -> list[Path]:
+    return sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9][0-9]_*.sql"))
+
+
+def _statements(sql: str) -> list[str]:
+    body = "\n".join(line for line in sql.splitlines() if not line.lstrip().startswith("--"))
+    return [stmt.strip() for stmt in body.split(";") if stmt.strip()]
+
+
+async def applied_versions(conn: AsyncConnection) -> set[str]:
+    cursor = await conn.execute("SELECT version_num FROM alembic_version")
+    return {row[0] for row in await cursor.fetchall()}
+
+
+async def _drop_invalid_indexes(conn: AsyncConnection, sql: str) -> None:
+    """
+    Um `CREATE INDEX CONCURRENTLY` interrompido deixa um índice inválido, que o
+    `IF NOT EXISTS` da nova tentativa pularia. Remove esses restos antes de reaplicar.
+    """
+    names = re.findall(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", sql, re.IGNORECASE)
+    if not names:
+        return
+    cursor = await conn.execute("""
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relname = ANY(%s)
+    """, (names,))
+    for (name,) in await cursor.fetchall():
+        logging.warning(f"Removendo índice inválido de uma execução anterior: {name}")
+        await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+async def apply_migration(conn: AsyncConnection, path: Path) -> None:
+    sql = path.read_text(encoding="utf-8")
+    version = path.stem
+    if sql.lstrip().startswith(NO_TRANSACTION):
+        await _drop_invalid_indexes(conn, sql)
+        for statement in _statements(sql):
+            await conn.execute(statement)
+        await conn.execute("INSERT INTO alembic_version (version_num) VALUES (%s)", (version,))
+    else:
+        async with conn.transaction():
+            await conn.execute(sql)
+            await conn.execute("INSERT INTO alembic_version (version_num) VALUES (%s)", (version,))
+
+
+async def migrate(list_only: bool = False) -> list[str]:
+    """Aplica as migrações pendentes e retorna as versões aplicadas nesta execução."""
+    applied_now = []
+    async with await AsyncConnection.connect(make_database_conninfo(), autocommit=True) as conn:
+        await conn.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+        try:
+            applied = await applied_versions(conn)
+            for path in available_migrations():
+                if path.stem in applied:
+                    if list_only:
+                        print(f"[x] {path.stem}")
+                    continue
+                if list_only:
+                    print(f"[ ] {path.stem}")
+                    continue
+                print(f"Aplicando migração {path.stem}...")
+                await apply_migration(conn, path)
+                applied_now.append(path.stem)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+    if not list_only:
+        print(f"{len(applied_now)} migração(ões) aplicada(s).")
+    return applied_now
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate(list_only="--list" in sys.argv[1:]))
@@ -0,0 +1,8 @@
+-- migrate: no-transaction
+-- Índices da paginação por keyset (created_at, id) das listagens; fases paginam por (ordem, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_artefato_created_at_id ON public.artefato USING btree (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_created_at_id ON public.card USING btree (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ciclo_created_at_id ON public.ciclo USING btree (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fase_ordem_id ON public.fase USING btree (ordem, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projeto_created_at_id ON public.projeto USING btree (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_usuario_created_at_id ON public.usuario USING btree (created_at, id);
@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- Índices compostos dos filtros de card (coluna filtrada + ordem do keyset) e do quadro do ciclo.
+-- Também atendem às buscas/FKs por card.ciclo_id, card.fase_id, card.artefato_id e card.responsavel_id.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_artefato_id_created_at_id ON public.card USING btree (artefato_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_ciclo_id_created_at_id ON public.card USING btree (ciclo_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_ciclo_id_fase_id_status ON public.card USING btree (ciclo_id, fase_id, status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_fase_id_created_at_id ON public.card USING btree (fase_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_responsavel_id_created_at_id ON public.card USING btree (responsavel_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_status_created_at_id ON public.card USING btree (status, created_at, id);
+-- Coberto por ix_card_status_created_at_id
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_card_status;
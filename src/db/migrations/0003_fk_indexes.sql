@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+-- Índices das colunas de junção que não são prefixo de nenhuma chave primária
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ciclo_projeto_id ON public.ciclo USING btree (projeto_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_faseartefato_artefato_id ON public.faseartefato USING btree (artefato_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_projetousuario_usuario_id ON public.projetousuario USING btree (usuario_id);
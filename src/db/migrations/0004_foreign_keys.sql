@@ -0,0 +1,24 @@
+-- Chaves estrangeiras. Criadas como NOT VALID: valem para toda escrita nova sem varrer (nem
+-- travar) as tabelas. As linhas antigas podem ser validadas depois, fora do deploy, com
+-- ALTER TABLE ... VALIDATE CONSTRAINT ..., assim que registros órfãos forem corrigidos.
+ALTER TABLE public.ciclo
+    ADD CONSTRAINT ciclo_projeto_id_fkey FOREIGN KEY (projeto_id) REFERENCES public.projeto(id) NOT VALID;
+
+ALTER TABLE public.card
+    ADD CONSTRAINT card_ciclo_id_fkey FOREIGN KEY (ciclo_id) REFERENCES public.ciclo(id) NOT VALID;
+ALTER TABLE public.card
+    ADD CONSTRAINT card_fase_id_fkey FOREIGN KEY (fase_id) REFERENCES public.fase(id) NOT VALID;
+ALTER TABLE public.card
+    ADD CONSTRAINT card_artefato_id_fkey FOREIGN KEY (artefato_id) REFERENCES public.artefato(id) NOT VALID;
+ALTER TABLE public.card
+    ADD CONSTRAINT card_responsavel_id_fkey FOREIGN KEY (responsavel_id) REFERENCES public.usuario(id) NOT VALID;
+
+ALTER TABLE public.faseartefato
+    ADD CONSTRAINT faseartefato_fase_id_fkey FOREIGN KEY (fase_id) REFERENCES public.fase(id) ON DELETE CASCADE NOT VALID;
+ALTER TABLE public.faseartefato
+    ADD CONSTRAINT faseartefato_artefato_id_fkey FOREIGN KEY (artefato_id) REFERENCES public.artefato(id) ON DELETE CASCADE NOT VALID;
+
+ALTER TABLE public.projetousuario
+    ADD CONSTRAINT projetousuario_projeto_id_fkey FOREIGN KEY (projeto_id) REFERENCES public.projeto(id) ON DELETE CASCADE NOT VALID;
+ALTER TABLE public.projetousuario
+    ADD CONSTRAINT projetousuario_usuario_id_fkey FOREIGN KEY (usuario_id) REFERENCES public.usuario(id) ON DELETE CASCADE NOT VALID;
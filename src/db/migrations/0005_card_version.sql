@@ -0,0 +1,2 @@
+-- Versão do card para controle de concorrência otimista (ETag / If-Match no PATCH)
+ALTER TABLE public.card ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1;
@@ -0,0 +1,96 @@
+-- Rastreamento de tempo por status do card, mantido pelo próprio banco.
+--
+-- card.status_desde  : quando o card entrou no status atual
+-- card.iniciado_em   : primeira entrada em 'em_andamento' (início do cycle time)
+-- card.concluido_em  : entrada em 'concluido' (fim do cycle/lead time); limpo se o card reabrir
+-- card_status_transicao : uma linha por mudança de status, com o tempo gasto no status anterior
+-- card_status_tempo     : tempo acumulado por (card, status), somado a cada transição
+ALTER TABLE public.card ADD COLUMN IF NOT EXISTS status_desde timestamp with time zone NOT NULL DEFAULT now();
+ALTER TABLE public.card ADD COLUMN IF NOT EXISTS iniciado_em timestamp with time zone;
+ALTER TABLE public.card ADD COLUMN IF NOT EXISTS concluido_em timestamp with time zone;
+
+-- Cards existentes: sem histórico, os marcos saem de updated_at/started (que pode estar
+-- vazio ou depois da última atualização nos dados antigos)
+UPDATE public.card
+SET status_desde = updated_at,
+    iniciado_em  = CASE WHEN status <> 'a_fazer' THEN LEAST(COALESCE(started, created_at), updated_at) END,
+    concluido_em = CASE WHEN status = 'concluido' THEN updated_at END;
+
+CREATE TABLE public.card_status_transicao (
+    id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    card_id uuid NOT NULL REFERENCES public.card(id) ON DELETE CASCADE,
+    status_anterior public.cardstatus,
+    status_novo public.cardstatus NOT NULL,
+    alterado_em timestamp with time zone NOT NULL DEFAULT now(),
+    segundos_no_anterior double precision
+);
+CREATE INDEX ix_card_status_transicao_card_id_alterado_em ON public.card_status_transicao USING btree (card_id, alterado_em);
+
+CREATE TABLE public.card_status_tempo (
+    card_id uuid NOT NULL REFERENCES public.card(id) ON DELETE CASCADE,
+    status public.cardstatus NOT NULL,
+    segundos double precision NOT NULL DEFAULT 0,
+    PRIMARY KEY (card_id, status)
+);
+
+-- Mudança de status: registra a transição, acumula o tempo do status anterior e
+-- atualiza os marcos do card (inclusive started/progress, usados pela API antiga).
+CREATE FUNCTION public.card_status_on_update() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+DECLARE
+    agora timestamp with time zone := now();
+    segundos double precision;
+BEGIN
+    IF NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NEW;
+    END IF;
+
+    segundos := GREATEST(EXTRACT(EPOCH FROM agora - OLD.status_desde), 0);
+
+    INSERT INTO public.card_status_transicao (card_id, status_anterior, status_novo, alterado_em, segundos_no_anterior)
+    VALUES (NEW.id, OLD.status, NEW.status, agora, segundos);
+
+    INSERT INTO public.card_status_tempo AS t (card_id, status, segundos)
+    VALUES (NEW.id, OLD.status, segundos)
+    ON CONFLICT (card_id, status) DO UPDATE SET segundos = t.segundos + EXCLUDED.segundos;
+
+    NEW.status_desde := agora;
+    NEW.progress := agora;
+    IF NEW.status = 'em_andamento' THEN
+        NEW.started := agora;
+        NEW.iniciado_em := COALESCE(OLD.iniciado_em, agora);
+    END IF;
+    NEW.concluido_em := CASE WHEN NEW.status = 'concluido' THEN agora END;
+    RETURN NEW;
+END;
+$$;
+
+CREATE FUNCTION public.card_status_on_insert() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO public.card_status_transicao (card_id, status_anterior, status_novo, alterado_em)
+    VALUES (NEW.id, NULL, NEW.status, NEW.status_desde);
+    RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION public.card_status_before_insert() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.status_desde := now();
+    IF NEW.status <> 'a_fazer' THEN
+        NEW.iniciado_em := COALESCE(NEW.iniciado_em, now());
+    END IF;
+    IF NEW.status = 'concluido' THEN
+        NEW.concluido_em := COALESCE(NEW.concluido_em, now());
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER card_status_before_update BEFORE UPDATE OF status ON public.card
+    FOR EACH ROW EXECUTE FUNCTION public.card_status_on_update();
+CREATE TRIGGER card_status_before_insert BEFORE INSERT ON public.card
+    FOR EACH ROW EXECUTE FUNCTION public.card_status_before_insert();
+CREATE TRIGGER card_status_after_insert AFTER INSERT ON public.card
+    FOR EACH ROW EXECUTE FUNCTION public.card_status_on_insert();
@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Relatórios de cycle/lead time: só cards concluídos, por período e por ciclo
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_concluido_em ON public.card USING btree (concluido_em) WHERE concluido_em IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_ciclo_id_concluido_em ON public.card USING btree (ciclo_id, concluido_em) WHERE concluido_em IS NOT NULL;
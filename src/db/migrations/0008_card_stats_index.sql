@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- Estatísticas de card por ciclo/projeto: o índice do quadro passa a carregar também o
+-- responsável e as horas, para os GROUPING SETS saírem só do índice (index-only scan).
+-- Mesmas colunas-chave do anterior, que continua atendendo os filtros por ciclo/fase/status.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_card_ciclo_id_fase_id_status_incl ON public.card USING btree (ciclo_id, fase_id, status) INCLUDE (responsavel_id, tempo_planejado_horas);
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_card_ciclo_id_fase_id_status;
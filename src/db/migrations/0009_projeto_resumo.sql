@@ -0,0 +1,40 @@
+-- Resumo por projeto para o painel: ciclos, cards por status e horas planejadas x concluídas.
+-- Atualizado com REFRESH MATERIALIZED VIEW CONCURRENTLY (ver core/tasks.py), que exige o
+-- índice único em `id` e não bloqueia as leituras durante a atualização.
+CREATE MATERIALIZED VIEW public.projeto_resumo AS
+SELECT
+    p.id,
+    p.nome,
+    p.created_at,
+    COALESCE(ci.ciclos, 0) AS ciclos,
+    COALESCE(ca.cards, 0) AS cards,
+    COALESCE(ca.a_fazer, 0) AS cards_a_fazer,
+    COALESCE(ca.em_andamento, 0) AS cards_em_andamento,
+    COALESCE(ca.testes_validacao, 0) AS cards_testes_validacao,
+    COALESCE(ca.concluido, 0) AS cards_concluidos,
+    COALESCE(ca.horas_planejadas, 0) AS horas_planejadas,
+    COALESCE(ca.horas_concluidas, 0) AS horas_concluidas,
+    now() AS atualizado_em
+FROM public.projeto p
+LEFT JOIN (
+    SELECT projeto_id, count(*) AS ciclos
+    FROM public.ciclo
+    GROUP BY projeto_id
+) ci ON ci.projeto_id = p.id
+LEFT JOIN (
+    SELECT
+        ciclo.projeto_id,
+        count(*) AS cards,
+        count(*) FILTER (WHERE card.status = 'a_fazer') AS a_fazer,
+        count(*) FILTER (WHERE card.status = 'em_andamento') AS em_andamento,
+        count(*) FILTER (WHERE card.status = 'testes_validacao') AS testes_validacao,
+        count(*) FILTER (WHERE card.status = 'concluido') AS concluido,
+        sum(card.tempo_planejado_horas) AS horas_planejadas,
+        sum(card.tempo_planejado_horas) FILTER (WHERE card.status = 'concluido') AS horas_concluidas
+    FROM public.card
+    JOIN public.ciclo ON ciclo.id = card.ciclo_id
+    GROUP BY ciclo.projeto_id
+) ca ON ca.projeto_id = p.id;
+
+CREATE UNIQUE INDEX ux_projeto_resumo_id ON public.projeto_resumo USING btree (id);
+CREATE INDEX ix_projeto_resumo_created_at_id ON public.projeto_resumo USING btree (created_at, id);
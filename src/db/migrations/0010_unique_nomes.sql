@@ -0,0 +1,13 @@
+-- migrate: no-transaction
+-- Unicidade garantida pelo banco: as escritas detectam o nome duplicado no próprio
+-- INSERT/UPDATE (UniqueViolation), sem a consulta prévia de "já existe" e sem a janela
+-- em que duas requisições simultâneas gravavam o mesmo nome. O e-mail do usuário já é
+-- único (ix_usuario_email). Os índices únicos substituem os ix_*_nome comuns.
+-- Se já houver nomes repetidos, o CREATE falha e a migração para: corrija os registros
+-- (SELECT nome, COUNT(*) FROM <tabela> GROUP BY nome HAVING COUNT(*) > 1) e rode de novo.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_ciclo_nome ON public.ciclo USING btree (nome);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_projeto_nome ON public.projeto USING btree (nome);
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_artefato_nome ON public.artefato USING btree (nome);
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_ciclo_nome;
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_projeto_nome;
+DROP INDEX CONCURRENTLY IF EXISTS public.ix_artefato_nome;
@@ -0,0 +1,48 @@
+-- card.iniciado_em passa a seguir a mesma regra no INSERT e no UPDATE: é a primeira
+-- saída de 'a_fazer' (qualquer outro status), não só a entrada em 'em_andamento'.
+-- Antes, um card movido de 'a_fazer' direto para 'testes_validacao' ou 'concluido'
+-- ficava sem início (e sem cycle time), enquanto o mesmo card criado nesse status o tinha.
+-- `started` (API antiga) continua marcando a entrada em 'em_andamento'.
+CREATE OR REPLACE FUNCTION public.card_status_on_update() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+DECLARE
+    agora timestamp with time zone := now();
+    segundos double precision;
+BEGIN
+    IF NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NEW;
+    END IF;
+
+    segundos := GREATEST(EXTRACT(EPOCH FROM agora - OLD.status_desde), 0);
+
+    INSERT INTO public.card_status_transicao (card_id, status_anterior, status_novo, alterado_em, segundos_no_anterior)
+    VALUES (NEW.id, OLD.status, NEW.status, agora, segundos);
+
+    INSERT INTO public.card_status_tempo AS t (card_id, status, segundos)
+    VALUES (NEW.id, OLD.status, segundos)
+    ON CONFLICT (card_id, status) DO UPDATE SET segundos = t.segundos + EXCLUDED.segundos;
+
+    NEW.status_desde := agora;
+    NEW.progress := agora;
+    IF NEW.status = 'em_andamento' THEN
+        NEW.started := agora;
+    END IF;
+    IF NEW.status <> 'a_fazer' THEN
+        NEW.iniciado_em := COALESCE(OLD.iniciado_em, agora);
+    END IF;
+    NEW.concluido_em := CASE WHEN NEW.status = 'concluido' THEN agora END;
+    RETURN NEW;
+END;
+$$;
+
+-- Cards que saíram de 'a_fazer' sem passar por 'em_andamento': o início é a primeira
+-- transição para fora de 'a_fazer' registrada no histórico
+UPDATE public.card c
+SET iniciado_em = t.inicio
+FROM (
+    SELECT card_id, min(alterado_em) AS inicio
+    FROM public.card_status_transicao
+    WHERE status_novo <> 'a_fazer'
+    GROUP BY card_id
+) t
+WHERE t.card_id = c.id AND c.status <> 'a_fazer' AND c.iniciado_em IS NULL;
@@ -0,0 +1,11 @@
+-- Remover um projeto ou um ciclo não apaga mais em cascata os ciclos, os cards e o
+-- histórico de status abaixo dele: como nas fases, artefatos e usuários (card_*_fkey sem
+-- ON DELETE), o DELETE é recusado enquanto houver registros dependentes e a API
+-- responde 409. Bancos que já aplicaram a 0004 com ON DELETE CASCADE são corrigidos aqui.
+ALTER TABLE public.ciclo DROP CONSTRAINT IF EXISTS ciclo_projeto_id_fkey;
+ALTER TABLE public.ciclo
+    ADD CONSTRAINT ciclo_projeto_id_fkey FOREIGN KEY (projeto_id) REFERENCES public.projeto(id) NOT VALID;
+
+ALTER TABLE public.card DROP CONSTRAINT IF EXISTS card_ciclo_id_fkey;
+ALTER TABLE public.card
+    ADD CONSTRAINT card_ciclo_id_fkey FOREIGN KEY (ciclo_id) REFERENCES public.ciclo(id) NOT VALID;
@@ -0,0 +1,87 @@
+"""
+Cache de prepared statements por conexão.
+
+O psycopg prepara automaticamente uma consulta depois de DB_PREPARE_THRESHOLD execuções
+na mesma conexão e, a partir daí, só envia o nome do statement e os parâmetros: o
+Postgres não refaz o parse/análise e, depois de algumas execuções, reaproveita o plano
+genérico. O cache é limitado a DB_PREPARED_MAX statements por conexão (LRU: o menos usado
+recentemente é desalocado no servidor).
+
+Os contadores abaixo somam todas as conexões do processo e aparecem em `/health/db`:
+
+- hits: execuções que usaram um statement já preparado (parse/plano economizados);
+- prepared: statements preparados (primeira execução depois do limiar);
+- unprepared: execuções sem preparo (abaixo do limiar ou cache desligado);
+- evicted: statements desalocados por falta de espaço no cache;
+- resets: vezes em que o cache inteiro foi descartado (ROLLBACK, DROP/ALTER).
+
+Atenção: o psycopg descarta todos os prepared statements da conexão a cada ROLLBACK,
+por isso `Connection.release_conn` encerra as transações só de leitura com COMMIT.
+"""
+import logging
+
+from psycopg import AsyncConnection
+
+from core.config import settings
+
+# Os contadores dependem do gerenciador interno do psycopg (psycopg==3.3.x). Se a API
+# mudar, o cache continua funcionando; só os contadores deixam de ser coletados.
+try:
+    from psycopg._preparing import Prepare, PrepareManager
+except ImportError:
+    Prepare = PrepareManager = None
+
+
+_stats = {"hits": 0, "prepared": 0, "unprepared": 0, "evicted": 0, "resets": 0}
+# Falso se alguma conexão ficou sem o gerenciador que contabiliza (ver `configure_prepared`)
+_counting = PrepareManager is not None
+
+if PrepareManager is not None:
+    _RESULTS = {Prepare.YES: "hits", Prepare.SHOULD: "prepared", Prepare.NO: "unprepared"}
+
+    class _CountingPrepareManager(PrepareManager):
+        """`PrepareManager` do psycopg que contabiliza acertos, preparos e descartes."""
+
+        def get(self, query, prepare=None):
+            result = super().get(query, prepare)
+            # O ping da verificação de conexões do pool é uma consulta vazia: não conta
+            if query.query:
+                _stats[_RESULTS[result[0]]] += 1
+            return result
+
+        def _rotate(self) -> None:
+            before = len(self._names)
+            super()._rotate()
+            _stats["evicted"] += before - len(self._names)
+
+        def clear(self) -> bool:
+            cleared = super().clear()
+            if cleared:
+                _stats["resets"] += 1
+            return cleared
+
+
+def configure_prepared(conn: AsyncConnection) -> None:
+    """Liga o cache de prepared statements na conexão recém-aberta."""
+    global _counting
+    # Só troca o gerenciador se a conexão ainda usar o do psycopg; senão, mantém o que
+    # estiver lá (o cache segue funcionando) e os contadores deixam de ser confiáveis
+    if _counting and isinstance(getattr(conn, "_prepared", None), PrepareManager):
+        conn._prepared = _CountingPrepareManager()
+    elif _counting:
+        _counting = False
+        logging.warning("Contadores de prepared statements indisponíveis: conexão sem o PrepareManager esperado do psycopg.")
+    threshold = settings.DB_PREPARE_THRESHOLD
+    conn.prepare_threshold = threshold if threshold >= 0 else None
+    conn.prepared_max = settings.DB_PREPARED_MAX
+
+
+def prepared_stats() -> dict:
+    executions = _stats["hits"] + _stats["prepared"] + _stats["unprepared"]
+    return {
+        **_stats,
+        "hit_ratio": round(_stats["hits"] / executions, 3) if executions else 0.0,
+        "threshold": settings.DB_PREPARE_THRESHOLD,
+        "max_per_conn": settings.DB_PREPARED_MAX,
+        "counting": _counting,
+    }
@@ -0,0 +1,75 @@
+"""
+Unidade de trabalho: uma transação por operação de negócio.
+
+Os repositórios fazem as escritas dentro de `async with transaction(conn):` e não
+chamam `commit`/`rollback` por conta própria. O primeiro `transaction(conn)` aberto
+numa conexão é o dono da transação: ao sair sem erro faz um único `commit`; com erro,
+`rollback`. Os `transaction(conn)` abertos dentro dele (ex.: repositórios chamados por
+um serviço) apenas participam da mesma transação.
+
+    async with transaction(conn):
+        await projeto_repository.create_projeto(conn, dados)     # não faz commit
+        await ciclo_repository.create_ciclo(conn, ciclo)         # não faz commit
+    # commit único aqui (ou rollback de tudo, se algo falhou)
+
+Chamado fora de uma unidade de trabalho, o repositório abre a própria e faz o commit,
+como antes.
+"""
+import weakref
+from contextlib import asynccontextmanager
+
+from psycopg.pq import TransactionStatus
+
+
+class TransactionRollbackError(Exception):
+    """Uma etapa da unidade de trabalho falhou e o erro foi tratado no meio do caminho: nada foi gravado."""
+
+
+class _UnitOfWork:
+    __slots__ = ("rollback_only",)
+
+    def __init__(self):
+        self.rollback_only = False
+
+
+# Unidade de trabalho aberta em cada conexão (ou `DatabaseSession`)
+_active: "weakref.WeakKeyDictionary[object, _UnitOfWork]" = weakref.WeakKeyDictionary()
+
+
+def in_transaction(conn) -> bool:
+    return conn in _active
+
+
+def _transaction_status(conn):
+    info = getattr(conn, "info", None)
+    return getattr(info, "transaction_status", None)
+
+
+@asynccontextmanager
+async def transaction(conn):
+    unit = _active.get(conn)
+    if unit is not None:
+        # Participa da transação de quem abriu a unidade de trabalho. Um erro aqui marca
+        # a unidade para rollback, mesmo que seja tratado antes de chegar ao dono.
+        try:
+            yield unit
+        except BaseException:
+            unit.rollback_only = True
+            raise
+        return
+
+    unit = _active[conn] = _UnitOfWork()
+    try:
+        try:
+            yield unit
+        except BaseException:
+            await conn.rollback()
+            raise
+        # Um comando que falhou e teve o erro engolido deixa a transação abortada: o
+        # COMMIT viraria um ROLLBACK silencioso
+        if unit.rollback_only or _transaction_status(conn) == TransactionStatus.INERROR:
+            await conn.rollback()
+            raise TransactionRollbackError("Uma etapa da operação falhou; nenhuma alteração foi gravada.")
+        await conn.commit()
+    finally:
+        _active.pop(conn, None)
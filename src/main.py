@@ -1,6 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from psycopg_pool import PoolTimeout, TooManyRequests
+from db.connection import Connection
+from core.cache import cache_stats
+from core.compression import CompressionMiddleware
+from core.http_cache import ConditionalGetMiddleware
+from core.tasks import start_background_tasks, stop_background_tasks
 from routes.artefatos_router import router as artefatos_router
 from routes.fase_routes import fase_router as fase_routes
 from routes.ciclo_routes import router as ciclo_router
@@ -10,6 +17,22 @@ import uvicorn
 
 from routes.usuario_route import router as usuarioRouter
 
+# Ciclo de vida de cada worker: abre o pool de conexões (já dentro do processo do worker)
+# e as tarefas periódicas (ex.: recálculo do resumo dos projetos). No encerramento, que o
+# uvicorn só dispara depois de terminar as requisições em andamento, para as tarefas e
+# fecha as conexões com o banco.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = Connection()
+    await pool.open()
+    start_background_tasks()
+    try:
+        yield
+    finally:
+        await stop_background_tasks()
+        await pool.close_all()
+
+
 # Configuração da aplicação FastAPI
 app = FastAPI(
     title="API Backend - Sistema de Gerenciamento de Projetos",
@@ -18,6 +41,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # Configuração CORS para desenvolvimento
@@ -29,6 +53,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# GET condicional: ETag pelo hash do corpo (quando a rota não define um) e 304
+app.add_middleware(ConditionalGetMiddleware)
+
+# Compressão gzip/br/zstd negociada pelo Accept-Encoding (externa ao GET condicional)
+app.add_middleware(CompressionMiddleware)
+
 
 # Endpoint raiz
 @app.get("/", tags=["Health Check"])
@@ -49,6 +79,20 @@ async def health_check():
     return {"status": "healthy", "service": "usuario-api"}
 
 
+# Endpoint de métricas do pool de conexões
+@app.get("/health/db", tags=["Health Check"])
+async def db_pool_stats():
+    """Retorna as métricas do pool de conexões (em uso, ociosas, fila e tempo de espera)"""
+    return Connection().stats()
+
+
+
+# Endpoint de métricas dos caches em memória
+@app.get("/health/cache", tags=["Health Check"])
+async def cache_metrics():
+    """Retorna, por cache, o tamanho e os contadores de acertos, falhas, descartes e invalidações"""
+    return cache_stats()
+
 # Inclusão das rotas
 
 app.include_router(usuarioRouter)
@@ -59,6 +103,18 @@ app.include_router(projeto_router)
 app.include_router(card_router)
 
 
+# Pool de conexões esgotado: o cliente pode tentar novamente
+@app.exception_handler(PoolTimeout)
+@app.exception_handler(TooManyRequests)
+async def pool_exhausted_handler(request, exc):
+    """Responde 503 quando não há conexão livre no pool dentro do tempo limite"""
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Serviço temporariamente indisponível, tente novamente"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Manipulador de exceções global
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -72,6 +128,6 @@ async def global_exception_handler(request, exc):
     )
 
 
-# Configuração para executar diretamente
+# Execução direta para desenvolvimento (reload). Em produção: `python -m server`
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
 from model.card_status import CardStatus
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
+from uuid import UUID
 
 # DTO para Criação (CREATE)
 class CardCreateDTO(BaseModel):
@@ -37,6 +38,8 @@ class CardResponseDTO(BaseModel):
     responsavel_id: str = Field(..., description="Identificador do responsável associado")
     started: datetime = Field(description="Data de início do andamento do card", default=None)
     progress: datetime = Field(description="Progresso do andamento das atividades do card", default=None)
+    version: Optional[int] = Field(None, description="Versão do card (também enviada no header ETag)")
+    updated_at: Optional[datetime] = Field(None, exclude=True, description="Enviado só no header Last-Modified")
     # created_at: datetime = Field(..., description="Data de criação do registro")
     # updated_at: Optional[datetime] = Field(None, description="Data da última atualização do registro")
 
@@ -51,6 +54,80 @@ class CardResponseFiltroCicloDTO(BaseModel):
     fase_id: str = Field(..., description="Identificador da fase associado")
     artefato_id: str = Field(..., description="Identificador do artefato associado")
     responsavel_id: str = Field(..., description="Identificador do responsável associado")
-    projeto_id: str = Field(..., description="Identificador do projeto associado ao ciclo do card")
+    projeto_id: Optional[str] = Field(None, description="Identificador do projeto associado ao ciclo do card")
     started: datetime = Field(description="Data de início do andamento do card", default=None)
-    progress: datetime = Field(description="Progresso do andamento das atividades do card", default=None)
\ No newline at end of file
+    progress: datetime = Field(description="Progresso do andamento das atividades do card", default=None)
+    version: Optional[int] = Field(None, description="Versão do card (também enviada no header ETag)")
+    updated_at: Optional[datetime] = Field(None, exclude=True, description="Enviado só no header Last-Modified")
+
+# DTO de filtros combináveis da listagem/exportação de cards
+class CardFiltroDTO(BaseModel):
+    status: Optional[CardStatus] = Field(None, description="Status do card")
+    ciclo_id: Optional[UUID] = Field(None, description="Identificador do ciclo associado")
+    fase_id: Optional[UUID] = Field(None, description="Identificador da fase associada")
+    artefato_id: Optional[UUID] = Field(None, description="Identificador do artefato associado")
+    responsavel_id: Optional[UUID] = Field(None, description="Identificador do responsável associado")
+    projeto_id: Optional[UUID] = Field(None, description="Identificador do projeto (via ciclo do card)")
+    criado_de: Optional[datetime] = Field(None, description="Criado a partir de (inclusive)")
+    criado_ate: Optional[datetime] = Field(None, description="Criado antes de (exclusive)")
+    atualizado_de: Optional[datetime] = Field(None, description="Atualizado a partir de (inclusive)")
+    atualizado_ate: Optional[datetime] = Field(None, description="Atualizado antes de (exclusive)")
+
+    def ativos(self) -> set[str]:
+        """Nomes dos filtros informados."""
+        return set(self.model_dump(exclude_none=True))
+
+
+# Resultado de cada item da criação em lote (na mesma ordem do corpo enviado)
+class CardBulkItemResultDTO(BaseModel):
+    index: int = Field(..., description="Posição do item no corpo da requisição")
+    status: Literal["criado", "erro"] = Field(..., description="Resultado do item")
+    id: Optional[str] = Field(None, description="Identificador do card criado")
+    erros: Optional[list[str]] = Field(None, description="Motivos da rejeição do item")
+
+class CardBulkResponseDTO(BaseModel):
+    criados: int = Field(..., description="Quantidade de cards criados")
+    rejeitados: int = Field(..., description="Quantidade de itens rejeitados")
+    resultados: list[CardBulkItemResultDTO] = Field(..., description="Resultado por item")
+
+
+# Tempo por status de um card (mantido pelos triggers de transição)
+class CardTransicaoDTO(BaseModel):
+    status_anterior: Optional[CardStatus] = Field(None, description="Status de origem (vazio na criação)")
+    status_novo: CardStatus = Field(..., description="Status de destino")
+    alterado_em: datetime = Field(..., description="Momento da transição")
+    horas_no_anterior: Optional[float] = Field(None, description="Horas que o card ficou no status de origem")
+
+class CardTemposDTO(BaseModel):
+    card_id: str = Field(..., description="Identificador do card")
+    status: CardStatus = Field(..., description="Status atual")
+    status_desde: datetime = Field(..., description="Desde quando o card está no status atual")
+    iniciado_em: Optional[datetime] = Field(None, description="Primeira saída de a_fazer")
+    concluido_em: Optional[datetime] = Field(None, description="Entrada em concluído")
+    horas_por_status: dict[str, float] = Field(..., description="Horas acumuladas em cada status, incluindo o atual")
+    cycle_time_horas: Optional[float] = Field(None, description="Do início do andamento até a conclusão")
+    lead_time_horas: Optional[float] = Field(None, description="Da criação até a conclusão")
+    transicoes: list[CardTransicaoDTO] = Field(..., description="Histórico de mudanças de status")
+
+# Relatório de cycle/lead time dos cards concluídos
+class CardFluxoRelatorioDTO(BaseModel):
+    cards_concluidos: int = Field(..., description="Cards concluídos no recorte")
+    cycle_time_medio_horas: Optional[float] = Field(None, description="Média do cycle time")
+    cycle_time_p50_horas: Optional[float] = Field(None, description="Mediana do cycle time")
+    cycle_time_p85_horas: Optional[float] = Field(None, description="Percentil 85 do cycle time")
+    lead_time_medio_horas: Optional[float] = Field(None, description="Média do lead time")
+    lead_time_p50_horas: Optional[float] = Field(None, description="Mediana do lead time")
+    lead_time_p85_horas: Optional[float] = Field(None, description="Percentil 85 do lead time")
+
+
+# Estatísticas agregadas no banco (contagem e horas planejadas)
+class CardStatsGrupoDTO(BaseModel):
+    chave: Optional[str] = Field(None, description="Valor do agrupamento (status, id do responsável ou da fase)")
+    cards: int = Field(..., description="Quantidade de cards")
+    horas: float = Field(..., description="Soma do tempo planejado, em horas")
+
+class CardStatsDTO(BaseModel):
+    total: CardStatsGrupoDTO = Field(..., description="Totais de todos os cards do recorte")
+    por_status: list[CardStatsGrupoDTO] = Field(..., description="Totais por status")
+    por_responsavel: list[CardStatsGrupoDTO] = Field(..., description="Totais por responsável")
+    por_fase: list[CardStatsGrupoDTO] = Field(..., description="Totais por fase")
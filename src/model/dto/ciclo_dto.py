@@ -1,5 +1,10 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
+from model.card_status import CardStatus
+
 class CicloCreateDTO(BaseModel):
     nome: str = Field(..., description="Nome do ciclo", example="Ciclo de Desenvolvimento")
     versao: str = Field(..., description="Versão do ciclo", example="1.0.0")
@@ -14,4 +19,43 @@ class CicloResponseDTO(BaseModel):
     id: str = Field(..., description="Identificador único do ciclo")
     nome: str = Field(..., description="Nome do ciclo")
     versao: str = Field(..., description="Versão do ciclo")
-    projeto_id: str = Field(..., description="Identificador do projeto associado")
\ No newline at end of file
+    projeto_id: str = Field(..., description="Identificador do projeto associado")
+    updated_at: Optional[datetime] = Field(None, exclude=True, description="Enviado só no header Last-Modified")
+
+# |=======| QUADRO (KANBAN) DO CICLO |=======|
+class BoardCardDTO(BaseModel):
+    id: str = Field(..., description="Identificador do card")
+    status: CardStatus = Field(..., description="Status do card")
+    tempo_planejado_horas: float = Field(..., description="Tempo planejado do card")
+    link: Optional[str] = Field(None, description="Link associado ao card")
+    descricao: Optional[str] = Field(None, description="Descrição do card")
+    artefato_id: str = Field(..., description="Identificador do artefato associado")
+    responsavel_id: str = Field(..., description="Identificador do responsável associado")
+    version: int = Field(..., description="Versão do card (para o If-Match do PATCH)")
+    status_desde: Optional[datetime] = Field(None, description="Desde quando o card está no status atual")
+
+class BoardStatusDTO(BaseModel):
+    status: CardStatus = Field(..., description="Status (raia da coluna)")
+    total: int = Field(..., description="Quantidade de cards neste status")
+    horas: float = Field(..., description="Soma do tempo planejado dos cards neste status")
+    cards: list[BoardCardDTO] = Field(..., description="Cards neste status")
+
+class BoardArtefatoDTO(BaseModel):
+    id: str = Field(..., description="Identificador do artefato")
+    nome: str = Field(..., description="Nome do artefato")
+
+class BoardFaseDTO(BaseModel):
+    id: str = Field(..., description="Identificador da fase")
+    nome: str = Field(..., description="Nome da fase")
+    descritivo: Optional[str] = Field(None, description="Descritivo da fase")
+    ordem: int = Field(..., description="Posição da coluna no quadro")
+    artefatos: list[BoardArtefatoDTO] = Field(..., description="Artefatos associados à fase")
+    total_cards: int = Field(..., description="Quantidade de cards na coluna")
+    total_horas: float = Field(..., description="Soma do tempo planejado dos cards da coluna")
+    status: list[BoardStatusDTO] = Field(..., description="Cards da coluna agrupados por status")
+
+class CicloBoardDTO(BaseModel):
+    ciclo: CicloResponseDTO = Field(..., description="Dados do ciclo")
+    total_cards: int = Field(..., description="Quantidade de cards do ciclo")
+    total_horas: float = Field(..., description="Soma do tempo planejado dos cards do ciclo")
+    fases: list[BoardFaseDTO] = Field(..., description="Colunas do quadro, na ordem das fases")
@@ -14,6 +14,9 @@ class ProjetoBase(BaseModel):
 class ProjetoCreate(ProjetoBase):
     responsaveis_id: list[str] = Field(..., description="Identificador único dos responsáveis")
 
+class ProjetoUpdate(ProjetoBase):
+    responsaveis_id: Optional[list[str]] = Field(None, description="Equipe completa do projeto (omitido: mantém os responsáveis atuais)")
+
 class ProjetoResponse(ProjetoBase):
     id: str = Field(..., description="Identificador único do projeto")
     responsaveis: Optional[list[responsavel_dto]] = Field(..., description="Identificador único dos responsáveis")
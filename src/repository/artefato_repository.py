@@ -1,23 +1,31 @@
-from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import connection
-#from psycopg2 import AsyncConnection
+from psycopg import AsyncConnection, errors
+from psycopg.rows import dict_row, DictRow
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams, build_page, keyset_sql
 from model.artefato import ArtefatoBase
-from psycopg2.extras import RealDictRow
+from core.cache import publish_invalidation
 
 
 # |=======| LISTANDO TODOS OS ARTEFATOS |=======|
 async def get_all_artefatos(
-        conn: connection
-) -> list[RealDictRow]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        conn: AsyncConnection,
+        page: PageParams | None = None
+) -> Page:
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                            SELECT id, nome FROM artefato;
-                        """)
+            await cursor.execute(f"""
+                            SELECT id, nome, created_at FROM artefato
+                            WHERE {where}
+                            ORDER BY {order_by}
+                            LIMIT %s;
+                        """, params)
 
-            artefatos = cursor.fetchall()
-            return artefatos
+            artefatos = await cursor.fetchall()
+            return build_page(artefatos, page)
         except Exception as e:
             print_error_details(e)
             raise e
@@ -25,16 +33,16 @@ async def get_all_artefatos(
 # FIND BY ID
 
 async def get_artefato_by_id(
-    conn: connection,
+    conn: AsyncConnection,
     artefato_id: str
-) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                             SELECT id, nome FROM artefato WHERE id = %s;
                         """, (artefato_id,))
 
-            artefato = cursor.fetchone()
+            artefato = await cursor.fetchone()
             return artefato
         except Exception as e:
             print_error_details(e)
@@ -43,74 +51,65 @@ async def get_artefato_by_id(
 
 # |=======| POST
 async def create_artefato(
-    conn: connection,
+    conn: AsyncConnection,
     artefato: ArtefatoBase
-) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                            INSERT INTO artefato (nome) 
-                            VALUES (%s) 
-                            RETURNING id, nome, created_at;
-                        """, (artefato.nome,))
+            async with transaction(conn):
+                await cursor.execute("""
+                                INSERT INTO artefato (nome) 
+                                VALUES (%s) 
+                                RETURNING id, nome, created_at;
+                            """, (artefato.nome,))
             
-            created = cursor.fetchone()
-            conn.commit()
-            return created
+                created = await cursor.fetchone()
+                # As fases trazem os nomes dos artefatos: invalida os dois caches
+                await publish_invalidation(cursor, "artefatos", "fases")
+                return created
+        except errors.UniqueViolation:
+            # O nome é único no banco (ux_artefato_nome): o conflito vem do próprio INSERT
+            raise ValueError(f"Já existe um artefato com o nome {artefato.nome}.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             return None
 
 # PUT
 async def update_artefato(
-    conn: connection,
+    conn: AsyncConnection,
     artefato_id: str,
     artefato: ArtefatoBase
-) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                            UPDATE artefato SET nome = %s WHERE id = %s RETURNING id, nome;
-                        """, (artefato.nome, artefato_id))
-            updated = cursor.fetchone()
-            conn.commit()
-            return updated
+            async with transaction(conn):
+                await cursor.execute("""
+                                UPDATE artefato SET nome = %s, updated_at = now() WHERE id = %s RETURNING id, nome;
+                            """, (artefato.nome, artefato_id))
+                updated = await cursor.fetchone()
+                await publish_invalidation(cursor, "artefatos", "fases")
+                return updated
+        except errors.UniqueViolation:
+            raise ValueError(f"Já existe um artefato com o nome {artefato.nome}.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 # DELETE
-async def delete_artefato(conn: connection, artefato_id: str) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+async def delete_artefato(conn: AsyncConnection, artefato_id: str) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                            DELETE FROM artefato WHERE id = %s
-                            RETURNING id, nome;
-                        """, (artefato_id,))
-            deleted = cursor.fetchone()
-            conn.commit()
-            return deleted
+            async with transaction(conn):
+                await cursor.execute("""
+                                DELETE FROM artefato WHERE id = %s
+                                RETURNING id, nome;
+                            """, (artefato_id,))
+                deleted = await cursor.fetchone()
+                await publish_invalidation(cursor, "artefatos", "fases")
+                return deleted
+        except errors.ForeignKeyViolation:
+            # card.artefato_id não tem ON DELETE (migração 0004)
+            raise RegistroEmUsoError("O artefato possui cards e não pode ser removido.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
-
-
-async def get_artefato_by_name(
-    conn: connection,
-    nome_artefato: str,
-) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        try:
-            cursor.execute("""
-                            SELECT id, nome, created_at, updated_at FROM artefato
-                            WHERE nome = %s
-                        """, (nome_artefato,))
-
-            artefato = cursor.fetchone()
-            return artefato
-        except Exception as e:
-            print_error_details(e)
-            raise e
\ No newline at end of file
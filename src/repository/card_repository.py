@@ -1,275 +1,519 @@
-from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row, DictRow
+from db.transaction import transaction
 from model.card import CardModel # Importação do seu modelo (usado apenas para tipagem no service)
-from model.dto.card_dto import CardCreateDTO, CardUpdateDTO
+from model.dto.card_dto import CardCreateDTO, CardUpdateDTO, CardFiltroDTO
 from utils.functions import print_error_details
-from psycopg2.extras import RealDictRow
-from typing import Optional, List, Dict, Any
+from utils.pagination import Page, PageParams, build_page, keyset_sql
+from typing import Optional, List, Dict, Any, AsyncIterator
 from datetime import datetime
+from enum import Enum
 import uuid
 
 
 # Os campos do CardModel são:
 # status, tempo_planejado_horas, link, descricao, ciclo_id, fase_id, artefato_id, responsavel_id
 
-CARD_COLUMNS = "id, status, tempo_planejado_horas, link, descricao, ciclo_id, fase_id, artefato_id, responsavel_id, created_at, updated_at"
+CARD_COLUMNS = "id, status, tempo_planejado_horas, link, descricao, ciclo_id, fase_id, artefato_id, responsavel_id, created_at, updated_at, version"
+# As listagens trazem também o projeto do ciclo de cada card, qualquer que seja o filtro
+# (busca pela PK do ciclo, só para as linhas da página)
+CARD_PROJETO_COLUMN = "(SELECT projeto_id FROM ciclo WHERE ciclo.id = card.ciclo_id) AS projeto_id"
 
 
 # |=======| LISTANDO TODOS OS CARDS |=======|
-async def get_all_cards(conn: connection) -> List[RealDictRow]:
-    """Retorna todos os cards do banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+async def get_all_cards(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+    """Retorna uma página dos cards do banco de dados, do mais recente para o mais antigo."""
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(f"""
-                SELECT {CARD_COLUMNS}
+            await cursor.execute(f"""
+                SELECT {CARD_COLUMNS}, {CARD_PROJETO_COLUMN}
                 FROM card
-                ORDER BY created_at DESC;
-            """)
-            cards = cursor.fetchall()
-            return cards
+                WHERE {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, params)
+            cards = await cursor.fetchall()
+            return build_page(cards, page)
         except Exception as e:
             print_error_details(e)
             raise e
 
 
+# |=======| EXPORTAR CARDS (CURSOR NO SERVIDOR) |=======|
+async def stream_cards(
+    conn: AsyncConnection,
+    batch_size: int,
+    filtro: Optional[CardFiltroDTO] = None
+) -> AsyncIterator[List[DictRow]]:
+    """
+    Percorre os cards com um cursor nomeado (server-side), em lotes de `batch_size` linhas.
+
+    Só um lote fica em memória por vez, independente do tamanho da tabela.
+    """
+    where, values = build_card_filter(filtro)
+
+    # Cursores nomeados só existem dentro de uma transação
+    async with conn.transaction():
+        async with conn.cursor(name="card_export", row_factory=dict_row) as cursor:
+            try:
+                await cursor.execute(f"""
+                    SELECT {CARD_COLUMNS}, started, progress
+                    FROM card
+                    WHERE {where}
+                    ORDER BY created_at DESC, id DESC;
+                """, values)
+                while batch := await cursor.fetchmany(batch_size):
+                    yield batch
+            except Exception as e:
+                print_error_details(e)
+                raise e
+
+
 # |=======| BUSCAR CARD POR ID |=======|
 async def get_card_by_id(
-    conn: connection,
+    conn: AsyncConnection,
     card_id: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Busca um card pelo ID."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(f"""
+            await cursor.execute(f"""
                 SELECT {CARD_COLUMNS}
                 FROM card
                 WHERE id = %s;
             """, (card_id,))
-            card = cursor.fetchone()
+            card = await cursor.fetchone()
             return card
         except Exception as e:
             print_error_details(e)
             raise e
 
 
+# |=======| VALIDADORES DO CARD (GET CONDICIONAL) |=======|
+async def get_card_validator(conn: AsyncConnection, card_id: str) -> Optional[DictRow]:
+    """Só `version` e `updated_at`: basta para responder 304 sem buscar o card inteiro."""
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute("SELECT version, updated_at FROM card WHERE id = %s;", (card_id,))
+            return await cursor.fetchone()
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
 # |=======| CRIAR CARD |=======|
 async def create_card(
-    conn: connection,
+    conn: AsyncConnection,
     card_data: CardCreateDTO
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Cria um novo card no banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            card_id = str(uuid.uuid4())
-            now = datetime.utcnow()
-
-            cursor.execute("""
-                INSERT INTO card (
-                    id, status, tempo_planejado_horas, link, descricao, 
-                    ciclo_id, fase_id, artefato_id, responsavel_id, created_at
-                ) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
-                RETURNING id, status, tempo_planejado_horas, link, descricao, ciclo_id, fase_id, artefato_id, responsavel_id, created_at;
-            """, (
-                card_id,
-                card_data.status.value, # Usamos .value para persistir o Enum como string
-                card_data.tempo_planejado_horas, 
-                card_data.link, 
-                card_data.descricao, 
-                card_data.ciclo_id, 
-                card_data.fase_id, 
-                card_data.artefato_id, 
-                card_data.responsavel_id, 
-                now
-            ))
-
-            created_card = cursor.fetchone()
-            conn.commit()
-            return created_card
+            async with transaction(conn):
+                card_id = str(uuid.uuid4())
+                now = datetime.utcnow()
+
+                await cursor.execute("""
+                    INSERT INTO card (
+                        id, status, tempo_planejado_horas, link, descricao, 
+                        ciclo_id, fase_id, artefato_id, responsavel_id, created_at
+                    ) 
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
+                    RETURNING id, status, tempo_planejado_horas, link, descricao, ciclo_id, fase_id, artefato_id, responsavel_id, created_at;
+                """, (
+                    card_id,
+                    card_data.status.value, # Usamos .value para persistir o Enum como string
+                    card_data.tempo_planejado_horas, 
+                    card_data.link, 
+                    card_data.descricao, 
+                    card_data.ciclo_id, 
+                    card_data.fase_id, 
+                    card_data.artefato_id, 
+                    card_data.responsavel_id, 
+                    now
+                ))
+
+                created_card = await cursor.fetchone()
+                return created_card
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             return None
 
-def update_card_progress(card, new_status: str):
-    
-    started_time = card.get("started_time")
-    progress = card.get("progress")
-    
-    try:
-        card_current_status = card.get("status")
-        
-        if card_current_status != new_status:
-            if new_status == "em_andamento":
-                started_time = datetime.utcnow()
-            elif new_status != "em_andamento":
-                progress = datetime.utcnow() - started_time
-                started_time = None
-        
-        return started_time, progress
-        
-    except Exception as e:
-        raise e
+# |=======| CRIAR CARDS EM LOTE (COPY) |=======|
+BULK_COLUMNS = ("id", "status", "tempo_planejado_horas", "link", "descricao", "ciclo_id", "fase_id", "artefato_id", "responsavel_id")
+
+
+async def get_existing_references(
+    conn: AsyncConnection,
+    ciclo_ids: List[str],
+    fase_ids: List[str],
+    artefato_ids: List[str],
+    responsavel_ids: List[str]
+) -> Dict[str, set]:
+    """Retorna, em uma única consulta, quais dos IDs referenciados existem em cada tabela."""
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute("""
+                SELECT 'ciclo_id' AS ref, id FROM ciclo WHERE id = ANY(%s::uuid[])
+                UNION ALL
+                SELECT 'fase_id', id FROM fase WHERE id = ANY(%s::uuid[])
+                UNION ALL
+                SELECT 'artefato_id', id FROM artefato WHERE id = ANY(%s::uuid[])
+                UNION ALL
+                SELECT 'responsavel_id', id FROM usuario WHERE id = ANY(%s::uuid[]);
+            """, (ciclo_ids, fase_ids, artefato_ids, responsavel_ids))
+            existing = {"ciclo_id": set(), "fase_id": set(), "artefato_id": set(), "responsavel_id": set()}
+            for row in await cursor.fetchall():
+                existing[row["ref"]].add(row["id"])
+            return existing
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
+async def bulk_create_cards(
+    conn: AsyncConnection,
+    cards: List[tuple]
+) -> int:
+    """
+    Insere vários cards com um único COPY, em uma só transação.
+
+    Cada item de `cards` é uma tupla na ordem de `BULK_COLUMNS`, com o id já gerado.
+    """
+    async with conn.cursor() as cursor:
+        try:
+            async with transaction(conn):
+                async with cursor.copy(f"COPY card ({', '.join(BULK_COLUMNS)}) FROM STDIN") as copy:
+                    for card in cards:
+                        await copy.write_row(card)
+                return len(cards)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+# Campos que o PATCH pode alterar
+CARD_UPDATABLE = ("status", "tempo_planejado_horas", "link", "descricao", "fase_id", "artefato_id", "responsavel_id")
+
+# Só troca o status: o trigger `card_status_before_update` (migrações 0006 e 0011) registra a
+# transição, acumula o tempo no status anterior e atualiza started/progress/status_desde/
+# iniciado_em/concluido_em na mesma linha.
+STATUS_TRANSITION_SQL = "status = %(status)s::cardstatus"
+
 
 # |=======| ATUALIZAR CARD (PATCH) |=======|
 async def update_card(
-    conn: connection,
+    conn: AsyncConnection,
     card_id: str,
-    update_data: Dict[str, Any] # Espera um dicionário com os campos a serem atualizados
-) -> Optional[RealDictRow]:
-    """Atualiza um card existente. Realiza uma atualização parcial (PATCH)."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    update_data: Dict[str, Any], # Espera um dicionário com os campos a serem atualizados
+    expected_version: Optional[int] = None
+) -> tuple[Optional[DictRow], Optional[int]]:
+    """
+    Atualiza um card existente (PATCH) em um único comando, sem leitura prévia. Sem
+    campos a alterar, não executa o UPDATE e devolve o card atual.
+
+    Com `expected_version`, só atualiza se a versão do card ainda for essa (If-Match).
+    Retorna `(card_atualizado, versão_atual)`: sem card atualizado, `versão_atual` None
+    indica card inexistente e um número indica conflito de versão.
+    """
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            now = datetime.utcnow()
-            
-            current_card = await get_card_by_id(conn, card_id)
-            
-            # 1. Cria a query de forma dinâmica
-            set_clauses = []
-            values = []
-            
-            # Mapeamento do Enum para string antes de construir a query
-            if 'status' in update_data and update_data['status'] is not None:
-                update_data['status'] = update_data['status'].value
-                update_data['started_time'], update_data['progress'] = update_card_progress(card=current_card, new_status=update_data['status'])
-                
-
-            for key, value in update_data.items():
-                # A chave 'id' é ignorada, se presente
-                if key != 'id':
-                    set_clauses.append(f"{key} = %s")
-                    values.append(value)
-            
-            # Adiciona updated_at e o card_id no final
-            set_clauses.append("updated_at = %s")
-            values.append(now)
-            values.append(card_id)
-
-            set_clause = ", ".join(set_clauses)
-
-            if not set_clause:
-                return await get_card_by_id(conn, card_id) # Nada para atualizar
-
-            query = f"""
-                UPDATE card 
-                SET {set_clause}
-                WHERE id = %s 
-                RETURNING {CARD_COLUMNS};
-            """
-            
-            cursor.execute(query, tuple(values))
+            async with transaction(conn):
+                set_clauses = []
+                values: Dict[str, Any] = {"card_id": card_id, "expected_version": expected_version}
+
+                for key, value in update_data.items():
+                    if key not in CARD_UPDATABLE:
+                        continue
+                    if key == "status":
+                        set_clauses.append(STATUS_TRANSITION_SQL)
+                    else:
+                        set_clauses.append(f"{key} = %({key})s")
+                    values[key] = value.value if isinstance(value, Enum) else value
+
+                if not set_clauses:
+                    # Nada a alterar: devolve o card como está, sem mudar a versão (e o
+                    # ETag dos outros clientes); o If-Match continua sendo conferido
+                    await cursor.execute(f"SELECT {CARD_COLUMNS} FROM card WHERE id = %s;", (card_id,))
+                    row = await cursor.fetchone()
+                    if row is None:
+                        return None, None
+                    if expected_version is not None and row["version"] != expected_version:
+                        return None, row["version"]
+                    return row, row["version"]
 
-            updated_card = cursor.fetchone()
-            conn.commit()
-            return updated_card
+                set_clauses.append("updated_at = now()")
+                set_clauses.append("version = version + 1")
+
+                await cursor.execute(f"""
+                    UPDATE card 
+                    SET {", ".join(set_clauses)}
+                    WHERE id = %(card_id)s
+                      AND (%(expected_version)s::integer IS NULL OR version = %(expected_version)s::integer)
+                    RETURNING {CARD_COLUMNS};
+                """, values)
+                row = await cursor.fetchone()
+                if row is not None:
+                    return row, row["version"]
+
+                # Nada atualizado: card inexistente ou versão diferente. A versão é lida num
+                # comando à parte (snapshot novo): se outro escritor fez commit enquanto o
+                # UPDATE esperava o lock da linha, o snapshot do UPDATE ainda veria a versão
+                # antiga e o 412 informaria a versão errada.
+                await cursor.execute("SELECT version FROM card WHERE id = %s;", (card_id,))
+                atual = await cursor.fetchone()
+                return None, atual["version"] if atual else None
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
 # |=======| DELETAR CARD |=======|
 async def delete_card(
-    conn: connection,
+    conn: AsyncConnection,
     card_id: str
 ) -> int: # Retorna o número de linhas afetadas (0 ou 1)
     """Deleta um card do banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                DELETE FROM card 
-                WHERE id = %s;
-            """, (card_id,))
+            async with transaction(conn):
+                await cursor.execute("""
+                    DELETE FROM card 
+                    WHERE id = %s;
+                """, (card_id,))
             
-            deleted_count = cursor.rowcount
-            conn.commit()
-            return deleted_count
+                deleted_count = cursor.rowcount
+                return deleted_count
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
-# |=======| BUSCAR CARDS POR STATUS |=======|
-async def get_cards_by_status(
-    conn: connection,
-    status: str
-) -> List[RealDictRow]:
-    """Busca cards por status."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+# |=======| FILTROS COMBINADOS (QUERY BUILDER) |=======|
+# Filtro do DTO -> condição SQL. Só colunas desta lista entram na query; os valores
+# sempre vão como parâmetros.
+CARD_FILTERS = {
+    "status":         "status = %s",
+    "ciclo_id":       "ciclo_id = %s::uuid",
+    "fase_id":        "fase_id = %s::uuid",
+    "artefato_id":    "artefato_id = %s::uuid",
+    "responsavel_id": "responsavel_id = %s::uuid",
+    "projeto_id":     "ciclo_id IN (SELECT id FROM ciclo WHERE projeto_id = %s::uuid)",
+    "criado_de":      "created_at >= %s",
+    "criado_ate":     "created_at < %s",
+    "atualizado_de":  "updated_at >= %s",
+    "atualizado_ate": "updated_at < %s",
+}
+
+
+def build_card_filter(filtro: Optional[CardFiltroDTO]) -> tuple[str, list]:
+    """Combina os filtros informados em um único WHERE parametrizado (AND)."""
+    clauses, values = [], []
+    for field, value in (filtro.model_dump(exclude_none=True) if filtro else {}).items():
+        clauses.append(CARD_FILTERS[field])
+        values.append(value.value if isinstance(value, Enum) else value)
+    return " AND ".join(clauses) or "TRUE", values
+
+
+# |=======| BUSCAR CARDS POR FILTROS |=======|
+async def get_cards_filtered(
+    conn: AsyncConnection,
+    filtro: CardFiltroDTO,
+    page: Optional[PageParams] = None
+) -> Page:
+    """Busca uma página dos cards que atendem a todos os filtros informados."""
+    page = page or PageParams.first()
+    filter_sql, filter_values = build_card_filter(filtro)
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(f"""
-                SELECT {CARD_COLUMNS}
+            await cursor.execute(f"""
+                SELECT {CARD_COLUMNS}, {CARD_PROJETO_COLUMN}
                 FROM card 
-                WHERE status = %s
-                ORDER BY created_at DESC;
-            """, (status,))
-            cards = cursor.fetchall()
-            return cards
+                WHERE {filter_sql} AND {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, (*filter_values, *params))
+            cards = await cursor.fetchall()
+            return build_page(cards, page)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
+# |=======| ESTATÍSTICAS (GROUPING SETS) |=======|
+async def get_card_stats(conn: AsyncConnection, filtro: Optional[CardFiltroDTO] = None) -> List[DictRow]:
+    """
+    Contagem e horas planejadas dos cards filtrados: total geral, por status, por
+    responsável e por fase, em uma única passada (GROUPING SETS). Cada linha traz o
+    `grupo` ('total', 'status', 'responsavel' ou 'fase') e a `chave` do agrupamento.
+    """
+    filter_sql, filter_values = build_card_filter(filtro)
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute(f"""
+                SELECT
+                    CASE GROUPING(status, responsavel_id, fase_id)
+                        WHEN 7 THEN 'total'
+                        WHEN 3 THEN 'status'
+                        WHEN 5 THEN 'responsavel'
+                        ELSE 'fase'
+                    END AS grupo,
+                    COALESCE(status::text, responsavel_id::text, fase_id::text) AS chave,
+                    count(*) AS cards,
+                    COALESCE(sum(tempo_planejado_horas), 0) AS horas
+                FROM card
+                WHERE {filter_sql}
+                GROUP BY GROUPING SETS ((), (status), (responsavel_id), (fase_id))
+                ORDER BY grupo, horas DESC, chave;
+            """, filter_values)
+            return await cursor.fetchall()
         except Exception as e:
             print_error_details(e)
             raise e
 
 
+# |=======| BUSCAR CARDS POR STATUS |=======|
+async def get_cards_by_status(
+    conn: AsyncConnection,
+    status: str,
+    page: Optional[PageParams] = None
+) -> Page:
+    """Busca uma página dos cards por status."""
+    return await get_cards_filtered(conn, CardFiltroDTO(status=status), page)
+
+
 # |=======| BUSCAR CARDS POR CICLO |=======|
 async def get_cards_by_ciclo(
-    conn: connection,
-    ciclo_id: str
-) -> List[RealDictRow]:
-    """Busca cards por ID do ciclo associado."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    conn: AsyncConnection,
+    ciclo_id: str,
+    page: Optional[PageParams] = None
+) -> Page:
+    """
+    Busca uma página dos cards por ID do ciclo associado, já com o `projeto_id` do ciclo
+    (subconsulta não correlacionada, avaliada uma vez na mesma query).
+    """
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(f"""
-                SELECT {CARD_COLUMNS}
+            await cursor.execute(f"""
+                SELECT {CARD_COLUMNS}, (SELECT projeto_id FROM ciclo WHERE id = %s::uuid) AS projeto_id
                 FROM card 
-                WHERE ciclo_id = %s
-                ORDER BY created_at DESC;
-            """, (ciclo_id,))
-            cards = cursor.fetchall()
-            return cards
+                WHERE ciclo_id = %s::uuid AND {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, (ciclo_id, ciclo_id, *params))
+            cards = await cursor.fetchall()
+            return build_page(cards, page)
         except Exception as e:
             print_error_details(e)
             raise e
 
 # |=======| BUSCAR CARDS POR RESPONSÁVEL |=======|
 async def get_cards_by_responsavel(
-    conn: connection,
-    responsavel_id: str
-) -> List[RealDictRow]:
-    """Busca cards por ID do responsável associado."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    conn: AsyncConnection,
+    responsavel_id: str,
+    page: Optional[PageParams] = None
+) -> Page:
+    """Busca uma página dos cards por ID do responsável associado."""
+    return await get_cards_filtered(conn, CardFiltroDTO(responsavel_id=responsavel_id), page)
+
+
+async def update_card_status(conn: AsyncConnection, card_id: str, status: str) -> Optional[dict]:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(f"""
-                SELECT {CARD_COLUMNS}
-                FROM card 
-                WHERE responsavel_id = %s
-                ORDER BY created_at DESC;
-            """, (responsavel_id,))
-            cards = cursor.fetchall()
-            return cards
+            async with transaction(conn):
+                await cursor.execute(f"""
+                    UPDATE card
+                    SET 
+                        {STATUS_TRANSITION_SQL},
+                        updated_at = NOW(),
+                        version = version + 1
+                    WHERE id = %(card_id)s
+                    RETURNING id, status, updated_at, version;
+                """, {"status": status, "card_id": card_id})
+            
+                updated_card = await cursor.fetchone()
+                return updated_card
+        
         except Exception as e:
             print_error_details(e)
             raise e
-        
-# TODO: get card by fase; get card by projeto
 
-async def update_card_status(conn: connection, card_id: str, status: str) -> Optional[dict]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+# |=======| TEMPO POR STATUS DE UM CARD |=======|
+async def get_card_tempos(conn: AsyncConnection, card_id: str) -> Optional[dict]:
+    """
+    Marcos do card, tempo acumulado por status e histórico de transições.
+    O tempo do status atual ainda não foi acumulado: vem em `segundos_status_atual`.
+    """
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                UPDATE card
-                SET 
-                    status = %s,
-                    updated_at = NOW()
-                WHERE id = %s
-                RETURNING id, status, updated_at;
-            """, (status, card_id))
-            
-            updated_card = cursor.fetchone()
-            conn.commit()
-            return updated_card
-        
+            await cursor.execute("""
+                SELECT id, status, created_at, status_desde, iniciado_em, concluido_em,
+                       EXTRACT(EPOCH FROM now() - status_desde)::float AS segundos_status_atual
+                FROM card
+                WHERE id = %s;
+            """, (card_id,))
+            card = await cursor.fetchone()
+            if not card:
+                return None
+
+            await cursor.execute("""
+                SELECT status, segundos FROM card_status_tempo WHERE card_id = %s;
+            """, (card_id,))
+            card["tempos"] = await cursor.fetchall()
+
+            await cursor.execute("""
+                SELECT status_anterior, status_novo, alterado_em, segundos_no_anterior
+                FROM card_status_transicao
+                WHERE card_id = %s
+                ORDER BY alterado_em, id;
+            """, (card_id,))
+            card["transicoes"] = await cursor.fetchall()
+            return card
         except Exception as e:
             print_error_details(e)
-            conn.rollback()
-            raise e
\ No newline at end of file
+            raise e
+
+
+# |=======| RELATÓRIO DE CYCLE/LEAD TIME |=======|
+# Só cards com `concluido_em`: a busca usa os índices parciais da migração 0007
+FLUXO_FILTERS = {
+    "ciclo_id":      "ciclo_id = %s::uuid",
+    "projeto_id":    "ciclo_id IN (SELECT id FROM ciclo WHERE projeto_id = %s::uuid)",
+    "concluido_de":  "concluido_em >= %s",
+    "concluido_ate": "concluido_em < %s",
+}
+
+
+async def get_fluxo_report(conn: AsyncConnection, filtros: Dict[str, Any]) -> dict:
+    """Média e percentis (50/85) de cycle time e lead time, em horas."""
+    clauses, values = ["concluido_em IS NOT NULL"], []
+    for field, value in filtros.items():
+        if value is not None:
+            clauses.append(FLUXO_FILTERS[field])
+            values.append(value)
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute(f"""
+                WITH t AS (
+                    SELECT EXTRACT(EPOCH FROM concluido_em - iniciado_em) / 3600 AS cycle,
+                           EXTRACT(EPOCH FROM concluido_em - created_at) / 3600 AS lead
+                    FROM card
+                    WHERE {" AND ".join(clauses)}
+                )
+                SELECT count(*) AS cards_concluidos,
+                       avg(cycle)::float AS cycle_time_medio_horas,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY cycle) AS cycle_time_p50_horas,
+                       percentile_cont(0.85) WITHIN GROUP (ORDER BY cycle) AS cycle_time_p85_horas,
+                       avg(lead)::float AS lead_time_medio_horas,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY lead) AS lead_time_p50_horas,
+                       percentile_cont(0.85) WITHIN GROUP (ORDER BY lead) AS lead_time_p85_horas
+                FROM t;
+            """, values)
+            return await cursor.fetchone()
+        except Exception as e:
+            print_error_details(e)
+            raise e
@@ -1,26 +1,32 @@
-from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection, errors
+from psycopg.rows import dict_row, DictRow
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from model.ciclo import Ciclo
 from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO
 from utils.functions import print_error_details
-from psycopg2.extras import RealDictRow
+from utils.pagination import Page, PageParams, build_page, keyset_sql
 from typing import Optional, List
 from datetime import datetime
 import uuid
 
 
 # |=======| LISTANDO TODOS OS CICLOS |=======|
-async def get_all_ciclos(conn: connection) -> List[RealDictRow]:
-    """Retorna todos os ciclos do banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+async def get_all_ciclos(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+    """Retorna uma página dos ciclos do banco de dados, do mais recente para o mais antigo."""
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
                 SELECT id, nome, versao, projeto_id, created_at, updated_at 
                 FROM ciclo 
-                ORDER BY created_at DESC;
-            """)
-            ciclos = cursor.fetchall()
-            return ciclos
+                WHERE {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, params)
+            ciclos = await cursor.fetchall()
+            return build_page(ciclos, page)
         except Exception as e:
             print_error_details(e)
             raise e
@@ -28,165 +34,224 @@ async def get_all_ciclos(conn: connection) -> List[RealDictRow]:
 
 # |=======| BUSCAR CICLO POR ID |=======|
 async def get_ciclo_by_id(
-    conn: connection,
+    conn: AsyncConnection,
     ciclo_id: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Busca um ciclo pelo ID."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT id, nome, versao, projeto_id, created_at, updated_at 
                 FROM ciclo 
                 WHERE id = %s;
             """, (ciclo_id,))
-            ciclo = cursor.fetchone()
+            ciclo = await cursor.fetchone()
             return ciclo
         except Exception as e:
             print_error_details(e)
             raise e
 
 
+# |=======| ÚLTIMA ALTERAÇÃO DO CICLO (GET CONDICIONAL) |=======|
+async def get_ciclo_last_modified(conn: AsyncConnection, ciclo_id: str) -> Optional[datetime]:
+    """Só o `updated_at` do ciclo, para responder 304 sem buscar o registro inteiro."""
+    async with conn.cursor() as cursor:
+        try:
+            await cursor.execute("SELECT updated_at FROM ciclo WHERE id = %s;", (ciclo_id,))
+            row = await cursor.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
+# |=======| QUADRO (KANBAN) DO CICLO |=======|
+# Monta o quadro inteiro no banco: uma coluna por fase (na `ordem`), com seus artefatos
+# e os cards do ciclo agrupados por status, já com contagens e somas de horas. Todos os
+# status aparecem em todas as colunas, mesmo vazios.
+BOARD_SQL = """
+    WITH ci AS (
+        SELECT id, nome, versao, projeto_id FROM ciclo WHERE id = %(ciclo_id)s::uuid
+    ),
+    por_status AS (
+        SELECT fase_id, status, count(*) AS total, sum(tempo_planejado_horas) AS horas,
+               json_agg(json_build_object(
+                   'id', id, 'status', status, 'tempo_planejado_horas', tempo_planejado_horas,
+                   'link', link, 'descricao', descricao, 'artefato_id', artefato_id,
+                   'responsavel_id', responsavel_id, 'version', version, 'status_desde', status_desde
+               ) ORDER BY created_at, id) AS cards
+        FROM card
+        WHERE ciclo_id = %(ciclo_id)s::uuid
+        GROUP BY fase_id, status
+    ),
+    colunas AS (
+        SELECT f.id, f.nome, f.descritivo, f.ordem,
+               coalesce(sum(ps.total), 0) AS total_cards,
+               coalesce(sum(ps.horas), 0) AS total_horas,
+               json_agg(json_build_object(
+                   'status', s.status,
+                   'total', coalesce(ps.total, 0),
+                   'horas', coalesce(ps.horas, 0),
+                   'cards', coalesce(ps.cards, '[]'::json)
+               ) ORDER BY s.status) AS status
+        FROM fase f
+        CROSS JOIN unnest(enum_range(NULL::cardstatus)) AS s(status)
+        LEFT JOIN por_status ps ON ps.fase_id = f.id AND ps.status = s.status
+        GROUP BY f.id
+    )
+    SELECT json_build_object(
+        'ciclo', (SELECT row_to_json(ci) FROM ci),
+        'total_cards', coalesce(sum(col.total_cards), 0),
+        'total_horas', coalesce(sum(col.total_horas), 0),
+        'fases', coalesce(json_agg(json_build_object(
+            'id', col.id, 'nome', col.nome, 'descritivo', col.descritivo, 'ordem', col.ordem,
+            'total_cards', col.total_cards, 'total_horas', col.total_horas, 'status', col.status,
+            'artefatos', (
+                SELECT coalesce(json_agg(json_build_object('id', a.id, 'nome', a.nome) ORDER BY a.nome), '[]'::json)
+                FROM faseartefato fa
+                JOIN artefato a ON a.id = fa.artefato_id
+                WHERE fa.fase_id = col.id
+            )
+        ) ORDER BY col.ordem, col.id), '[]'::json)
+    ) AS board
+    FROM colunas col
+    HAVING EXISTS (SELECT 1 FROM ci);
+"""
+
+
+async def get_ciclo_board(conn: AsyncConnection, ciclo_id: str) -> Optional[dict]:
+    """Quadro do ciclo em uma única consulta (JSON montado pelo Postgres). None se o ciclo não existe."""
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute(BOARD_SQL, {"ciclo_id": ciclo_id})
+            row = await cursor.fetchone()
+            return row["board"] if row else None
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
 # |=======| BUSCAR CICLO POR NOME |=======|
 async def get_ciclo_by_nome(
-    conn: connection,
+    conn: AsyncConnection,
     nome: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Busca um ciclo pelo nome."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT id, nome, versao, projeto_id, created_at, updated_at 
                 FROM ciclo 
                 WHERE nome = %s;
             """, (nome,))
-            ciclo = cursor.fetchone()
+            ciclo = await cursor.fetchone()
             return ciclo
         except Exception as e:
             print_error_details(e)
             raise e
 
 
-# |=======| VERIFICAR SE NOME JÁ EXISTE |=======|
-async def nome_exists(
-    conn: connection,
-    nome: str,
-    exclude_id: Optional[str] = None
-) -> bool:
-    """Verifica se um nome já existe no banco, opcionalmente excluindo um ID específico."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        try:
-            if exclude_id:
-                cursor.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM ciclo 
-                    WHERE nome = %s AND id != %s;
-                """, (nome, exclude_id))
-            else:
-                cursor.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM ciclo 
-                    WHERE nome = %s;
-                """, (nome,))
-            
-            result = cursor.fetchone()
-            return result['count'] > 0
-        except Exception as e:
-            print_error_details(e)
-            raise e
-
-
 # |=======| CRIAR CICLO |=======|
 async def create_ciclo(
-    conn: connection,
+    conn: AsyncConnection,
     ciclo_data: CicloCreateDTO
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Cria um novo ciclo no banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            ciclo_id = str(uuid.uuid4())
-            now = datetime.utcnow()
+            async with transaction(conn):
+                ciclo_id = str(uuid.uuid4())
+                now = datetime.utcnow()
             
-            cursor.execute("""
-                INSERT INTO ciclo (id, nome, versao, projeto_id, created_at) 
-                VALUES (%s, %s, %s, %s, %s) 
-                RETURNING id, nome, versao, projeto_id, created_at;
-            """, (ciclo_id, ciclo_data.nome, ciclo_data.versao, ciclo_data.projeto_id, now))
+                await cursor.execute("""
+                    INSERT INTO ciclo (id, nome, versao, projeto_id, created_at) 
+                    VALUES (%s, %s, %s, %s, %s) 
+                    RETURNING id, nome, versao, projeto_id, created_at;
+                """, (ciclo_id, ciclo_data.nome, ciclo_data.versao, ciclo_data.projeto_id, now))
             
-            created_ciclo = cursor.fetchone()
-            conn.commit()
-            return created_ciclo
+                created_ciclo = await cursor.fetchone()
+                return created_ciclo
+        except errors.UniqueViolation:
+            # O nome é único no banco (ux_ciclo_nome): o conflito vem do próprio INSERT
+            raise ValueError("Nome do ciclo já existe")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             return None
 
 
 # |=======| ATUALIZAR CICLO |=======|
 async def update_ciclo(
-    conn: connection,
+    conn: AsyncConnection,
     ciclo_id: str,
     ciclo_data: CicloUpdateDTO
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Atualiza um ciclo existente."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            now = datetime.utcnow()
+            async with transaction(conn):
+                now = datetime.utcnow()
             
-            cursor.execute("""
-                UPDATE ciclo 
-                SET nome = %s, versao = %s, projeto_id = %s, updated_at = %s 
-                WHERE id = %s 
-                RETURNING id, nome, versao, projeto_id, updated_at;
-            """, (ciclo_data.nome, ciclo_data.versao, ciclo_data.projeto_id, now, ciclo_id))
+                await cursor.execute("""
+                    UPDATE ciclo 
+                    SET nome = %s, versao = %s, projeto_id = %s, updated_at = %s 
+                    WHERE id = %s 
+                    RETURNING id, nome, versao, projeto_id, updated_at;
+                """, (ciclo_data.nome, ciclo_data.versao, ciclo_data.projeto_id, now, ciclo_id))
             
-            updated_ciclo = cursor.fetchone()
-            conn.commit()
-            return updated_ciclo
+                updated_ciclo = await cursor.fetchone()
+                return updated_ciclo
+        except errors.UniqueViolation:
+            raise ValueError("Nome do ciclo já existe")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
 # |=======| DELETAR CICLO |=======|
 async def delete_ciclo(
-    conn: connection,
+    conn: AsyncConnection,
     ciclo_id: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Deleta um ciclo do banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                DELETE FROM ciclo 
-                WHERE id = %s
-                RETURNING id, nome, versao;
-            """, (ciclo_id,))
+            async with transaction(conn):
+                await cursor.execute("""
+                    DELETE FROM ciclo 
+                    WHERE id = %s
+                    RETURNING id, nome, versao;
+                """, (ciclo_id,))
             
-            deleted_ciclo = cursor.fetchone()
-            conn.commit()
-            return deleted_ciclo
+                deleted_ciclo = await cursor.fetchone()
+                return deleted_ciclo
+        except errors.ForeignKeyViolation:
+            # card.ciclo_id não tem ON DELETE (migração 0012): o ciclo com cards fica
+            raise RegistroEmUsoError("O ciclo possui cards e não pode ser removido.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
 # |=======| BUSCAR CICLOS POR VERSÃO |=======|
 async def get_ciclos_by_versao(
-    conn: connection,
-    versao: str
-) -> List[RealDictRow]:
-    """Busca ciclos por versão."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    conn: AsyncConnection,
+    versao: str,
+    page: Optional[PageParams] = None
+) -> Page:
+    """Busca uma página dos ciclos por versão."""
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
                 SELECT id, nome, versao, projeto_id, created_at, updated_at 
                 FROM ciclo 
-                WHERE versao = %s
-                ORDER BY created_at DESC;
-            """, (versao,))
-            ciclos = cursor.fetchall()
-            return ciclos
+                WHERE versao = %s AND {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, (versao, *params))
+            ciclos = await cursor.fetchall()
+            return build_page(ciclos, page)
         except Exception as e:
             print_error_details(e)
             raise e
@@ -194,20 +259,24 @@ async def get_ciclos_by_versao(
 
 # |=======| BUSCAR CICLOS POR PROJETO |=======|
 async def get_ciclos_by_projeto(
-    conn: connection,
-    projeto_id: str
-) -> List[RealDictRow]:
-    """Busca ciclos por projeto."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    conn: AsyncConnection,
+    projeto_id: str,
+    page: Optional[PageParams] = None
+) -> Page:
+    """Busca uma página dos ciclos por projeto."""
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
                 SELECT id, nome, versao, projeto_id, created_at, updated_at 
                 FROM ciclo 
-                WHERE projeto_id = %s
-                ORDER BY created_at DESC;
-            """, (projeto_id,))
-            ciclos = cursor.fetchall()
-            return ciclos
+                WHERE projeto_id = %s AND {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, (projeto_id, *params))
+            ciclos = await cursor.fetchall()
+            return build_page(ciclos, page)
         except Exception as e:
             print_error_details(e)
             raise e
\ No newline at end of file
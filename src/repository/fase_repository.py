@@ -1,17 +1,31 @@
-from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection, errors
+from psycopg.rows import dict_row, DictRow
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams, build_page, keyset_sql
 from model.fase import FaseBase, FaseUpdate
-from psycopg2.extras import RealDictRow
-from psycopg2.extras import execute_values
+from core.cache import publish_invalidation
 
 # |=======| LISTANDO TODOS AS FASES |=======|
+# As fases seguem paginadas pela ordem do fluxo (ordem, id), e não por created_at
 async def get_all_fases(
-    conn: connection
-) -> list[RealDictRow]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    conn: AsyncConnection,
+    page: PageParams | None = None
+) -> Page:
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page, sort="ordem", sort_type="integer", descending=False)
+    _, outer_order_by, _ = keyset_sql(page, sort="ordem", alias="f", descending=False)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
+                WITH f AS (
+                    SELECT id, nome, descritivo, ordem
+                    FROM fase
+                    WHERE {where}
+                    ORDER BY {order_by}
+                    LIMIT %s
+                )
                 SELECT 
                     f.id, 
                     f.nome, 
@@ -24,18 +38,18 @@ async def get_all_fases(
                         '[]'::json
                     ) AS artefatos
                 FROM 
-                    fase AS f
+                    f
                 LEFT JOIN 
                     faseartefato AS fa ON f.id = fa.fase_id
                 LEFT JOIN 
                     artefato AS a ON fa.artefato_id = a.id
                 GROUP BY 
-                    f.id
+                    f.id, f.nome, f.descritivo, f.ordem
                 ORDER BY
-                    f.ordem;
-            """)
-            fases = cursor.fetchall()
-            return fases
+                    {outer_order_by};
+            """, params)
+            fases = await cursor.fetchall()
+            return build_page(fases, page, sort="ordem")
         except Exception as e:
             print_error_details(e)
             raise e
@@ -43,12 +57,12 @@ async def get_all_fases(
 # FIND BY ID
 
 async def get_fase_by_id(
-        conn: connection, 
+        conn: AsyncConnection, 
         fase_id: str
-) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT 
                     f.id, f.nome, f.descritivo, f.ordem,
                     COALESCE(
@@ -68,87 +82,84 @@ async def get_fase_by_id(
                 GROUP BY 
                     f.id;
             """, (fase_id,))
-            return cursor.fetchone()
+            return await cursor.fetchone()
         except Exception as e:
             print_error_details(e)
             raise e
 
 
 # |=======| POST
-def create_fase(
-    conn: connection, 
+async def create_fase(
+    conn: AsyncConnection, 
     fase: FaseBase
-) -> RealDictRow | None:
+) -> DictRow | None:
     new_fase_id = None
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(
-                """
-                INSERT INTO fase (nome, descritivo, ordem) 
-                VALUES (%s, %s, %s) 
-                RETURNING id;
-                """,
-                (fase.nome, fase.descritivo, fase.ordem)
-            )
-            new_fase_id = cursor.fetchone()['id']
-
-            if fase.artefato_ids and len(fase.artefato_ids) > 0:
-
-                associacoes_para_inserir = [
-                    (new_fase_id, artefato_id) for artefato_id in fase.artefato_ids
-                ]
-                
-                execute_values(
-                    cursor,
-                    "INSERT INTO faseartefato (fase_id, artefato_id) VALUES %s",
-                    associacoes_para_inserir
+            async with transaction(conn):
+                await cursor.execute(
+                    """
+                    INSERT INTO fase (nome, descritivo, ordem) 
+                    VALUES (%s, %s, %s) 
+                    RETURNING id;
+                    """,
+                    (fase.nome, fase.descritivo, fase.ordem)
                 )
+                new_fase_id = (await cursor.fetchone())['id']
+
+                if fase.artefato_ids and len(fase.artefato_ids) > 0:
+
+                    associacoes_para_inserir = [
+                        (new_fase_id, artefato_id) for artefato_id in fase.artefato_ids
+                    ]
+                
+                    await cursor.executemany(
+                        "INSERT INTO faseartefato (fase_id, artefato_id) VALUES (%s, %s)",
+                        associacoes_para_inserir
+                    )
 
-            conn.commit()
+                await publish_invalidation(cursor, "fases")
 
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
     if new_fase_id:
-        return get_fase_by_id(conn, new_fase_id)
+        return await get_fase_by_id(conn, new_fase_id)
     
     return None
 # PUT
 async def update_fase(
-        conn: connection, 
+        conn: AsyncConnection, 
         fase_id: int, fase: FaseUpdate
-) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(
-                """
-                UPDATE fase 
-                SET nome = %s, descritivo = %s, ordem = %s 
-                WHERE id = %s 
-                RETURNING id;
-                """,
-                (fase.nome, fase.descritivo, fase.ordem, fase_id)
-            )
-            if cursor.fetchone() is None:
-                conn.rollback()
-                return None
-
-            cursor.execute("DELETE FROM faseartefato WHERE fase_id = %s", (fase_id,))
-
-            if fase.artefato_ids:
-                new_associations = [(fase_id, artefato_id) for artefato_id in fase.artefato_ids]
-                execute_values(
-                    cursor,
-                    "INSERT INTO faseartefato (fase_id, artefato_id) VALUES %s",
-                    new_associations
+            async with transaction(conn):
+                await cursor.execute(
+                    """
+                    UPDATE fase 
+                    SET nome = %s, descritivo = %s, ordem = %s, updated_at = now() 
+                    WHERE id = %s 
+                    RETURNING id;
+                    """,
+                    (fase.nome, fase.descritivo, fase.ordem, fase_id)
                 )
+                if await cursor.fetchone() is None:
+                    return None
+
+                await cursor.execute("DELETE FROM faseartefato WHERE fase_id = %s", (fase_id,))
+
+                if fase.artefato_ids:
+                    new_associations = [(fase_id, artefato_id) for artefato_id in fase.artefato_ids]
+                    await cursor.executemany(
+                        "INSERT INTO faseartefato (fase_id, artefato_id) VALUES (%s, %s)",
+                        new_associations
+                    )
 
-            conn.commit()
+                await publish_invalidation(cursor, "fases")
 
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
@@ -156,31 +167,33 @@ async def update_fase(
 
 
 # DELETE
-async def delete_fase(conn: connection, fase_id: str) -> RealDictRow | None:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+async def delete_fase(conn: AsyncConnection, fase_id: str) -> DictRow | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute(
-                "DELETE FROM faseartefato WHERE fase_id = %s",
-                (fase_id,)
-            )
-            cursor.execute(
-                "DELETE FROM fase WHERE id = %s RETURNING id, nome",
-                (fase_id,)
-            )
+            async with transaction(conn):
+                await cursor.execute(
+                    "DELETE FROM faseartefato WHERE fase_id = %s",
+                    (fase_id,)
+                )
+                await cursor.execute(
+                    "DELETE FROM fase WHERE id = %s RETURNING id, nome",
+                    (fase_id,)
+                )
             
-            deleted_fase = cursor.fetchone()
+                deleted_fase = await cursor.fetchone()
 
-            if deleted_fase is None:
-                conn.rollback()
-                return None
+                if deleted_fase is None:
+                    return None
 
-            conn.commit()
+                await publish_invalidation(cursor, "fases")
 
-            # print(f'retorno da query -> {deleted_fase}')
+                # print(f'retorno da query -> {deleted_fase}')
             
-            return deleted_fase
+                return deleted_fase
 
+        except errors.ForeignKeyViolation:
+            # card.fase_id não tem ON DELETE (migração 0004): a fase com cards fica
+            raise RegistroEmUsoError("A fase possui cards e não pode ser removida.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
\ No newline at end of file
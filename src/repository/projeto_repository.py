@@ -1,17 +1,30 @@
-from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection, AsyncCursor, errors
+from psycopg.rows import dict_row, DictRow
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from typing import Optional, List, Dict, Any
-from psycopg2.extras import RealDictRow
 from datetime import datetime
 
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams, build_page, keyset_sql
 
 
 # 🔹 Buscar todos os projetos com responsáveis e ciclos resumidos
-async def get_all_projetos(conn: connection) -> List[Dict[str, Any]]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+# A página é recortada em `projeto` antes dos JOINs, para agregar só os projetos da página
+async def get_all_projetos(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    _, outer_order_by, _ = keyset_sql(page, alias="p")
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
+                WITH p AS (
+                    SELECT id, nome, descritivo, created_at, updated_at
+                    FROM projeto
+                    WHERE {where}
+                    ORDER BY {order_by}
+                    LIMIT %s
+                )
                 SELECT 
                     p.id,
                     p.nome,
@@ -27,23 +40,82 @@ async def get_all_projetos(conn: connection) -> List[Dict[str, Any]]:
                             )
                         ) FILTER (WHERE u.id IS NOT NULL), '[]'
                     ) AS responsaveis
+                FROM p
+                LEFT JOIN projetousuario pu ON p.id = pu.projeto_id
+                LEFT JOIN usuario u ON pu.usuario_id = u.id
+                GROUP BY p.id, p.nome, p.descritivo, p.created_at, p.updated_at
+                ORDER BY {outer_order_by};
+            """, params)
+            return build_page(await cursor.fetchall(), page)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
+# 🔹 Resumo dos projetos (view materializada `projeto_resumo`), paginado por cursor
+async def get_projetos_summary(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute(f"""
+                SELECT id, nome, created_at, ciclos, cards, cards_a_fazer, cards_em_andamento,
+                       cards_testes_validacao, cards_concluidos, horas_planejadas, horas_concluidas,
+                       atualizado_em
+                FROM projeto_resumo
+                WHERE {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, params)
+            return build_page(await cursor.fetchall(), page)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
+# 🔹 Recalcular o resumo dos projetos sem bloquear as leituras
+# Retorna False se outra instância já está atualizando (advisory lock da transação)
+async def refresh_projetos_summary(conn: AsyncConnection) -> bool:
+    async with conn.cursor() as cursor:
+        try:
+            async with transaction(conn):
+                await cursor.execute("SELECT pg_try_advisory_xact_lock(hashtext('projeto_resumo'))")
+                if not (await cursor.fetchone())[0]:
+                    return False
+                await cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY projeto_resumo")
+                return True
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+
+# 🔹 Última alteração do projeto ou dos seus responsáveis (base do ETag/Last-Modified)
+# Com a contagem de responsáveis, detecta também a remoção de um vínculo.
+PROJETO_LAST_MODIFIED = "GREATEST(p.updated_at, MAX(pu.created_at), MAX(u.updated_at))"
+
+
+async def get_projeto_validator(conn: AsyncConnection, projeto_id: str) -> Optional[Dict[str, Any]]:
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        try:
+            await cursor.execute(f"""
+                SELECT {PROJETO_LAST_MODIFIED} AS last_modified, COUNT(DISTINCT u.id) AS responsaveis
                 FROM projeto p
                 LEFT JOIN projetousuario pu ON p.id = pu.projeto_id
                 LEFT JOIN usuario u ON pu.usuario_id = u.id
-                GROUP BY p.id
-                ORDER BY p.created_at DESC;
-            """)
-            return cursor.fetchall()
+                WHERE p.id = %s
+                GROUP BY p.id;
+            """, (projeto_id,))
+            return await cursor.fetchone()
         except Exception as e:
             print_error_details(e)
             raise e
 
 
 # 🔹 Buscar um projeto por ID com responsáveis e ciclos
-async def get_projeto_by_id(conn: connection, projeto_id: str) -> Optional[Dict[str, Any]]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+async def get_projeto_by_id(conn: AsyncConnection, projeto_id: str) -> Optional[Dict[str, Any]]:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
                 SELECT 
                     p.id,
                     p.nome,
@@ -58,129 +130,105 @@ async def get_projeto_by_id(conn: connection, projeto_id: str) -> Optional[Dict[
                                 'email', u.email
                             )
                         ) FILTER (WHERE u.id IS NOT NULL), '[]'
-                    ) AS responsaveis
+                    ) AS responsaveis,
+                    {PROJETO_LAST_MODIFIED} AS last_modified
                 FROM projeto p
                 LEFT JOIN projetousuario pu ON p.id = pu.projeto_id
                 LEFT JOIN usuario u ON pu.usuario_id = u.id
                 WHERE p.id = %s
                 GROUP BY p.id;
             """, (projeto_id,))
-            return cursor.fetchone()
+            return await cursor.fetchone()
         except Exception as e:
             print_error_details(e)
             raise e
 
 
-# 🔹 Verificar se nome de projeto já existe (excluindo um ID opcional)
-async def projeto_name_exists(conn: connection, nome: str, exclude_id: Optional[str] = None) -> bool:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        try:
-            if exclude_id:
-                cursor.execute("""
-                    SELECT COUNT(*) AS count
-                    FROM projeto
-                    WHERE nome = %s AND id != %s;
-                """, (nome, exclude_id))
-            else:
-                cursor.execute("""
-                    SELECT COUNT(*) AS count
-                    FROM projeto
-                    WHERE nome = %s;
-                """, (nome,))
-            return cursor.fetchone()['count'] > 0
-        except Exception as e:
-            print_error_details(e)
-            raise e
+# 🔹 Sincronizar responsáveis do projeto (diff em lote, dentro da transação de quem chama)
+# Insere os que faltam e remove os que saíram em dois comandos, qualquer que seja o
+# tamanho da equipe. Vínculos mantidos não são tocados (preservam o created_at).
+async def sync_responsaveis(cursor: AsyncCursor, projeto_id: str, usuario_ids: List[str], remover_ausentes: bool = True) -> None:
+    usuario_ids = list(dict.fromkeys(usuario_ids))
+    try:
+        if usuario_ids:
+            await cursor.execute("""
+                INSERT INTO projetousuario (projeto_id, usuario_id)
+                SELECT %s, u.id FROM unnest(%s::uuid[]) AS u(id)
+                ON CONFLICT (projeto_id, usuario_id) DO NOTHING;
+            """, (projeto_id, usuario_ids))
+        if remover_ausentes:
+            await cursor.execute("""
+                DELETE FROM projetousuario
+                WHERE projeto_id = %s AND usuario_id <> ALL(%s::uuid[]);
+            """, (projeto_id, usuario_ids))
+    except errors.ForeignKeyViolation:
+        raise ValueError("Responsável não encontrado.")
+    except errors.InvalidTextRepresentation:
+        raise ValueError("Identificador de responsável inválido.")
 
 
-# 🔹 Criar novo projeto
-async def create_projeto(conn: connection, projeto_data: dict) -> Optional[Dict[str, Any]]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+# 🔹 Criar novo projeto (com os responsáveis, na mesma transação)
+async def create_projeto(conn: AsyncConnection, projeto_data: dict) -> Optional[Dict[str, Any]]:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            now = datetime.utcnow()
-            cursor.execute("""
-                INSERT INTO projeto (nome, descritivo, created_at)
-                VALUES (%s, %s, %s)
-                RETURNING id, nome, descritivo, created_at;
-            """, (projeto_data.get('nome'), projeto_data.get('descritivo'), now))
-            created = cursor.fetchone()
-            conn.commit()
-            return created
+            async with transaction(conn):
+                now = datetime.utcnow()
+                await cursor.execute("""
+                    INSERT INTO projeto (nome, descritivo, created_at)
+                    VALUES (%s, %s, %s)
+                    RETURNING id, nome, descritivo, created_at;
+                """, (projeto_data.get('nome'), projeto_data.get('descritivo'), now))
+                created = await cursor.fetchone()
+                await sync_responsaveis(cursor, created['id'], projeto_data.get('responsaveis_id') or [], remover_ausentes=False)
+                return created
+        except errors.UniqueViolation:
+            # O nome é único no banco (ux_projeto_nome): o conflito vem do próprio INSERT
+            raise ValueError("Já existe um projeto com esse nome.")
+        except ValueError:
+            raise
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             return None
 
 
-# 🔹 Atualizar projeto
-async def update_projeto(conn: connection, projeto_id: str, projeto_data: dict) -> Optional[Dict[str, Any]]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+# 🔹 Atualizar projeto (e, se `responsaveis_id` vier, a equipe inteira, na mesma transação)
+async def update_projeto(conn: AsyncConnection, projeto_id: str, projeto_data: dict) -> Optional[Dict[str, Any]]:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            now = datetime.utcnow()
-            cursor.execute("""
-                UPDATE projeto
-                SET nome = %s, descritivo = %s, updated_at = %s
-                WHERE id = %s
-                RETURNING id, nome, descritivo, updated_at;
-            """, (projeto_data.get('nome'), projeto_data.get('descritivo'), now, projeto_id))
-            updated = cursor.fetchone()
-            conn.commit()
-            return updated
+            async with transaction(conn):
+                now = datetime.utcnow()
+                await cursor.execute("""
+                    UPDATE projeto
+                    SET nome = %s, descritivo = %s, updated_at = %s
+                    WHERE id = %s
+                    RETURNING id, nome, descritivo, updated_at;
+                """, (projeto_data.get('nome'), projeto_data.get('descritivo'), now, projeto_id))
+                updated = await cursor.fetchone()
+                if updated and projeto_data.get('responsaveis_id') is not None:
+                    await sync_responsaveis(cursor, projeto_id, projeto_data['responsaveis_id'])
+                return updated
+        except errors.UniqueViolation:
+            raise ValueError("Já existe um projeto com esse nome.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
-# 🔹 Deletar projeto
-async def delete_projeto(conn: connection, projeto_id: str) -> Optional[Dict[str, Any]]:
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+# 🔹 Deletar projeto (os vínculos em projetousuario saem pelo ON DELETE CASCADE)
+async def delete_projeto(conn: AsyncConnection, projeto_id: str) -> Optional[Dict[str, Any]]:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                DELETE FROM projeto
-                WHERE id = %s
-                RETURNING id, nome;
-            """, (projeto_id,))
-            deleted = cursor.fetchone()
-            conn.commit()
-            return deleted
-        except Exception as e:
-            conn.rollback()
-            print_error_details(e)
-            raise e
-
-
-# 🔹 Associar usuário a projeto
-async def add_usuario_projeto(conn: connection, projeto_id: str, usuario_id: str):
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        try:
-            cursor.execute("""
-                INSERT INTO projetousuario (projeto_id, usuario_id)
-                VALUES (%s, %s)
-                RETURNING projeto_id, usuario_id;
-            """, (projeto_id, usuario_id))
-            added = cursor.fetchone()
-            conn.commit()
-            return added
-        except Exception as e:
-            conn.rollback()
-            print_error_details(e)
-            raise e
-
-
-# 🔹 Remover usuário de projeto
-async def remove_usuario_projeto(conn: connection, projeto_id: str, usuario_id: str):
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        try:
-            cursor.execute("""
-                DELETE FROM projetousuario
-                WHERE projeto_id = %s AND usuario_id = %s
-                RETURNING projeto_id, usuario_id;
-            """, (projeto_id, usuario_id))
-            removed = cursor.fetchone()
-            conn.commit()
-            return removed
+            async with transaction(conn):
+                await cursor.execute("""
+                    DELETE FROM projeto
+                    WHERE id = %s
+                    RETURNING id, nome;
+                """, (projeto_id,))
+                deleted = await cursor.fetchone()
+                return deleted
+        except errors.ForeignKeyViolation:
+            # ciclo.projeto_id não tem ON DELETE (migração 0012): o projeto com ciclos fica
+            raise RegistroEmUsoError("O projeto possui ciclos e não pode ser removido.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
@@ -1,26 +1,32 @@
-from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection, errors
+from psycopg.rows import dict_row, DictRow
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from model.usuario import Usuario
 from model.dto.usuario_dto import UsuarioCreateDTO
 from utils.functions import print_error_details
-from psycopg2.extras import RealDictRow
+from utils.pagination import Page, PageParams, build_page, keyset_sql
 from typing import Optional, List
 from datetime import datetime
 import uuid
 
 
 # |=======| LISTANDO TODOS OS USUÁRIOS |=======|
-async def get_all_usuarios(conn: connection) -> List[RealDictRow]:
-    """Retorna todos os usuários do banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+async def get_all_usuarios(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+    """Retorna uma página dos usuários do banco de dados, do mais recente para o mais antigo."""
+    page = page or PageParams.first()
+    where, order_by, params = keyset_sql(page)
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute(f"""
                 SELECT id, nome, email, created_at, updated_at 
                 FROM usuario 
-                ORDER BY created_at DESC;
-            """)
-            usuarios = cursor.fetchall()
-            return usuarios
+                WHERE {where}
+                ORDER BY {order_by}
+                LIMIT %s;
+            """, params)
+            usuarios = await cursor.fetchall()
+            return build_page(usuarios, page)
         except Exception as e:
             print_error_details(e)
             raise e
@@ -28,18 +34,18 @@ async def get_all_usuarios(conn: connection) -> List[RealDictRow]:
 
 # |=======| BUSCAR USUÁRIO POR ID |=======|
 async def get_usuario_by_id(
-    conn: connection,
+    conn: AsyncConnection,
     usuario_id: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Busca um usuário pelo ID."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT id, nome, email, senha, created_at, updated_at 
                 FROM usuario 
                 WHERE id = %s;
             """, (usuario_id,))
-            usuario = cursor.fetchone()
+            usuario = await cursor.fetchone()
             return usuario
         except Exception as e:
             print_error_details(e)
@@ -48,153 +54,129 @@ async def get_usuario_by_id(
 
 # |=======| BUSCAR USUÁRIO POR EMAIL |=======|
 async def get_usuario_by_email(
-    conn: connection,
+    conn: AsyncConnection,
     email: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Busca um usuário pelo email."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT id, nome, email, senha, created_at, updated_at 
                 FROM usuario 
                 WHERE email = %s;
             """, (email,))
-            usuario = cursor.fetchone()
+            usuario = await cursor.fetchone()
             return usuario
         except Exception as e:
             print_error_details(e)
             raise e
 
 
-# |=======| VERIFICAR SE EMAIL JÁ EXISTE |=======|
-async def email_exists(
-    conn: connection,
-    email: str,
-    exclude_id: Optional[str] = None
-) -> bool:
-    """Verifica se um email já existe no banco, opcionalmente excluindo um ID específico."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        try:
-            if exclude_id:
-                cursor.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM usuario 
-                    WHERE email = %s AND id != %s;
-                """, (email, exclude_id))
-            else:
-                cursor.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM usuario 
-                    WHERE email = %s;
-                """, (email,))
-            
-            result = cursor.fetchone()
-            return result['count'] > 0
-        except Exception as e:
-            print_error_details(e)
-            raise e
-
-
 # |=======| CRIAR USUÁRIO |=======|
 async def create_usuario(
-    conn: connection,
+    conn: AsyncConnection,
     usuario_data: UsuarioCreateDTO,
     senha: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Cria um novo usuário no banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            user_id = str(uuid.uuid4())
-            now = datetime.utcnow()
+            async with transaction(conn):
+                user_id = str(uuid.uuid4())
+                now = datetime.utcnow()
             
-            cursor.execute("""
-                INSERT INTO usuario (id, nome, email, senha, created_at) 
-                VALUES (%s, %s, %s, %s, %s) 
-                RETURNING id, nome, email, created_at;
-            """, (user_id, usuario_data.nome, usuario_data.email, senha, now))
+                await cursor.execute("""
+                    INSERT INTO usuario (id, nome, email, senha, created_at) 
+                    VALUES (%s, %s, %s, %s, %s) 
+                    RETURNING id, nome, email, created_at;
+                """, (user_id, usuario_data.nome, usuario_data.email, senha, now))
             
-            created_user = cursor.fetchone()
-            conn.commit()
-            return created_user
+                created_user = await cursor.fetchone()
+                return created_user
+        except errors.UniqueViolation:
+            # O e-mail é único no banco (ix_usuario_email): o conflito vem do próprio INSERT
+            raise ValueError("Email já cadastrado")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             return None
 
 
 # |=======| ATUALIZAR USUÁRIO |=======|
 async def update_usuario(
-    conn: connection,
+    conn: AsyncConnection,
     usuario_id: str,
     usuario_data: UsuarioCreateDTO,
     senha: Optional[str] = None
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Atualiza um usuário existente."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            now = datetime.utcnow()
+            async with transaction(conn):
+                now = datetime.utcnow()
             
-            if senha:
-                cursor.execute("""
-                    UPDATE usuario 
-                    SET nome = %s, email = %s, senha = %s, updated_at = %s 
-                    WHERE id = %s 
-                    RETURNING id, nome, email, updated_at;
-                """, (usuario_data.nome, usuario_data.email, senha, now, usuario_id))
-            else:
-                cursor.execute("""
-                    UPDATE usuario 
-                    SET nome = %s, email = %s, updated_at = %s 
-                    WHERE id = %s 
-                    RETURNING id, nome, email, updated_at;
-                """, (usuario_data.nome, usuario_data.email, now, usuario_id))
+                if senha:
+                    await cursor.execute("""
+                        UPDATE usuario 
+                        SET nome = %s, email = %s, senha = %s, updated_at = %s 
+                        WHERE id = %s 
+                        RETURNING id, nome, email, updated_at;
+                    """, (usuario_data.nome, usuario_data.email, senha, now, usuario_id))
+                else:
+                    await cursor.execute("""
+                        UPDATE usuario 
+                        SET nome = %s, email = %s, updated_at = %s 
+                        WHERE id = %s 
+                        RETURNING id, nome, email, updated_at;
+                    """, (usuario_data.nome, usuario_data.email, now, usuario_id))
             
-            updated_user = cursor.fetchone()
-            conn.commit()
-            return updated_user
+                updated_user = await cursor.fetchone()
+                return updated_user
+        except errors.UniqueViolation:
+            raise ValueError("Email já cadastrado")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
 # |=======| DELETAR USUÁRIO |=======|
 async def delete_usuario(
-    conn: connection,
+    conn: AsyncConnection,
     usuario_id: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Deleta um usuário do banco de dados."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
-                DELETE FROM usuario 
-                WHERE id = %s
-                RETURNING id, nome, email;
-            """, (usuario_id,))
+            async with transaction(conn):
+                await cursor.execute("""
+                    DELETE FROM usuario 
+                    WHERE id = %s
+                    RETURNING id, nome, email;
+                """, (usuario_id,))
             
-            deleted_user = cursor.fetchone()
-            conn.commit()
-            return deleted_user
+                deleted_user = await cursor.fetchone()
+                return deleted_user
+        except errors.ForeignKeyViolation:
+            # card.responsavel_id não tem ON DELETE (migração 0004)
+            raise RegistroEmUsoError("O usuário é responsável por cards e não pode ser removido.")
         except Exception as e:
-            conn.rollback()
             print_error_details(e)
             raise e
 
 
 # |=======| AUTENTICAR USUÁRIO |=======|
 async def get_usuario_for_authentication(
-    conn: connection,
+    conn: AsyncConnection,
     email: str
-) -> Optional[RealDictRow]:
+) -> Optional[DictRow]:
     """Busca um usuário para autenticação (inclui senha)."""
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+    async with conn.cursor(row_factory=dict_row) as cursor:
         try:
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT id, nome, email, senha, created_at, updated_at 
                 FROM usuario 
                 WHERE email = %s;
             """, (email,))
-            usuario = cursor.fetchone()
+            usuario = await cursor.fetchone()
             return usuario
         except Exception as e:
             print_error_details(e)
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from model.artefato import Artefato, ArtefatoBase, ArtefatoResponse
 from service import artefato_service
-from psycopg2.extensions import connection
-from db.database import get_db
+from db.database import DatabaseRoute, DatabaseSession, get_db
+from db.errors import RegistroEmUsoError
+from utils.pagination import PageParams, set_page_headers
 
-router = APIRouter(prefix="/artefatos", tags=['artefatos'])
+router = APIRouter(prefix="/artefatos", tags=['artefatos'], route_class=DatabaseRoute)
 
 @router.post(
     "/",
@@ -14,14 +15,17 @@ router = APIRouter(prefix="/artefatos", tags=['artefatos'])
 )
 async def create_artefato(
     artefato: ArtefatoBase,
-    db: connection = Depends(get_db),
+    db: DatabaseSession = Depends(get_db),
 ):
-    created_artefato = await artefato_service.create_artefato(db, artefato)
+    try:
+        created_artefato = await artefato_service.create_artefato(db, artefato)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     if not created_artefato:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Já existe um artefato com o nome {artefato.nome}."
+            detail="Erro ao criar artefato."
         )
     
     return created_artefato
@@ -33,16 +37,14 @@ async def create_artefato(
     summary="Lista todos os artefatos",
 )
 async def get_all_artefatos(
-    db: connection = Depends(get_db),
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
 ):
-    artefatos = await artefato_service.get_all_artefatos(db)
-
-    if not artefatos:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Nenhum artefato encontrado."
-        )
-    
+    # Página vazia (inclusive depois da última) é uma lista vazia, não 404
+    artefatos = await artefato_service.get_all_artefatos(db, page)
+    set_page_headers(request, response, artefatos)
     return artefatos
 
 @router.get(
@@ -52,7 +54,7 @@ async def get_all_artefatos(
 )
 async def get_artefato_by_id(
     artefato_id: str,
-    db: connection = Depends(get_db),
+    db: DatabaseSession = Depends(get_db),
 ):
     artefato = await artefato_service.get_artefato_by_id(db, artefato_id)
     if artefato is None:
@@ -70,9 +72,12 @@ async def get_artefato_by_id(
 )
 async def delete_artefato(
     artefato_id: str,
-    db: connection = Depends(get_db),
+    db: DatabaseSession = Depends(get_db),
 ):
-    deleted_artefato = await artefato_service.delete_artefato(db, artefato_id)
+    try:
+        deleted_artefato = await artefato_service.delete_artefato(db, artefato_id)
+    except RegistroEmUsoError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     if deleted_artefato is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,14 +95,17 @@ async def delete_artefato(
 async def update_artefato(
     artefato_id: str,
     artefato: ArtefatoBase,
-    db: connection = Depends(get_db),
+    db: DatabaseSession = Depends(get_db),
 ):
-    updated_artefato = await artefato_service.update_artefato(db, artefato_id, artefato)
+    try:
+        updated_artefato = await artefato_service.update_artefato(db, artefato_id, artefato)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     if not updated_artefato:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Já existe um artefato com o nome {artefato.nome}."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Artefato com ID {artefato_id} não encontrado."
         )
     
     return updated_artefato
@@ -1,19 +1,57 @@
+import json
 import random
 import traceback
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 
-from model.dto.card_dto import CardCreateDTO, CardResponseDTO, CardStatus, CardUpdateDTO
-from service.card_service import CardService
-from db.connection import Connection
+from datetime import datetime
+from model.dto.card_dto import (
+    CardBulkResponseDTO, CardCreateDTO, CardFiltroDTO, CardFluxoRelatorioDTO, CardResponseDTO, CardStatsDTO,
+    CardStatus, CardTemposDTO, CardUpdateDTO,
+)
+from core.config import settings
+from service.card_service import CardService, CardVersionConflictError
+from core.http_cache import (
+    has_conditional_headers, if_match_version, is_not_modified, make_version_etag, not_modified_response, set_validators,
+)
+from db.database import DatabaseRoute, DatabaseSession, get_db, stream_with_db
 from model.card import StatusModel
+from utils.pagination import PageParams, set_page_headers
+from utils.serialization import fast_page_response
 
 
-router = APIRouter(prefix="/card", tags=["card"])
+router = APIRouter(prefix="/card", tags=["card"], route_class=DatabaseRoute)
 
 # TODO: colocar a autenticação
 
+# FILTROS DA LISTAGEM/EXPORTAÇÃO DE CARDS
+def get_card_filtro(
+    status_filtro: Optional[CardStatus] = Query(None, description="Filtra cards por Status"),
+    ciclo_id: Optional[UUID] = Query(None, description="Filtra cards por ID do Ciclo associado"),
+    fase_id: Optional[UUID] = Query(None, description="Filtra cards por ID da Fase"),
+    artefato_id: Optional[UUID] = Query(None, description="Filtra cards por ID do Artefato"),
+    responsavel_id: Optional[UUID] = Query(None, description="Filtra cards por ID do Responsável"),
+    projeto_id: Optional[UUID] = Query(None, description="Filtra cards pelo Projeto do Ciclo"),
+    criado_de: Optional[datetime] = Query(None, description="Criados a partir desta data"),
+    criado_ate: Optional[datetime] = Query(None, description="Criados antes desta data"),
+    atualizado_de: Optional[datetime] = Query(None, description="Atualizados a partir desta data"),
+    atualizado_ate: Optional[datetime] = Query(None, description="Atualizados antes desta data"),
+) -> CardFiltroDTO:
+    return CardFiltroDTO(
+        status=status_filtro,
+        ciclo_id=ciclo_id,
+        fase_id=fase_id,
+        artefato_id=artefato_id,
+        responsavel_id=responsavel_id,
+        projeto_id=projeto_id,
+        criado_de=criado_de,
+        criado_ate=criado_ate,
+        atualizado_de=atualizado_de,
+        atualizado_ate=atualizado_ate,
+    )
+
 # CRIAR NOVO CARD
 @router.post(
     "/",
@@ -23,15 +61,13 @@ router = APIRouter(prefix="/card", tags=["card"])
 )
 async def create_card(
     card_data: CardCreateDTO,
+    db: DatabaseSession = Depends(get_db),
 ):
     """
     Cria um novo Card no sistema com todos os dados obrigatórios associados (ciclo, fase, artefato e responsável).
     """
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        result = await CardService.create_card(conn, card_data)
+        result = await CardService.create_card(db, card_data)
         return result
     except ValueError as e:
         raise HTTPException(
@@ -43,8 +79,64 @@ async def create_card(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
+
+# CRIAR CARDS EM LOTE
+@router.post(
+    "/bulk",
+    response_model=CardBulkResponseDTO,
+    status_code=status.HTTP_201_CREATED,
+    summary="Cria vários Cards de uma vez (array JSON ou NDJSON)",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": CardCreateDTO.model_json_schema()}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def bulk_create_cards(
+    request: Request,
+    response: Response,
+    db: DatabaseSession = Depends(get_db),
+):
+    """
+    Cria vários Cards em uma única transação. Aceita um array JSON ou NDJSON (um card por linha).
+    Retorna o resultado de cada item na ordem enviada; se algum item for rejeitado a resposta é 207.
+    """
+    corpo = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/jsonl")):
+            itens = [json.loads(linha) for linha in corpo.splitlines() if linha.strip()]
+        else:
+            itens = json.loads(corpo)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Corpo inválido: envie um array JSON ou NDJSON"
+        )
+    if not isinstance(itens, list) or not itens:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Envie ao menos um card"
+        )
+    if len(itens) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {settings.BULK_MAX_ITEMS} cards por requisição"
+        )
+
+    try:
+        result = await CardService.bulk_create_cards(db, itens)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+    if result.rejeitados:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return result
 
 # LISTAR TODOS OS CARDS (ou filtrar)
 # TODO: verificar os filtros do get card
@@ -54,30 +146,122 @@ async def create_card(
     summary="Lista todos os Cards"
 )
 async def list_cards(
-    status_filtro: Optional[CardStatus] = Query(None, description="Filtra cards por Status"),
-    ciclo_id: Optional[str] = Query(None, description="Filtra cards por ID do Ciclo associado")
+    request: Request,
+    response: Response,
+    filtro: CardFiltroDTO = Depends(get_card_filtro),
+    page: PageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
 ):
     """
-    Retorna uma lista de todos os Cards, com opções de filtragem por status ou ID do Ciclo.
+    Retorna uma página de Cards (do mais recente para o mais antigo). Os filtros podem ser combinados
+    (status, ciclo, fase, artefato, responsável, projeto e intervalos de criação/atualização).
+    Os itens têm sempre o mesmo formato (`CardResponseFiltroCicloDTO`, com o `projeto_id` do ciclo).
+    Os cursores da página seguinte/anterior vêm nos headers `X-Next-Cursor`/`X-Prev-Cursor` e `Link`.
     """
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        if status_filtro:
-            cards = await CardService.get_cards_by_status(conn, status_filtro)
-        elif ciclo_id:
-            cards = await CardService.get_cards_by_ciclo(conn, ciclo_id)
+        # JSON_FAST_PATH: linhas recortadas direto para JSON (orjson), sem DTO nem jsonable_encoder
+        raw = settings.JSON_FAST_PATH
+        ativos = filtro.ativos()
+        if ativos == {"status"}:
+            cards = await CardService.get_cards_by_status(db, filtro.status, page, raw=raw)
+        elif ativos == {"ciclo_id"}:
+            cards = await CardService.get_cards_by_ciclo(db, filtro.ciclo_id, page, raw=raw)
+        elif ativos:
+            cards = await CardService.get_cards_filtered(db, filtro, page, raw=raw)
         else:
-            cards = await CardService.get_all_cards(conn)
+            cards = await CardService.get_all_cards(db, page, raw=raw)
+        if raw:
+            return fast_page_response(request, cards)
+        set_page_headers(request, response, cards)
         return cards
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
+
+
+# EXPORTAR CARDS (STREAMING)
+@router.get(
+    "/export",
+    summary="Exporta os Cards em NDJSON ou JSON (streaming)"
+)
+async def export_cards(
+    formato: Literal["ndjson", "json"] = Query("ndjson", alias="format", description="Formato da exportação"),
+    filtro: CardFiltroDTO = Depends(get_card_filtro),
+):
+    """
+    Exporta todos os Cards (ou os filtrados) em streaming, lendo do banco em lotes.
+    O uso de memória não cresce com o tamanho da tabela.
+    """
+    media_type = "application/x-ndjson" if formato == "ndjson" else "application/json"
+    return StreamingResponse(
+        stream_with_db(CardService.export_cards, formato, filtro),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="cards.{formato}"'},
+    )
+
+
+# ESTATÍSTICAS DOS CARDS
+@router.get(
+    "/stats",
+    response_model=CardStatsDTO,
+    summary="Totais de cards e horas planejadas por status, responsável e fase"
+)
+async def get_card_stats(
+    filtro: CardFiltroDTO = Depends(get_card_filtro),
+    db: DatabaseSession = Depends(get_db),
+):
+    """
+    Agrega no banco (GROUPING SETS) a contagem e a soma de `tempo_planejado_horas` dos
+    cards filtrados. Aceita os mesmos filtros da listagem (ex.: `ciclo_id`, `projeto_id`).
+    Erros inesperados seguem para os handlers globais (503 sem conexão livre, 500 nos demais).
+    """
+    return await CardService.get_card_stats(db, filtro)
+
+@router.get(
+    "/stats/ciclo/{ciclo_id}",
+    response_model=CardStatsDTO,
+    summary="Estatísticas dos cards de um Ciclo"
+)
+async def get_card_stats_by_ciclo(ciclo_id: UUID, db: DatabaseSession = Depends(get_db)):
+    """Atalho para `/card/stats?ciclo_id=...`."""
+    return await CardService.get_card_stats(db, CardFiltroDTO(ciclo_id=ciclo_id))
+
+@router.get(
+    "/stats/projeto/{projeto_id}",
+    response_model=CardStatsDTO,
+    summary="Estatísticas dos cards de um Projeto"
+)
+async def get_card_stats_by_projeto(projeto_id: UUID, db: DatabaseSession = Depends(get_db)):
+    """Atalho para `/card/stats?projeto_id=...`."""
+    return await CardService.get_card_stats(db, CardFiltroDTO(projeto_id=projeto_id))
+
+
+# RELATÓRIO DE CYCLE/LEAD TIME
+@router.get(
+    "/relatorio/fluxo",
+    response_model=CardFluxoRelatorioDTO,
+    summary="Cycle time e lead time dos Cards concluídos"
+)
+async def get_fluxo_report(
+    ciclo_id: Optional[str] = Query(None, description="Somente cards deste Ciclo"),
+    projeto_id: Optional[str] = Query(None, description="Somente cards do Projeto do Ciclo"),
+    concluido_de: Optional[datetime] = Query(None, description="Concluídos a partir desta data"),
+    concluido_ate: Optional[datetime] = Query(None, description="Concluídos antes desta data"),
+    db: DatabaseSession = Depends(get_db),
+):
+    """
+    Média e percentis 50/85 (em horas) do cycle time (andamento → concluído) e do
+    lead time (criação → concluído), lidos dos marcos mantidos a cada transição de status.
+    """
+    try:
+        return await CardService.get_fluxo_report(db, ciclo_id, projeto_id, concluido_de, concluido_ate)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
 
 
 # GET CARD ESPECÍFICO
@@ -88,21 +272,36 @@ async def list_cards(
 )
 async def get_card(
     card_id: str,
+    request: Request,
+    response: Response,
+    db: DatabaseSession = Depends(get_db),
 ):
     """
-    Retorna os detalhes de um Card específico por id.
+    Retorna os detalhes de um Card específico por id. O header ETag traz a versão do card,
+    para ser reenviada no If-Match do PATCH. Com If-None-Match/If-Modified-Since, responde
+    304 consultando só a versão do card.
     """
 
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        card = await CardService.get_card_by_id(conn, card_id)
+        if has_conditional_headers(request):
+            validator = await CardService.get_card_validator(db, card_id)
+            if not validator:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Card não encontrado"
+                )
+            etag = make_version_etag(validator["version"])
+            if is_not_modified(request.headers, etag, validator["updated_at"]):
+                return not_modified_response(etag, validator["updated_at"])
+
+        card = await CardService.get_card_by_id(db, card_id)
         if not card:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Card não encontrado"
             )
+        if card.version is not None:
+            set_validators(response, make_version_etag(card.version), card.updated_at)
         return card
     except HTTPException:
         raise
@@ -111,8 +310,37 @@ async def get_card(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
+
+# TEMPO POR STATUS DE UM CARD
+@router.get(
+    "/{card_id}/tempos",
+    response_model=CardTemposDTO,
+    summary="Tempo acumulado por status e histórico de transições de um Card"
+)
+async def get_card_tempos(
+    card_id: str,
+    db: DatabaseSession = Depends(get_db),
+):
+    """
+    Retorna as horas acumuladas em cada status (incluindo o atual), o cycle/lead time
+    quando o card está concluído e a lista de transições de status.
+    """
+    try:
+        tempos = await CardService.get_card_tempos(db, card_id)
+        if not tempos:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Card não encontrado"
+            )
+        return tempos
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
 
 # ATUALIZAR CARD
 @router.patch(
@@ -123,23 +351,33 @@ async def get_card(
 async def update_card(
     card_id: str,
     card_data: CardUpdateDTO,
+    response: Response,
+    expected_version: Optional[int] = Depends(if_match_version),
+    db: DatabaseSession = Depends(get_db),
 ):
     """
     Atualiza um Card existente, permitindo a modificação de um subconjunto de campos.
+    Com o header If-Match (ETag do GET), a atualização só é aplicada se o card não tiver
+    mudado desde então; caso contrário responde 412.
     """
     # card_atualizado = service.update(card_id, card_data) # Chamada ao serviço
 
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        update_card = await CardService.update_card(conn, card_id, card_data)
+        update_card = await CardService.update_card(db, card_id, card_data, expected_version)
         if not update_card:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Card não encontrado"
             )
+        if update_card.version is not None:
+            response.headers["ETag"] = make_version_etag(update_card.version)
         return update_card
+    except CardVersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+            headers={"ETag": make_version_etag(e.current_version)}
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -152,8 +390,6 @@ async def update_card(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 # DELETAR CARD
 @router.delete(
@@ -164,15 +400,13 @@ async def update_card(
 async def delete_card(
     card_id: str,
     # service: CardService = Depends(get_card_service)
+    db: DatabaseSession = Depends(get_db),
 ):
     """
     Deleta permanentemente um Card do sistema.
     """
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        deleted = await CardService.delete_card(conn, card_id)
+        deleted = await CardService.delete_card(db, card_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -185,16 +419,9 @@ async def delete_card(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 
 @router.patch("/alterarStatus/{card_id}")
-async def patch_alterar_status(card_id: str, status: StatusModel):
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    try:
-        updated_card = await CardService.alterar_status(conn, card_id, status)
-        return {"message": "Status atualizado com sucesso", "card": updated_card}
-    finally:
-        conn.close()
\ No newline at end of file
+async def patch_alterar_status(card_id: str, status: StatusModel, db: DatabaseSession = Depends(get_db)):
+    updated_card = await CardService.alterar_status(db, card_id, status)
+    return {"message": "Status atualizado com sucesso", "card": updated_card}
\ No newline at end of file
@@ -1,20 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional
 
-from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO, CicloResponseDTO
+from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO, CicloResponseDTO, CicloBoardDTO
 from service.ciclo_service import CicloService
-from db.connection import Connection
+from db.database import DatabaseRoute, DatabaseSession, get_db
+from db.errors import RegistroEmUsoError
+from core.config import settings
+from utils.pagination import PageParams, set_page_headers
+from utils.serialization import fast_page_response
+from core.http_cache import has_conditional_headers, is_not_modified, make_etag, not_modified_response, set_validators
 
-router = APIRouter(prefix="/ciclos", tags=["ciclos"])
+router = APIRouter(prefix="/ciclos", tags=["ciclos"], route_class=DatabaseRoute)
 
 @router.post("/", response_model=CicloResponseDTO, status_code=status.HTTP_201_CREATED)
-async def criar_ciclo(ciclo: CicloCreateDTO):
+async def criar_ciclo(ciclo: CicloCreateDTO, db: DatabaseSession = Depends(get_db)):
     """Cria um novo ciclo."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        result = await CicloService.create_ciclo(conn, ciclo)
+        result = await CicloService.create_ciclo(db, ciclo)
         return result
     except ValueError as e:
         raise HTTPException(
@@ -26,59 +28,62 @@ async def criar_ciclo(ciclo: CicloCreateDTO):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.get("/", response_model=List[CicloResponseDTO])
 async def listar_ciclos(
+    request: Request,
+    response: Response,
     versao: Optional[str] = Query(None, description="Filtrar por versão"),
-    projeto_id: Optional[str] = Query(None, description="Filtrar por projeto")
+    projeto_id: Optional[str] = Query(None, description="Filtrar por projeto"),
+    page: PageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
 ):
-    """Lista todos os ciclos ou filtra por versão/projeto."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
+    """Lista os ciclos (paginado por cursor) ou filtra por versão/projeto."""
     try:
+        raw = settings.JSON_FAST_PATH
         if projeto_id:
-            ciclos = await CicloService.get_ciclos_by_projeto(conn, projeto_id)
+            ciclos = await CicloService.get_ciclos_by_projeto(db, projeto_id, page, raw=raw)
         elif versao:
-            ciclos = await CicloService.get_ciclos_by_versao(conn, versao)
+            ciclos = await CicloService.get_ciclos_by_versao(db, versao, page, raw=raw)
         else:
-            ciclos = await CicloService.get_all_ciclos(conn)
+            ciclos = await CicloService.get_all_ciclos(db, page, raw=raw)
+        if raw:
+            return fast_page_response(request, ciclos)
+        set_page_headers(request, response, ciclos)
         return ciclos
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.get("/projeto/{projeto_id}", response_model=List[CicloResponseDTO])
-async def listar_ciclos_por_projeto(projeto_id: str):
-    """Lista todos os ciclos de um projeto específico."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
+async def listar_ciclos_por_projeto(
+    request: Request,
+    response: Response,
+    projeto_id: str,
+    page: PageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
+):
+    """Lista os ciclos de um projeto específico (paginado por cursor)."""
     try:
-        ciclos = await CicloService.get_ciclos_by_projeto(conn, projeto_id)
+        raw = settings.JSON_FAST_PATH
+        ciclos = await CicloService.get_ciclos_by_projeto(db, projeto_id, page, raw=raw)
+        if raw:
+            return fast_page_response(request, ciclos)
+        set_page_headers(request, response, ciclos)
         return ciclos
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.get("/nome/{nome}", response_model=CicloResponseDTO)
-async def obter_ciclo_por_nome(nome: str):
+async def obter_ciclo_por_nome(nome: str, db: DatabaseSession = Depends(get_db)):
     """Obtém um ciclo pelo nome."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        ciclo = await CicloService.get_ciclo_by_nome(conn, nome)
+        ciclo = await CicloService.get_ciclo_by_nome(db, nome)
         if not ciclo:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -92,22 +97,29 @@ async def obter_ciclo_por_nome(nome: str):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.get("/{ciclo_id}", response_model=CicloResponseDTO)
-async def obter_ciclo(ciclo_id: str):
-    """Obtém um ciclo pelo ID."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
+async def obter_ciclo(ciclo_id: str, request: Request, response: Response, db: DatabaseSession = Depends(get_db)):
+    """Obtém um ciclo pelo ID. Com If-None-Match/If-Modified-Since, responde 304 consultando só o updated_at."""
     try:
-        ciclo = await CicloService.get_ciclo_by_id(conn, ciclo_id)
+        if has_conditional_headers(request):
+            last_modified = await CicloService.get_ciclo_last_modified(db, ciclo_id)
+            if not last_modified:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Ciclo não encontrado"
+                )
+            if is_not_modified(request.headers, make_etag(last_modified), last_modified):
+                return not_modified_response(make_etag(last_modified), last_modified)
+
+        ciclo = await CicloService.get_ciclo_by_id(db, ciclo_id)
         if not ciclo:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Ciclo não encontrado"
             )
+        if ciclo.updated_at:
+            set_validators(response, make_etag(ciclo.updated_at), ciclo.updated_at)
         return ciclo
     except HTTPException:
         raise
@@ -116,17 +128,34 @@ async def obter_ciclo(ciclo_id: str):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
+
+@router.get("/{ciclo_id}/board", response_model=CicloBoardDTO)
+async def obter_quadro_do_ciclo(ciclo_id: str, db: DatabaseSession = Depends(get_db)):
+    """
+    Obtém o quadro (kanban) do ciclo: as fases na ordem, com seus artefatos e os cards
+    agrupados por status, com contagens e soma de horas por coluna. Uma única consulta.
+    """
+    try:
+        board = await CicloService.get_ciclo_board(db, ciclo_id)
+        if not board:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Ciclo não encontrado"
+            )
+        return board
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
 
 @router.put("/{ciclo_id}", response_model=CicloResponseDTO)
-async def atualizar_ciclo(ciclo_id: str, ciclo_data: CicloUpdateDTO):
+async def atualizar_ciclo(ciclo_id: str, ciclo_data: CicloUpdateDTO, db: DatabaseSession = Depends(get_db)):
     """Atualiza um ciclo."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        updated_ciclo = await CicloService.update_ciclo(conn, ciclo_id, ciclo_data)
+        updated_ciclo = await CicloService.update_ciclo(db, ciclo_id, ciclo_data)
         if not updated_ciclo:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -145,28 +174,23 @@ async def atualizar_ciclo(ciclo_id: str, ciclo_data: CicloUpdateDTO):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.delete("/{ciclo_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def deletar_ciclo(ciclo_id: str):
+async def deletar_ciclo(ciclo_id: str, db: DatabaseSession = Depends(get_db)):
     """Deleta um ciclo."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        deleted = await CicloService.delete_ciclo(conn, ciclo_id)
+        deleted = await CicloService.delete_ciclo(db, ciclo_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Ciclo não encontrado"
             )
+    except RegistroEmUsoError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
-        )
-    finally:
-        conn_instance.release_conn(conn)
\ No newline at end of file
+        )
\ No newline at end of file
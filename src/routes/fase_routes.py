@@ -1,11 +1,12 @@
 import stat
-from fastapi import APIRouter, status, Depends, Request, HTTPException
-from psycopg2.extensions import connection
+from fastapi import APIRouter, status, Depends, Request, Response, HTTPException
 from model.fase import FaseBase, Fase, FaseCreate, FaseResponse, FaseUpdate
 from service.fase_service import FaseService
-from db.database import get_db
+from db.database import DatabaseRoute, DatabaseSession, get_db
+from db.errors import RegistroEmUsoError
+from utils.pagination import OrdemPageParams, set_page_headers
 
-fase_router = APIRouter(prefix="/fases", tags=['fase'])
+fase_router = APIRouter(prefix="/fases", tags=['fase'], route_class=DatabaseRoute)
 
 @fase_router.post(
     "/",
@@ -15,7 +16,7 @@ fase_router = APIRouter(prefix="/fases", tags=['fase'])
 )
 async def create_fase(
    fase: FaseCreate,
-   db: connection = Depends(get_db),
+   db: DatabaseSession = Depends(get_db),
 ):
     created_fase = await FaseService.create_fase(db, fase)
 
@@ -34,15 +35,14 @@ async def create_fase(
         summary="Lista todas as fases",
 )
 async def get_all_fases(
-    db: connection = Depends(get_db)
+    request: Request,
+    response: Response,
+    page: OrdemPageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
 ):
-    fases = await FaseService.get_all_fases(db)
-    if not fases:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Nenhuma fase encontrada."
-        )
-    
+    # Página vazia (inclusive depois da última) é uma lista vazia, não 404
+    fases = await FaseService.get_all_fases(db, page)
+    set_page_headers(request, response, fases)
     return fases
 
 @fase_router.get(
@@ -51,7 +51,7 @@ async def get_all_fases(
     status_code=status.HTTP_200_OK,
     summary="Busca uma fase pelo ID",
 )
-async def get_fase_by_id(fase_id: str, db: connection = Depends(get_db)):
+async def get_fase_by_id(fase_id: str, db: DatabaseSession = Depends(get_db)):
     fase = await FaseService.get_fase_by_id(db, fase_id)
     if fase is None:
         raise HTTPException(
@@ -69,7 +69,7 @@ async def get_fase_by_id(fase_id: str, db: connection = Depends(get_db)):
 async def update_fase(
     fase_id: str, 
     fase: FaseUpdate, 
-    db: connection = Depends(get_db)
+    db: DatabaseSession = Depends(get_db)
 ):
     updated_fase = await FaseService.update_fase(db, fase_id, fase)
 
@@ -89,9 +89,12 @@ async def update_fase(
 )
 async def delete_fase(
     fase_id: str, 
-    db: connection = Depends(get_db)
+    db: DatabaseSession = Depends(get_db)
 ):
-    deleted_fase = await FaseService.delete_fase(db, fase_id)
+    try:
+        deleted_fase = await FaseService.delete_fase(db, fase_id)
+    except RegistroEmUsoError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     print(f'retorno -> {deleted_fase}')
     if deleted_fase is None:
         raise HTTPException(
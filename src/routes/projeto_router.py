@@ -1,15 +1,17 @@
-from fastapi import APIRouter, status, Depends, HTTPException
-from psycopg2.extensions import connection
+from fastapi import APIRouter, status, Depends, HTTPException, Request, Response
 
-from db.database import get_db
-from model.projeto import Projeto, ProjetoBase, ProjetoCreate, ProjetoResponse
+from db.database import DatabaseRoute, DatabaseSession, get_db
+from db.errors import RegistroEmUsoError
+from model.projeto import Projeto, ProjetoBase, ProjetoCreate, ProjetoResponse, ProjetoUpdate
 from service.projeto_service import ProjetoService
+from utils.pagination import PageParams, set_page_headers
+from core.http_cache import has_conditional_headers, is_not_modified, make_etag, not_modified_response, set_validators
 
-router = APIRouter(prefix="/projetos", tags=['projetos'])
+router = APIRouter(prefix="/projetos", tags=['projetos'], route_class=DatabaseRoute)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_projeto(projeto: ProjetoCreate, db: connection = Depends(get_db)):
+async def create_projeto(projeto: ProjetoCreate, db: DatabaseSession = Depends(get_db)):
     """
     Cria um novo projeto e associa os responsáveis indicados.
     """
@@ -27,26 +29,64 @@ async def create_projeto(projeto: ProjetoCreate, db: connection = Depends(get_db
 
 
 @router.get("/")
-async def get_all_projetos(db: connection = Depends(get_db)):
+async def get_all_projetos(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
+):
     """
-    Retorna todos os projetos cadastrados.
+    Retorna uma página dos projetos cadastrados (cursores nos headers X-Next-Cursor/X-Prev-Cursor).
     """
     try:
-        projetos = await ProjetoService.get_all_projetos(db)
+        projetos = await ProjetoService.get_all_projetos(db, page)
+        set_page_headers(request, response, projetos)
         return projetos
     except Exception:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno do servidor")
 
 
+@router.get("/summary")
+async def get_projetos_summary(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: DatabaseSession = Depends(get_db),
+):
+    """
+    Retorna o resumo dos projetos para o painel: quantidade de ciclos, cards por status e
+    horas planejadas x concluídas. Os números vêm pré-calculados (`atualizado_em` indica
+    quando) e são recalculados periodicamente (PROJETO_RESUMO_REFRESH_SECONDS).
+    """
+    try:
+        resumo = await ProjetoService.get_projetos_summary(db, page)
+        set_page_headers(request, response, resumo)
+        return resumo
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno do servidor")
+
+
 @router.get("/{projeto_id}")
-async def get_projeto_by_id(projeto_id: str, db: connection = Depends(get_db)):
+async def get_projeto_by_id(projeto_id: str, request: Request, response: Response, db: DatabaseSession = Depends(get_db)):
     """
-    Retorna um projeto pelo seu ID.
+    Retorna um projeto pelo seu ID. O ETag/Last-Modified considera também os responsáveis;
+    com If-None-Match/If-Modified-Since, responde 304 sem montar o projeto.
     """
     try:
+        if has_conditional_headers(request):
+            validator = await ProjetoService.get_projeto_validator(db, projeto_id)
+            if not validator:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Projeto não encontrado")
+            etag = make_etag(validator["last_modified"], validator["responsaveis"])
+            if is_not_modified(request.headers, etag, validator["last_modified"]):
+                return not_modified_response(etag, validator["last_modified"])
+
         projeto = await ProjetoService.get_projeto_by_id(db, projeto_id)
         if not projeto:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Projeto não encontrado")
+        last_modified = projeto.pop("last_modified", None)
+        if last_modified:
+            set_validators(response, make_etag(last_modified, len(projeto["responsaveis"])), last_modified)
         return projeto
     except HTTPException:
         raise
@@ -55,9 +95,10 @@ async def get_projeto_by_id(projeto_id: str, db: connection = Depends(get_db)):
 
 
 @router.put("/{projeto_id}")
-async def update_projeto(projeto_id: str, projeto: ProjetoBase, db: connection = Depends(get_db)):
+async def update_projeto(projeto_id: str, projeto: ProjetoUpdate, db: DatabaseSession = Depends(get_db)):
     """
-    Atualiza os dados de um projeto.
+    Atualiza os dados de um projeto. Se `responsaveis_id` for enviado, a equipe passa a ser
+    exatamente essa lista.
     """
     try:
         updated = await ProjetoService.update_projeto(db, projeto_id, projeto.dict())
@@ -73,7 +114,7 @@ async def update_projeto(projeto_id: str, projeto: ProjetoBase, db: connection =
 
 
 @router.delete("/{projeto_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_projeto(projeto_id: str, db: connection = Depends(get_db)):
+async def delete_projeto(projeto_id: str, db: DatabaseSession = Depends(get_db)):
     """
     Remove um projeto existente.
     """
@@ -82,6 +123,8 @@ async def delete_projeto(projeto_id: str, db: connection = Depends(get_db)):
         if not deleted:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Projeto não encontrado")
         return
+    except RegistroEmUsoError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except HTTPException:
         raise
     except Exception:
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from datetime import timedelta
 from typing import List
 
@@ -6,18 +6,19 @@ from model.dto.usuario_dto import UsuarioCreateDTO, UsuarioResponseDTO, UsuarioL
 from model.token import Token
 from service.usuario_service import UsuarioService
 from core.auth import create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
-from db.connection import Connection
+from db.database import DatabaseRoute, DatabaseSession, get_db
+from db.errors import RegistroEmUsoError
+from core.config import settings
+from utils.pagination import PageParams, set_page_headers
+from utils.serialization import fast_page_response
 
-router = APIRouter(prefix="/usuarios", tags=["usuarios"])
+router = APIRouter(prefix="/usuarios", tags=["usuarios"], route_class=DatabaseRoute)
 
 @router.post("/registro", response_model=UsuarioResponseDTO, status_code=status.HTTP_201_CREATED)
-async def criar_usuario(usuario: UsuarioCreateDTO):
+async def criar_usuario(usuario: UsuarioCreateDTO, db: DatabaseSession = Depends(get_db)):
     """Registra um novo usuário."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        result = await UsuarioService.create_user(conn, usuario)
+        result = await UsuarioService.create_user(db, usuario)
         return result
     except ValueError as e:
         raise HTTPException(
@@ -29,30 +30,25 @@ async def criar_usuario(usuario: UsuarioCreateDTO):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.post("/login", response_model=Token)
-async def login_usuario(usuario_login: UsuarioLoginDTO):
+async def login_usuario(usuario_login: UsuarioLoginDTO, db: DatabaseSession = Depends(get_db)):
     """Autentica um usuário e retorna um token JWT."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        user = await UsuarioService.authenticate_user(conn, usuario_login.email, usuario_login.senha)
-        
+        user = await UsuarioService.authenticate_user(db, usuario_login.email, usuario_login.senha)
+    
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email ou senha incorretos",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        
+    
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.id}, expires_delta=access_token_expires
         )
-        
+    
         return {"access_token": access_token, "token_type": "bearer"}
     except HTTPException:
         raise
@@ -61,17 +57,12 @@ async def login_usuario(usuario_login: UsuarioLoginDTO):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.get("/me", response_model=UsuarioResponseDTO)
-async def obter_usuario_atual(current_user_id: str = Depends(get_current_user)):
+async def obter_usuario_atual(current_user_id: str = Depends(get_current_user), db: DatabaseSession = Depends(get_db)):
     """Obtém as informações do usuário atualmente autenticado."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        user = await UsuarioService.get_user_by_id(conn, current_user_id)
+        user = await UsuarioService.get_user_by_id(db, current_user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -85,35 +76,35 @@ async def obter_usuario_atual(current_user_id: str = Depends(get_current_user)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.get("/", response_model=List[UsuarioResponseDTO])
-async def listar_usuarios(current_user_id: str = Depends(get_current_user)):
-    """Lista todos os usuários (requer autenticação)."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
+async def listar_usuarios(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    current_user_id: str = Depends(get_current_user),
+    db: DatabaseSession = Depends(get_db),
+):
+    """Lista os usuários, paginado por cursor (requer autenticação)."""
     try:
-        users = await UsuarioService.get_all_users(conn)
+        raw = settings.JSON_FAST_PATH
+        users = await UsuarioService.get_all_users(db, page, raw=raw)
+        if raw:
+            return fast_page_response(request, users)
+        set_page_headers(request, response, users)
         return users
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 
 @router.get("/{user_id}", response_model=UsuarioResponseDTO)
-async def obter_usuario(user_id: str, current_user_id: str = Depends(get_current_user)):
+async def obter_usuario(user_id: str, current_user_id: str = Depends(get_current_user), db: DatabaseSession = Depends(get_db)):
     """Obtém um usuário pelo ID (requer autenticação)."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        user = await UsuarioService.get_user_by_id(conn, user_id)
+        user = await UsuarioService.get_user_by_id(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -127,21 +118,17 @@ async def obter_usuario(user_id: str, current_user_id: str = Depends(get_current
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.put("/{user_id}", response_model=UsuarioResponseDTO)
 async def atualizar_usuario(
     user_id: str, 
     usuario_data: UsuarioCreateDTO,
-    current_user_id: str = Depends(get_current_user)
+    current_user_id: str = Depends(get_current_user),
+    db: DatabaseSession = Depends(get_db),
 ):
     """Atualiza um usuário (requer autenticação). Qualquer usuário autenticado pode atualizar qualquer usuário."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        updated_user = await UsuarioService.update_user(conn, user_id, usuario_data)
+        updated_user = await UsuarioService.update_user(db, user_id, usuario_data)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -160,25 +147,23 @@ async def atualizar_usuario(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_usuario(
     user_id: str,
-    current_user_id: str = Depends(get_current_user)
+    current_user_id: str = Depends(get_current_user),
+    db: DatabaseSession = Depends(get_db),
 ):
     """Deleta um usuário (requer autenticação). Qualquer usuário autenticado pode deletar qualquer usuário."""
-    conn_instance = Connection()
-    conn = conn_instance.get_conn()
-    
     try:
-        deleted = await UsuarioService.delete_user(conn, user_id)
+        deleted = await UsuarioService.delete_user(db, user_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Usuário não encontrado"
             )
+    except RegistroEmUsoError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -186,5 +171,3 @@ async def deletar_usuario(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
         )
-    finally:
-        conn_instance.release_conn(conn)
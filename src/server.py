@@ -0,0 +1,86 @@
+"""
+Entrypoint de produção da API.
+
+    python -m server
+
+Sobe WEB_CONCURRENCY processos (workers) do uvicorn, por padrão um por núcleo disponível,
+todos escutando a mesma porta. Cada worker importa a aplicação por conta própria e abre
+o seu pool de conexões no `lifespan` (ver `main.py`), ou seja, depois de criado o
+processo: nenhuma conexão com o banco é herdada entre processos.
+
+No SIGTERM (ex.: `docker stop`, rolling deploy) todos os workers param de aceitar
+conexões ao mesmo tempo, terminam as requisições em andamento (até
+SERVER_GRACEFUL_TIMEOUT segundos), param as tarefas em segundo plano e fecham o pool.
+Para desenvolvimento, com reload, continue usando `python main.py`.
+"""
+import logging
+import os
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def worker_count() -> int:
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    try:
+        # Respeita a afinidade de CPU do processo (ex.: `taskset`, cpuset do container)
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class _Supervisor(Multiprocess):
+    """
+    Supervisor de workers do uvicorn com encerramento em paralelo: o original encerra um
+    worker de cada vez (e os seguintes continuam aceitando conexões enquanto isso),
+    somando os tempos de drenagem de todos, e mantém o socket de escuta aberto.
+
+    Sobrescreve `Multiprocess.shutdown`, que não é API pública do uvicorn: escrito para
+    o uvicorn 0.29 (fixado em requirements.txt). Ao atualizar o uvicorn, confira se o
+    `Multiprocess` ainda chama `shutdown()` no SIGTERM e usa `processes`/`sockets`.
+    """
+
+    def shutdown(self) -> None:
+        # O processo principal também tem o socket de escuta: se ficasse aberto, o kernel
+        # seguiria aceitando conexões que nenhum worker atenderia
+        for sock in self.sockets:
+            sock.close()
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        logger.info(f"Workers encerrados; parando o processo principal [{self.pid}]")
+
+
+def main() -> None:
+    workers = worker_count()
+    config = uvicorn.Config(
+        "main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        lifespan="on",
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        log_level="info",
+    )
+    server = uvicorn.Server(config)
+    logger.info(
+        f"{workers} worker(s) em {settings.SERVER_HOST}:{settings.SERVER_PORT}; até "
+        f"{workers * settings.DB_POOL_MAX_SIZE} conexões com o banco ({settings.DB_POOL_MAX_SIZE} por worker)"
+    )
+    if workers > 1:
+        _Supervisor(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
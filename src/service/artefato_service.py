@@ -1,32 +1,48 @@
 from model.artefato import Artefato, ArtefatoBase, ArtefatoResponse
 from repository import artefato_repository
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection
+from core.cache import cached, get_cache
+from utils.pagination import Page, PageParams
+
+# Artefatos mudam raramente: leituras vêm do cache do processo. Como as fases trazem
+# os nomes dos seus artefatos, escrever um artefato limpa também o cache de fases.
+artefatos_cache = get_cache("artefatos")
+fases_cache = get_cache("fases")
+
+
+def _invalidate_caches() -> None:
+    artefatos_cache.clear()
+    fases_cache.clear()
 
 async def create_artefato(
-    db: connection,
+    db: AsyncConnection,
     artefato: ArtefatoBase,
 ) -> Artefato | None:
-
-    existing_artefato = await artefato_repository.get_artefato_by_name(db, artefato.nome)
-    if existing_artefato:
-        return None
-
+    # Nome duplicado é detectado pelo índice único no próprio INSERT (ValueError)
     inserted_artefato = await artefato_repository.create_artefato(db, artefato)
+    # Só depois do commit: antes dele outra requisição poderia recarregar o dado antigo
+    _invalidate_caches()
 
     return inserted_artefato
 
-async def get_all_artefatos(db: connection,) -> ArtefatoResponse | None:
-    return await artefato_repository.get_all_artefatos(db)
-
-async def get_artefato_by_id(db: connection, artefato_id: str) -> ArtefatoResponse | None:
-    return await artefato_repository.get_artefato_by_id(db, artefato_id)
-
-async def delete_artefato(db: connection, artefato_id: str) -> ArtefatoResponse | None:
-    return await artefato_repository.delete_artefato(db, artefato_id)
-
-async def update_artefato(db: connection, artefato_id: str, artefato: ArtefatoBase) -> ArtefatoResponse | None:
-    existing_artefato = await artefato_repository.get_artefato_by_name(db, artefato.nome)
-    if existing_artefato:
-        return None
-    
-    return await artefato_repository.update_artefato(db, artefato_id, artefato)
\ No newline at end of file
+async def get_all_artefatos(db: AsyncConnection, page: PageParams | None = None) -> Page:
+    page = page or PageParams.first()
+    return await cached(
+        artefatos_cache,
+        ("page", page.limit, page.cursor),
+        lambda: artefato_repository.get_all_artefatos(db, page),
+    )
+
+async def get_artefato_by_id(db: AsyncConnection, artefato_id: str) -> ArtefatoResponse | None:
+    return await cached(artefatos_cache, ("id", artefato_id), lambda: artefato_repository.get_artefato_by_id(db, artefato_id))
+
+async def delete_artefato(db: AsyncConnection, artefato_id: str) -> ArtefatoResponse | None:
+    deleted_artefato = await artefato_repository.delete_artefato(db, artefato_id)
+    _invalidate_caches()
+    return deleted_artefato
+
+async def update_artefato(db: AsyncConnection, artefato_id: str, artefato: ArtefatoBase) -> ArtefatoResponse | None:
+    # Nome de outro artefato é detectado pelo índice único no próprio UPDATE (ValueError)
+    updated_artefato = await artefato_repository.update_artefato(db, artefato_id, artefato)
+    _invalidate_caches()
+    return updated_artefato
\ No newline at end of file
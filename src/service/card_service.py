@@ -1,18 +1,36 @@
 from datetime import datetime
-from typing import Optional, List
-from psycopg2.extensions import connection
+from typing import Optional, List, AsyncIterator
+from psycopg import AsyncConnection
+from db.transaction import transaction
 from model.card import CardModel, StatusModel 
-from model.dto.card_dto import CardCreateDTO, CardUpdateDTO, CardResponseDTO, CardResponseFiltroCicloDTO
-from repository import card_repository, ciclo_repository
+from model.dto.card_dto import (
+    CardCreateDTO, CardUpdateDTO, CardResponseDTO, CardResponseFiltroCicloDTO, CardFiltroDTO,
+    CardBulkItemResultDTO, CardBulkResponseDTO, CardTemposDTO, CardTransicaoDTO, CardFluxoRelatorioDTO,
+    CardStatsDTO, CardStatsGrupoDTO,
+)
+from repository import card_repository
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams
+from utils.serialization import dumps, project_row, response_fields
 from model.card_status import CardStatus
+from core.config import settings
 
 import traceback
+import uuid
+from pydantic import ValidationError
+
+class CardVersionConflictError(Exception):
+    """O card foi alterado por outra requisição desde a versão informada no If-Match."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Card alterado por outra requisição (versão atual {current_version})")
+        self.current_version = current_version
+
 
 class CardService:
 
     @staticmethod
-    async def create_card(conn: connection, card_data: CardCreateDTO) -> CardResponseDTO:
+    async def create_card(conn: AsyncConnection, card_data: CardCreateDTO) -> CardResponseDTO:
         """Cria um novo card."""
         try:
             # Não há validação de unicidade de "nome" como em Ciclo, mas você pode adicionar
@@ -42,7 +60,72 @@ class CardService:
 
 
     @staticmethod
-    async def get_card_by_id(conn: connection, card_id: str) -> Optional[CardResponseDTO]:
+    async def bulk_create_cards(conn: AsyncConnection, itens: list) -> CardBulkResponseDTO:
+        """
+        Cria vários cards de uma vez.
+
+        Todos os itens são validados antes de qualquer escrita: formato (CardCreateDTO),
+        UUIDs e existência de ciclo, fase, artefato e responsável, numa única consulta.
+        Os itens válidos são inseridos juntos com COPY; os inválidos voltam com os erros.
+        """
+        resultados: list[CardBulkItemResultDTO] = []
+        validos: list[tuple[int, CardCreateDTO]] = []
+        ref_fields = ("ciclo_id", "fase_id", "artefato_id", "responsavel_id")
+
+        for index, item in enumerate(itens):
+            try:
+                card = CardCreateDTO.model_validate(item)
+            except ValidationError as e:
+                erros = [f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()]
+                resultados.append(CardBulkItemResultDTO(index=index, status="erro", erros=erros))
+                continue
+            erros = []
+            for field in ref_fields:
+                try:
+                    setattr(card, field, str(uuid.UUID(getattr(card, field))))
+                except ValueError:
+                    erros.append(f"{field}: UUID inválido")
+            if erros:
+                resultados.append(CardBulkItemResultDTO(index=index, status="erro", erros=erros))
+            else:
+                validos.append((index, card))
+
+        try:
+            if validos:
+                # Verificação das referências e COPY na mesma transação
+                async with transaction(conn):
+                    existentes = await card_repository.get_existing_references(
+                        conn, *[list({getattr(card, field) for _, card in validos}) for field in ref_fields]
+                    )
+                    linhas, criados = [], []
+                    for index, card in validos:
+                        erros = [f"{field}: não encontrado" for field in ref_fields if getattr(card, field) not in existentes[field]]
+                        if erros:
+                            resultados.append(CardBulkItemResultDTO(index=index, status="erro", erros=erros))
+                            continue
+                        card_id = str(uuid.uuid4())
+                        linhas.append((
+                            card_id, card.status.value, card.tempo_planejado_horas, card.link, card.descricao,
+                            card.ciclo_id, card.fase_id, card.artefato_id, card.responsavel_id,
+                        ))
+                        criados.append(CardBulkItemResultDTO(index=index, status="criado", id=card_id))
+                    if linhas:
+                        await card_repository.bulk_create_cards(conn, linhas)
+                resultados.extend(criados)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+        resultados.sort(key=lambda resultado: resultado.index)
+        criados_total = sum(1 for resultado in resultados if resultado.status == "criado")
+        return CardBulkResponseDTO(
+            criados=criados_total,
+            rejeitados=len(resultados) - criados_total,
+            resultados=resultados,
+        )
+
+    @staticmethod
+    async def get_card_by_id(conn: AsyncConnection, card_id: str) -> Optional[CardResponseDTO]:
         """Obtém um card pelo ID."""
         try:
             card_data = await card_repository.get_card_by_id(conn, card_id)
@@ -54,11 +137,23 @@ class CardService:
             return None
 
     @staticmethod
-    async def get_all_cards(conn: connection) -> List[CardResponseDTO]:
-        """Obtém todos os cards sem filtro."""
+    async def get_card_validator(conn: AsyncConnection, card_id: str) -> Optional[dict]:
+        """Versão e data da última alteração do card (sem buscar o registro inteiro)."""
         try:
-            cards_data = await card_repository.get_all_cards(conn)
-            return [CardService._map_to_response_dto(card) for card in cards_data]
+            return await card_repository.get_card_validator(conn, card_id)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    @staticmethod
+    async def get_all_cards(conn: AsyncConnection, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """
+        Obtém uma página dos cards sem filtro. Com `raw=True` (JSON_FAST_PATH) os itens são
+        dicts já no formato da resposta, sem DTO; o mesmo vale para as demais listagens.
+        """
+        try:
+            cards_data = await card_repository.get_all_cards(conn, page)
+            return cards_data.map(CardService._map_to_response_row if raw else CardService._map_to_response_dto)
         except Exception as e:
             print_error_details(e)
             return []
@@ -66,35 +161,69 @@ class CardService:
 
     
     @staticmethod
-    async def update_card(conn: connection, card_id: str, card_data: CardUpdateDTO) -> Optional[CardResponseDTO]:
-        """Atualiza um card. Aceita apenas os campos fornecidos no DTO."""
+    async def export_cards(
+        conn: AsyncConnection,
+        formato: str = "ndjson",
+        filtro: Optional[CardFiltroDTO] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Exporta os cards em NDJSON (um objeto por linha) ou como um array JSON.
+
+        As linhas vêm do cursor do servidor e são codificadas direto para bytes, lote a
+        lote, sem passar pelos DTOs nem montar a resposta inteira em memória.
+        """
+        first = True
+        if formato == "json":
+            yield b"["
+        async for batch in card_repository.stream_cards(conn, settings.EXPORT_BATCH_SIZE, filtro):
+            # Mesmo codificador das listagens (utils.serialization): datas e UUIDs iguais
+            rows = [dumps(row) for row in batch]
+            if formato == "json":
+                chunk = b",".join(rows)
+                yield chunk if first else b"," + chunk
+            else:
+                yield b"\n".join(rows) + b"\n"
+            first = False
+        if formato == "json":
+            yield b"]"
+
+    @staticmethod
+    async def update_card(
+        conn: AsyncConnection,
+        card_id: str,
+        card_data: CardUpdateDTO,
+        expected_version: Optional[int] = None,
+    ) -> Optional[CardResponseDTO]:
+        """
+        Atualiza um card com um único UPDATE. Aceita apenas os campos fornecidos no DTO.
+
+        Com `expected_version` (If-Match), lança `CardVersionConflictError` se o card tiver
+        sido alterado por outra requisição.
+        """
         try:
-            # 1. Verifica se o card existe
-            existing_card = await card_repository.get_card_by_id(conn, card_id)
-            if not existing_card:
-                return None # Retorna None se não encontrar
-            
-            print(existing_card)
-
-            # 2. Converte o DTO para um dicionário, ignorando campos None
+            # 1. Converte o DTO para um dicionário, ignorando campos None
             update_data = card_data.model_dump(exclude_none=True)
 
-            # 3. Se não houver dados para atualizar, retorna o card existente
-            if not update_data:
-                return CardService._map_to_response_dto(existing_card)
+            if "status" in update_data:
+                try:
+                    update_data["status"] = CardStatus(update_data["status"])
+                except ValueError:
+                    raise ValueError(f"Status inválido: {update_data['status']}")
 
-            # 4. Atualiza o card
-            updated_card = await card_repository.update_card(conn, card_id, update_data)
+            # 2. Atualiza o card (sem dados, devolve o card atual sem mudar a versão)
+            updated_card, current_version = await card_repository.update_card(conn, card_id, update_data, expected_version)
 
             if updated_card:
                 return CardService._map_to_response_dto(updated_card)
+            if current_version is not None:
+                raise CardVersionConflictError(current_version)
             return None
         except Exception as e:
             print_error_details(e)
             raise e
 
     @staticmethod
-    async def delete_card(conn: connection, card_id: str) -> bool:
+    async def delete_card(conn: AsyncConnection, card_id: str) -> bool:
         """Deleta um card."""
         try:
             deleted_count = await card_repository.delete_card(conn, card_id)
@@ -104,50 +233,124 @@ class CardService:
             return False
 
     @staticmethod
-    async def get_cards_by_status(conn: connection, status_val: CardStatus) -> List[CardResponseDTO]:
-        """Obtém cards por status."""
+    async def get_cards_by_status(conn: AsyncConnection, status_val: CardStatus, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos cards por status."""
         try:
-            cards_data = await card_repository.get_cards_by_status(conn, status_val.value)
-            return [CardService._map_to_response_dto(card) for card in cards_data]
+            cards_data = await card_repository.get_cards_by_status(conn, status_val.value, page)
+            return cards_data.map(CardService._map_to_response_row if raw else CardService._map_to_response_dto)
         except Exception as e:
             print_error_details(e)
             return []
 
     @staticmethod
-    async def get_cards_by_ciclo(conn: connection, ciclo_id: str) -> List[CardResponseFiltroCicloDTO]:
-        """Obtém cards por ID do ciclo."""
+    async def get_cards_by_ciclo(conn: AsyncConnection, ciclo_id: str, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos cards por ID do ciclo."""
         try:
-            cards_data = await card_repository.get_cards_by_ciclo(conn, ciclo_id)
-            # retorna o objeto do ciclo
-            ciclo_obj = await  ciclo_repository.get_ciclo_by_id(conn, ciclo_id)
-         
-            # ciclo precisa existir
-            if not ciclo_obj:
-                print_error_details(e)
-                return None
-            
-            # retorna o id do projeto
-            project_id = ciclo_obj["projeto_id"]
-            for card in cards_data:
-                card["projeto_id"] = project_id
-
-            return [CardService._map_to_response_dto(card) for card in cards_data]
+            # O repositório já traz o projeto_id do ciclo em cada card
+            cards_data = await card_repository.get_cards_by_ciclo(conn, ciclo_id, page)
+            return cards_data.map(CardService._map_to_response_row if raw else CardService._map_to_response_dto)
         except Exception as e:
             print_error_details(e)
             print(traceback.format_exc())
             return []
 
     @staticmethod
-    async def get_cards_by_responsavel(conn: connection, responsavel_id: str) -> List[CardResponseDTO]:
-        """Obtém cards por ID do responsável."""
+    async def get_cards_filtered(conn: AsyncConnection, filtro: CardFiltroDTO, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos cards combinando todos os filtros informados."""
         try:
-            cards_data = await card_repository.get_cards_by_responsavel(conn, responsavel_id)
-            return [CardService._map_to_response_dto(card) for card in cards_data]
+            cards_data = await card_repository.get_cards_filtered(conn, filtro, page)
+            return cards_data.map(CardService._map_to_response_row if raw else CardService._map_to_response_dto)
         except Exception as e:
             print_error_details(e)
             return []
 
-    async def alterar_status(conn: connection, card_id: str, status_data: StatusModel):
+    @staticmethod
+    async def get_cards_by_responsavel(conn: AsyncConnection, responsavel_id: str, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos cards por ID do responsável."""
+        try:
+            cards_data = await card_repository.get_cards_by_responsavel(conn, responsavel_id, page)
+            return cards_data.map(CardService._map_to_response_row if raw else CardService._map_to_response_dto)
+        except Exception as e:
+            print_error_details(e)
+            return []
+
+    @staticmethod
+    async def get_card_stats(conn: AsyncConnection, filtro: Optional[CardFiltroDTO] = None) -> CardStatsDTO:
+        """Totais de cards e horas planejadas (geral, por status, responsável e fase), somados no banco."""
+        try:
+            rows = await card_repository.get_card_stats(conn, filtro)
+            grupos = {"total": [], "status": [], "responsavel": [], "fase": []}
+            for row in rows:
+                grupos[row["grupo"]].append(CardStatsGrupoDTO(chave=row["chave"], cards=row["cards"], horas=row["horas"]))
+            return CardStatsDTO(
+                total=grupos["total"][0],
+                por_status=grupos["status"],
+                por_responsavel=grupos["responsavel"],
+                por_fase=grupos["fase"],
+            )
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    @staticmethod
+    async def get_card_tempos(conn: AsyncConnection, card_id: str) -> Optional[CardTemposDTO]:
+        """Tempo acumulado por status, cycle/lead time e histórico de transições de um card."""
+        try:
+            card = await card_repository.get_card_tempos(conn, card_id)
+            if not card:
+                return None
+
+            horas = {row["status"]: row["segundos"] / 3600 for row in card["tempos"]}
+            horas[card["status"]] = horas.get(card["status"], 0) + card["segundos_status_atual"] / 3600
+
+            def horas_entre(inicio, fim):
+                return (fim - inicio).total_seconds() / 3600 if inicio and fim else None
+
+            return CardTemposDTO(
+                card_id=card["id"],
+                status=CardStatus(card["status"]),
+                status_desde=card["status_desde"],
+                iniciado_em=card["iniciado_em"],
+                concluido_em=card["concluido_em"],
+                horas_por_status=horas,
+                cycle_time_horas=horas_entre(card["iniciado_em"], card["concluido_em"]),
+                lead_time_horas=horas_entre(card["created_at"], card["concluido_em"]),
+                transicoes=[
+                    CardTransicaoDTO(
+                        status_anterior=t["status_anterior"],
+                        status_novo=t["status_novo"],
+                        alterado_em=t["alterado_em"],
+                        horas_no_anterior=t["segundos_no_anterior"] / 3600 if t["segundos_no_anterior"] is not None else None,
+                    )
+                    for t in card["transicoes"]
+                ],
+            )
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    @staticmethod
+    async def get_fluxo_report(
+        conn: AsyncConnection,
+        ciclo_id: Optional[str] = None,
+        projeto_id: Optional[str] = None,
+        concluido_de: Optional[datetime] = None,
+        concluido_ate: Optional[datetime] = None,
+    ) -> CardFluxoRelatorioDTO:
+        """Cycle time e lead time dos cards concluídos no recorte informado."""
+        try:
+            report = await card_repository.get_fluxo_report(conn, {
+                "ciclo_id": ciclo_id,
+                "projeto_id": projeto_id,
+                "concluido_de": concluido_de,
+                "concluido_ate": concluido_ate,
+            })
+            return CardFluxoRelatorioDTO(**report)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    async def alterar_status(conn: AsyncConnection, card_id: str, status_data: StatusModel):
         try:
             updated_card = await card_repository.update_card_status(conn, card_id, status_data.status)
             return updated_card
@@ -155,11 +358,23 @@ class CardService:
             print_error_details(e)
             raise e
 
+    @staticmethod
+    def _map_to_response_row(card_data: dict) -> dict:
+        """Como `_map_to_response_dto`, mas recorta a linha sem instanciar nem validar o DTO."""
+        model = CardResponseFiltroCicloDTO if "projeto_id" in card_data else CardResponseDTO
+        row = project_row(card_data, response_fields(model))
+        # O DTO não recebe started/progress da linha: a resposta mantém o padrão (None)
+        row["started"] = row["progress"] = None
+        return row
+
     @staticmethod
     def _map_to_response_dto(card_data: dict) -> CardResponseDTO | CardResponseFiltroCicloDTO:
-        """Função auxiliar para mapear dados do banco para o DTO de resposta."""
+        """
+        Função auxiliar para mapear dados do banco para o DTO de resposta. As linhas das
+        listagens trazem `projeto_id` (mesmo nulo) e viram `CardResponseFiltroCicloDTO`.
+        """
 
-        if card_data.get("projeto_id"):
+        if "projeto_id" in card_data:
 
             return CardResponseFiltroCicloDTO(
                 id=card_data['id'],
@@ -171,7 +386,9 @@ class CardService:
                 fase_id=card_data['fase_id'],
                 artefato_id=card_data['artefato_id'],
                 responsavel_id=card_data['responsavel_id'],
-                projeto_id=card_data['projeto_id']
+                projeto_id=card_data['projeto_id'],
+                version=card_data.get('version'),
+                updated_at=card_data.get('updated_at')
             )
 
         return CardResponseDTO(
@@ -183,5 +400,7 @@ class CardService:
             ciclo_id=card_data['ciclo_id'],
             fase_id=card_data['fase_id'],
             artefato_id=card_data['artefato_id'],
-            responsavel_id=card_data['responsavel_id']
+            responsavel_id=card_data['responsavel_id'],
+            version=card_data.get('version'),
+            updated_at=card_data.get('updated_at')
         )
\ No newline at end of file
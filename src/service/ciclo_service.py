@@ -1,40 +1,41 @@
 from datetime import datetime
 from typing import Optional, List
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from model.ciclo import Ciclo
-from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO, CicloResponseDTO
+from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO, CicloResponseDTO, CicloBoardDTO
 from repository import ciclo_repository
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams
+from utils.serialization import project_row, response_fields
 
 class CicloService:
     
     @staticmethod
-    async def create_ciclo(conn: connection, ciclo_data: CicloCreateDTO) -> CicloResponseDTO:
+    async def create_ciclo(conn: AsyncConnection, ciclo_data: CicloCreateDTO) -> CicloResponseDTO:
         """Cria um novo ciclo."""
         try:
-            # Verifica se o nome já existe
-            if await ciclo_repository.nome_exists(conn, ciclo_data.nome):
-                raise ValueError("Nome do ciclo já existe")
+            async with transaction(conn):
+                # Cria o ciclo no banco (nome duplicado: ValueError vindo do índice único)
+                created_ciclo = await ciclo_repository.create_ciclo(conn, ciclo_data)
             
-            # Cria o ciclo no banco
-            created_ciclo = await ciclo_repository.create_ciclo(conn, ciclo_data)
+                if not created_ciclo:
+                    raise ValueError("Erro ao criar ciclo")
             
-            if not created_ciclo:
-                raise ValueError("Erro ao criar ciclo")
-            
-            # Retorna resposta
-            return CicloResponseDTO(
-                id=created_ciclo['id'],
-                nome=created_ciclo['nome'],
-                versao=created_ciclo['versao'],
-                projeto_id=created_ciclo['projeto_id']
-            )
+                # Retorna resposta
+                return CicloResponseDTO(
+                    id=created_ciclo['id'],
+                    nome=created_ciclo['nome'],
+                    versao=created_ciclo['versao'],
+                    projeto_id=created_ciclo['projeto_id']
+                )
         except Exception as e:
             print_error_details(e)
             raise e
     
     @staticmethod
-    async def get_ciclo_by_id(conn: connection, ciclo_id: str) -> Optional[CicloResponseDTO]:
+    async def get_ciclo_by_id(conn: AsyncConnection, ciclo_id: str) -> Optional[CicloResponseDTO]:
         """Obtém um ciclo pelo ID."""
         try:
             ciclo_data = await ciclo_repository.get_ciclo_by_id(conn, ciclo_id)
@@ -43,7 +44,8 @@ class CicloService:
                     id=ciclo_data['id'],
                     nome=ciclo_data['nome'],
                     versao=ciclo_data['versao'],
-                    projeto_id=ciclo_data['projeto_id']
+                    projeto_id=ciclo_data['projeto_id'],
+                    updated_at=ciclo_data['updated_at']
                 )
             return None
         except Exception as e:
@@ -51,63 +53,80 @@ class CicloService:
             return None
     
     @staticmethod
-    async def get_all_ciclos(conn: connection) -> List[CicloResponseDTO]:
-        """Obtém todos os ciclos."""
+    async def get_ciclo_last_modified(conn: AsyncConnection, ciclo_id: str) -> Optional[datetime]:
+        """Data da última alteração do ciclo (sem buscar o registro inteiro)."""
         try:
-            ciclos_data = await ciclo_repository.get_all_ciclos(conn)
-            return [
-                CicloResponseDTO(
-                    id=ciclo['id'],
-                    nome=ciclo['nome'],
-                    versao=ciclo['versao'],
-                    projeto_id=ciclo['projeto_id']
-                )
-                for ciclo in ciclos_data
-            ]
+            return await ciclo_repository.get_ciclo_last_modified(conn, ciclo_id)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    @staticmethod
+    async def get_ciclo_board(conn: AsyncConnection, ciclo_id: str) -> Optional[CicloBoardDTO]:
+        """Obtém o quadro do ciclo (fases, artefatos e cards por status) em uma única consulta."""
+        try:
+            board = await ciclo_repository.get_ciclo_board(conn, ciclo_id)
+            if board:
+                return CicloBoardDTO.model_validate(board)
+            return None
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    @staticmethod
+    async def get_all_ciclos(conn: AsyncConnection, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos ciclos (com `raw=True`, dicts no formato da resposta, sem DTO)."""
+        try:
+            ciclos_data = await ciclo_repository.get_all_ciclos(conn, page)
+            return ciclos_data.map(CicloService._map_to_response_row if raw else lambda ciclo: CicloResponseDTO(
+                id=ciclo['id'],
+                nome=ciclo['nome'],
+                versao=ciclo['versao'],
+                projeto_id=ciclo['projeto_id']
+            ))
         except Exception as e:
             print_error_details(e)
             return []
     
     @staticmethod
-    async def update_ciclo(conn: connection, ciclo_id: str, ciclo_data: CicloUpdateDTO) -> Optional[CicloResponseDTO]:
+    async def update_ciclo(conn: AsyncConnection, ciclo_id: str, ciclo_data: CicloUpdateDTO) -> Optional[CicloResponseDTO]:
         """Atualiza um ciclo."""
         try:
-            # Verifica se o ciclo existe
-            existing_ciclo = await ciclo_repository.get_ciclo_by_id(conn, ciclo_id)
-            if not existing_ciclo:
-                return None
+            async with transaction(conn):
+                # Verifica se o ciclo existe
+                existing_ciclo = await ciclo_repository.get_ciclo_by_id(conn, ciclo_id)
+                if not existing_ciclo:
+                    return None
             
-            # Verifica se o novo nome já existe (exceto para o próprio ciclo)
-            if await ciclo_repository.nome_exists(conn, ciclo_data.nome, ciclo_id):
-                raise ValueError("Nome do ciclo já existe")
+                # Atualiza o ciclo (nome de outro ciclo: ValueError vindo do índice único)
+                updated_ciclo = await ciclo_repository.update_ciclo(conn, ciclo_id, ciclo_data)
             
-            # Atualiza o ciclo
-            updated_ciclo = await ciclo_repository.update_ciclo(conn, ciclo_id, ciclo_data)
-            
-            if updated_ciclo:
-                return CicloResponseDTO(
-                    id=updated_ciclo['id'],
-                    nome=updated_ciclo['nome'],
-                    versao=updated_ciclo['versao'],
-                    projeto_id=updated_ciclo['projeto_id']
-                )
-            return None
+                if updated_ciclo:
+                    return CicloResponseDTO(
+                        id=updated_ciclo['id'],
+                        nome=updated_ciclo['nome'],
+                        versao=updated_ciclo['versao'],
+                        projeto_id=updated_ciclo['projeto_id']
+                    )
+                return None
         except Exception as e:
             print_error_details(e)
             raise e
     
     @staticmethod
-    async def delete_ciclo(conn: connection, ciclo_id: str) -> bool:
+    async def delete_ciclo(conn: AsyncConnection, ciclo_id: str) -> bool:
         """Deleta um ciclo."""
         try:
             deleted_ciclo = await ciclo_repository.delete_ciclo(conn, ciclo_id)
             return deleted_ciclo is not None
+        except RegistroEmUsoError:
+            raise
         except Exception as e:
             print_error_details(e)
             return False
     
     @staticmethod
-    async def get_ciclo_by_nome(conn: connection, nome: str) -> Optional[CicloResponseDTO]:
+    async def get_ciclo_by_nome(conn: AsyncConnection, nome: str) -> Optional[CicloResponseDTO]:
         """Obtém um ciclo pelo nome."""
         try:
             ciclo_data = await ciclo_repository.get_ciclo_by_nome(conn, nome)
@@ -124,37 +143,35 @@ class CicloService:
             return None
     
     @staticmethod
-    async def get_ciclos_by_versao(conn: connection, versao: str) -> List[CicloResponseDTO]:
-        """Obtém ciclos por versão."""
+    async def get_ciclos_by_versao(conn: AsyncConnection, versao: str, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos ciclos por versão."""
         try:
-            ciclos_data = await ciclo_repository.get_ciclos_by_versao(conn, versao)
-            return [
-                CicloResponseDTO(
-                    id=ciclo['id'],
-                    nome=ciclo['nome'],
-                    versao=ciclo['versao'],
-                    projeto_id=ciclo['projeto_id']
-                )
-                for ciclo in ciclos_data
-            ]
+            ciclos_data = await ciclo_repository.get_ciclos_by_versao(conn, versao, page)
+            return ciclos_data.map(CicloService._map_to_response_row if raw else lambda ciclo: CicloResponseDTO(
+                id=ciclo['id'],
+                nome=ciclo['nome'],
+                versao=ciclo['versao'],
+                projeto_id=ciclo['projeto_id']
+            ))
         except Exception as e:
             print_error_details(e)
             return []
     
     @staticmethod
-    async def get_ciclos_by_projeto(conn: connection, projeto_id: str) -> List[CicloResponseDTO]:
-        """Obtém ciclos por projeto."""
+    async def get_ciclos_by_projeto(conn: AsyncConnection, projeto_id: str, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos ciclos por projeto."""
         try:
-            ciclos_data = await ciclo_repository.get_ciclos_by_projeto(conn, projeto_id)
-            return [
-                CicloResponseDTO(
-                    id=ciclo['id'],
-                    nome=ciclo['nome'],
-                    versao=ciclo['versao'],
-                    projeto_id=ciclo['projeto_id']
-                )
-                for ciclo in ciclos_data
-            ]
+            ciclos_data = await ciclo_repository.get_ciclos_by_projeto(conn, projeto_id, page)
+            return ciclos_data.map(CicloService._map_to_response_row if raw else lambda ciclo: CicloResponseDTO(
+                id=ciclo['id'],
+                nome=ciclo['nome'],
+                versao=ciclo['versao'],
+                projeto_id=ciclo['projeto_id']
+            ))
         except Exception as e:
             print_error_details(e)
-            return []
\ No newline at end of file
+            return []
+
+    @staticmethod
+    def _map_to_response_row(ciclo: dict) -> dict:
+        return project_row(ciclo, response_fields(CicloResponseDTO))
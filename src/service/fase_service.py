@@ -1,9 +1,17 @@
 from model.fase import Fase, FaseBase, FaseResponse, FaseUpdate
 from repository import fase_repository
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection
+from db.transaction import transaction
+from core.cache import cached, get_cache
+from utils.pagination import Page, PageParams
 from fastapi import HTTPException
 
 
+# Fases (com seus artefatos) mudam raramente: leituras vêm do cache do processo e
+# qualquer escrita limpa o cache inteiro, pois as páginas dependem de todas as fases.
+fases_cache = get_cache("fases")
+
+
 class FaseService:
 
     @staticmethod
@@ -11,32 +19,45 @@ class FaseService:
         db,
         fase: FaseBase,
     ) -> Fase | None:
-        inserted_fase = await fase_repository.create_fase(db, fase)
+        # Inserção, associações e releitura numa única transação; o cache é limpo após o commit
+        async with transaction(db):
+            inserted_fase = await fase_repository.create_fase(db, fase)
+        fases_cache.clear()
 
         return inserted_fase
 
     @staticmethod
-    async def get_all_fases(db: connection) -> list[FaseResponse]:
-        return await fase_repository.get_all_fases(db)
+    async def get_all_fases(db: AsyncConnection, page: PageParams | None = None) -> Page:
+        page = page or PageParams.first()
+        return await cached(
+            fases_cache,
+            ("page", page.limit, page.cursor),
+            lambda: fase_repository.get_all_fases(db, page),
+        )
 
     @staticmethod
     async def get_fase_by_id(
-        db: connection, 
+        db: AsyncConnection, 
         fase_id: str,
     ) -> FaseResponse | None:
-        return await fase_repository.get_fase_by_id(db, fase_id)
+        return await cached(fases_cache, ("id", fase_id), lambda: fase_repository.get_fase_by_id(db, fase_id))
 
     @staticmethod
     async def update_fase(
-        db: connection, 
+        db: AsyncConnection, 
         fase_id: str, 
         fase: FaseUpdate
     ) -> FaseResponse | None:
-        return await fase_repository.update_fase(db, fase_id, fase)
+        async with transaction(db):
+            updated_fase = await fase_repository.update_fase(db, fase_id, fase)
+        fases_cache.clear()
+        return updated_fase
 
     @staticmethod
     async def delete_fase(
-        db: connection, 
+        db: AsyncConnection, 
         fase_id: str
     ) -> FaseResponse | None:
-        return await fase_repository.delete_fase(db, fase_id)
\ No newline at end of file
+        deleted_fase = await fase_repository.delete_fase(db, fase_id)
+        fases_cache.clear()
+        return deleted_fase
\ No newline at end of file
@@ -1,36 +1,69 @@
 from typing import List, Optional
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from repository import projeto_repository
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams
 
 
 class ProjetoService:
 
     @staticmethod
-    async def create_projeto(conn: connection, projeto_data: dict) -> Optional[dict]:
+    async def create_projeto(conn: AsyncConnection, projeto_data: dict) -> Optional[dict]:
         """
         Cria um projeto e associa os responsáveis.
         """
         try:
-            # Verifica nome duplicado
-            if await projeto_repository.projeto_name_exists(conn, projeto_data.get("nome")):
-                raise ValueError("Já existe um projeto com esse nome.")
+            async with transaction(conn):
+                # Cria o projeto e associa os responsáveis numa única transação. Nome
+                # duplicado é detectado pelo índice único no próprio INSERT (ValueError)
+                created = await projeto_repository.create_projeto(conn, projeto_data)
+                if not created:
+                    raise ValueError("Falha ao criar o projeto.")
 
-            # Cria o projeto
-            created = await projeto_repository.create_projeto(conn, projeto_data)
-            if not created:
-                raise ValueError("Falha ao criar o projeto.")
+                # Retorna projeto completo com responsáveis e ciclos
+                projeto_completo = await projeto_repository.get_projeto_by_id(conn, created.get("id"))
+                return projeto_completo
 
-            projeto_id = created.get("id")
+        except Exception as e:
+            print_error_details(e)
+            raise e
 
-            # Associa responsáveis (se houver)
-            for responsavel_id in projeto_data.get("responsaveis_id", []):
-                await projeto_repository.add_usuario_projeto(conn, projeto_id, responsavel_id)
+    # -------------------------------------------------------------
 
-            # Retorna projeto completo com responsáveis e ciclos
-            projeto_completo = await projeto_repository.get_projeto_by_id(conn, projeto_id)
-            return projeto_completo
+    @staticmethod
+    async def get_all_projetos(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+        """
+        Retorna uma página dos projetos com responsáveis e ciclos.
+        """
+        try:
+            return await projeto_repository.get_all_projetos(conn, page)
+        except Exception as e:
+            print_error_details(e)
+            return []
 
+    # -------------------------------------------------------------
+
+    @staticmethod
+    async def get_projetos_summary(conn: AsyncConnection, page: Optional[PageParams] = None) -> Page:
+        """
+        Retorna uma página do resumo dos projetos (ciclos, cards por status e horas),
+        lido da view materializada. `atualizado_em` indica quando foi recalculado.
+        """
+        try:
+            return await projeto_repository.get_projetos_summary(conn, page)
+        except Exception as e:
+            print_error_details(e)
+            raise e
+
+    @staticmethod
+    async def refresh_projetos_summary(conn: AsyncConnection) -> bool:
+        """
+        Recalcula o resumo dos projetos. Retorna False se outra instância já está recalculando.
+        """
+        try:
+            return await projeto_repository.refresh_projetos_summary(conn)
         except Exception as e:
             print_error_details(e)
             raise e
@@ -38,20 +71,20 @@ class ProjetoService:
     # -------------------------------------------------------------
 
     @staticmethod
-    async def get_all_projetos(conn: connection) -> List[dict]:
+    async def get_projeto_validator(conn: AsyncConnection, projeto_id: str) -> Optional[dict]:
         """
-        Retorna todos os projetos com responsáveis e ciclos.
+        Última alteração do projeto/responsáveis e quantidade de responsáveis, sem montar o projeto.
         """
         try:
-            return await projeto_repository.get_all_projetos(conn)
+            return await projeto_repository.get_projeto_validator(conn, projeto_id)
         except Exception as e:
             print_error_details(e)
-            return []
+            raise e
 
     # -------------------------------------------------------------
 
     @staticmethod
-    async def get_projeto_by_id(conn: connection, projeto_id: str) -> Optional[dict]:
+    async def get_projeto_by_id(conn: AsyncConnection, projeto_id: str) -> Optional[dict]:
         """
         Retorna um projeto específico com responsáveis e ciclos.
         """
@@ -67,34 +100,22 @@ class ProjetoService:
     # -------------------------------------------------------------
 
     @staticmethod
-    async def update_projeto(conn: connection, projeto_id: str, projeto_data: dict) -> Optional[dict]:
+    async def update_projeto(conn: AsyncConnection, projeto_id: str, projeto_data: dict) -> Optional[dict]:
         """
         Atualiza os dados de um projeto e reatribui responsáveis (opcionalmente).
         """
         try:
-            # Verifica se nome já existe em outro projeto
-            if await projeto_repository.projeto_name_exists(conn, projeto_data.get("nome"), exclude_id=projeto_id):
-                raise ValueError("Já existe um projeto com esse nome.")
-
-            # Atualiza informações básicas
-            updated = await projeto_repository.update_projeto(conn, projeto_id, projeto_data)
-            if not updated:
-                raise ValueError("Falha ao atualizar o projeto.")
-
-            # Se houver lista de responsáveis, atualiza associações
-            if "responsaveis_id" in projeto_data:
-                # Remove todos os vínculos anteriores
-                projeto_atual = await projeto_repository.get_projeto_by_id(conn, projeto_id)
-                for r in projeto_atual.get("responsaveis_dto", []):
-                    await projeto_repository.remove_usuario_projeto(conn, projeto_id, r.get("id"))
-
-                # Adiciona os novos vínculos
-                for responsavel_id in projeto_data["responsaveis_id"]:
-                    await projeto_repository.add_usuario_projeto(conn, projeto_id, responsavel_id)
-
-            # Retorna o projeto completo atualizado
-            projeto_atualizado = await projeto_repository.get_projeto_by_id(conn, projeto_id)
-            return projeto_atualizado
+            async with transaction(conn):
+                # Atualiza informações básicas e, se houver lista de responsáveis, sincroniza
+                # a equipe (inclui os novos, remove os que saíram) na mesma transação. Nome de
+                # outro projeto é detectado pelo índice único no próprio UPDATE (ValueError)
+                updated = await projeto_repository.update_projeto(conn, projeto_id, projeto_data)
+                if not updated:
+                    raise ValueError("Falha ao atualizar o projeto.")
+
+                # Retorna o projeto completo atualizado
+                projeto_atualizado = await projeto_repository.get_projeto_by_id(conn, projeto_id)
+                return projeto_atualizado
 
         except Exception as e:
             print_error_details(e)
@@ -103,21 +124,17 @@ class ProjetoService:
     # -------------------------------------------------------------
 
     @staticmethod
-    async def delete_projeto(conn: connection, projeto_id: str) -> bool:
+    async def delete_projeto(conn: AsyncConnection, projeto_id: str) -> bool:
         """
         Deleta um projeto e seus vínculos com usuários.
         """
         try:
-            # Remove vínculos de usuários primeiro
-            projeto = await projeto_repository.get_projeto_by_id(conn, projeto_id)
-            if projeto and projeto.get("responsaveis_dto"):
-                for r in projeto["responsaveis_dto"]:
-                    await projeto_repository.remove_usuario_projeto(conn, projeto_id, r["id"])
-
-            # Deleta o projeto
+            # Os vínculos com usuários são removidos pelo ON DELETE CASCADE; os ciclos, não
             deleted = await projeto_repository.delete_projeto(conn, projeto_id)
             return deleted is not None
 
+        except RegistroEmUsoError:
+            raise
         except Exception as e:
             print_error_details(e)
             return False
@@ -1,43 +1,45 @@
 from datetime import datetime
 from typing import Optional, List
-from psycopg2.extensions import connection
+from psycopg import AsyncConnection
+from db.errors import RegistroEmUsoError
+from db.transaction import transaction
 from model.usuario import Usuario
 from model.dto.usuario_dto import UsuarioCreateDTO, UsuarioResponseDTO
 # Hash removido - usando senhas em texto plano
 from repository import usuario_repository
 from utils.functions import print_error_details
+from utils.pagination import Page, PageParams
+from utils.serialization import project_row, response_fields
 
 class UsuarioService:
     
     @staticmethod
-    async def create_user(conn: connection, usuario_data: UsuarioCreateDTO) -> UsuarioResponseDTO:
+    async def create_user(conn: AsyncConnection, usuario_data: UsuarioCreateDTO) -> UsuarioResponseDTO:
         """Cria um novo usuário."""
         try:
-            # Verifica se o email já existe
-            if await usuario_repository.email_exists(conn, usuario_data.email):
-                raise ValueError("Email já cadastrado")
+            async with transaction(conn):
+                # Email duplicado é detectado pelo índice único no próprio INSERT (ValueError)
+                # Senha fixa para todos os usuários
+                senha = "123"
             
-            # Senha fixa para todos os usuários
-            senha = "123"
+                # Cria o usuário no banco
+                created_user = await usuario_repository.create_usuario(conn, usuario_data, senha)
             
-            # Cria o usuário no banco
-            created_user = await usuario_repository.create_usuario(conn, usuario_data, senha)
+                if not created_user:
+                    raise ValueError("Erro ao criar usuário")
             
-            if not created_user:
-                raise ValueError("Erro ao criar usuário")
-            
-            # Retorna resposta sem a senha
-            return UsuarioResponseDTO(
-                id=created_user['id'],
-                nome=created_user['nome'],
-                email=created_user['email']
-            )
+                # Retorna resposta sem a senha
+                return UsuarioResponseDTO(
+                    id=created_user['id'],
+                    nome=created_user['nome'],
+                    email=created_user['email']
+                )
         except Exception as e:
             print_error_details(e)
             raise e
     
     @staticmethod
-    async def authenticate_user(conn: connection, email: str, senha: str) -> Optional[Usuario]:
+    async def authenticate_user(conn: AsyncConnection, email: str, senha: str) -> Optional[Usuario]:
         """Autentica um usuário."""
         try:
             user_data = await usuario_repository.get_usuario_for_authentication(conn, email)
@@ -56,7 +58,7 @@ class UsuarioService:
             return None
     
     @staticmethod
-    async def get_user_by_id(conn: connection, user_id: str) -> Optional[UsuarioResponseDTO]:
+    async def get_user_by_id(conn: AsyncConnection, user_id: str) -> Optional[UsuarioResponseDTO]:
         """Obtém um usuário pelo ID."""
         try:
             user_data = await usuario_repository.get_usuario_by_id(conn, user_id)
@@ -72,64 +74,63 @@ class UsuarioService:
             return None
     
     @staticmethod
-    async def get_all_users(conn: connection) -> List[UsuarioResponseDTO]:
-        """Obtém todos os usuários."""
+    async def get_all_users(conn: AsyncConnection, page: Optional[PageParams] = None, raw: bool = False) -> Page:
+        """Obtém uma página dos usuários (com `raw=True`, dicts no formato da resposta, sem DTO)."""
         try:
-            users_data = await usuario_repository.get_all_usuarios(conn)
-            return [
-                UsuarioResponseDTO(
-                    id=user['id'],
-                    nome=user['nome'],
-                    email=user['email']
-                )
-                for user in users_data
-            ]
+            users_data = await usuario_repository.get_all_usuarios(conn, page)
+            if raw:
+                return users_data.map(lambda user: project_row(user, response_fields(UsuarioResponseDTO)))
+            return users_data.map(lambda user: UsuarioResponseDTO(
+                id=user['id'],
+                nome=user['nome'],
+                email=user['email']
+            ))
         except Exception as e:
             print_error_details(e)
             return []
     
     @staticmethod
-    async def update_user(conn: connection, user_id: str, usuario_data: UsuarioCreateDTO) -> Optional[UsuarioResponseDTO]:
+    async def update_user(conn: AsyncConnection, user_id: str, usuario_data: UsuarioCreateDTO) -> Optional[UsuarioResponseDTO]:
         """Atualiza um usuário."""
         try:
-            # Verifica se o usuário existe
-            existing_user = await usuario_repository.get_usuario_by_id(conn, user_id)
-            if not existing_user:
-                return None
+            async with transaction(conn):
+                # Verifica se o usuário existe
+                existing_user = await usuario_repository.get_usuario_by_id(conn, user_id)
+                if not existing_user:
+                    return None
             
-            # Verifica se o novo email já existe (exceto para o próprio usuário)
-            if await usuario_repository.email_exists(conn, usuario_data.email, user_id):
-                raise ValueError("Email já cadastrado")
+                # Email de outro usuário é detectado pelo índice único no próprio UPDATE (ValueError)
+                # Senha fixa para todos os usuários
+                senha = "123"
             
-            # Senha fixa para todos os usuários
-            senha = "123"
+                # Atualiza o usuário
+                updated_user = await usuario_repository.update_usuario(conn, user_id, usuario_data, senha)
             
-            # Atualiza o usuário
-            updated_user = await usuario_repository.update_usuario(conn, user_id, usuario_data, senha)
-            
-            if updated_user:
-                return UsuarioResponseDTO(
-                    id=updated_user['id'],
-                    nome=updated_user['nome'],
-                    email=updated_user['email']
-                )
-            return None
+                if updated_user:
+                    return UsuarioResponseDTO(
+                        id=updated_user['id'],
+                        nome=updated_user['nome'],
+                        email=updated_user['email']
+                    )
+                return None
         except Exception as e:
             print_error_details(e)
             raise e
     
     @staticmethod
-    async def delete_user(conn: connection, user_id: str) -> bool:
+    async def delete_user(conn: AsyncConnection, user_id: str) -> bool:
         """Deleta um usuário."""
         try:
             deleted_user = await usuario_repository.delete_usuario(conn, user_id)
             return deleted_user is not None
+        except RegistroEmUsoError:
+            raise
         except Exception as e:
             print_error_details(e)
             return False
     
     @staticmethod
-    async def get_user_by_email(conn: connection, email: str) -> Optional[UsuarioResponseDTO]:
+    async def get_user_by_email(conn: AsyncConnection, email: str) -> Optional[UsuarioResponseDTO]:
         """Obtém um usuário pelo email."""
         try:
             user_data = await usuario_repository.get_usuario_by_email(conn, email)
@@ -73,9 +73,9 @@ def test_get_all_artefatos_vazio(mock_get_all, mock_db):
 
     response = client.get("/artefatos/")
 
-    data = response.json()
-    assert response.status_code == 404
-    assert "Nenhum artefato encontrado" in response.json()["detail"]
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "x-next-cursor" not in response.headers
 
 
 @patch("routes.artefatos_router.get_db", new_callable=AsyncMock)
@@ -144,3 +144,33 @@ def test_delete_artefato(mock_delete, mock_db):
     assert response.status_code == 204
     assert response.text == ''
     mock_delete.assert_called_once()
+
+
+@patch("service.artefato_service.create_artefato", new_callable=AsyncMock)
+def test_create_artefato_nome_duplicado(mock_create):
+    mock_create.side_effect = ValueError("Já existe um artefato com o nome Artefato 0.")
+
+    response = client.post("/artefatos/", json={"nome": "Artefato 0"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Já existe um artefato com o nome Artefato 0."
+
+
+@patch("service.artefato_service.update_artefato", new_callable=AsyncMock)
+def test_update_artefato_nao_encontrado(mock_update):
+    mock_update.return_value = None
+
+    response = client.put(f"/artefatos/{uuid.uuid4()}", json={"nome": "Qualquer"})
+
+    assert response.status_code == 404
+
+
+@patch("service.artefato_service.delete_artefato", new_callable=AsyncMock)
+def test_delete_artefato_com_cards_responde_409(mock_delete):
+    from db.errors import RegistroEmUsoError
+
+    mock_delete.side_effect = RegistroEmUsoError("O artefato possui cards e não pode ser removido.")
+
+    response = client.delete(f"/artefatos/{uuid.uuid4()}")
+
+    assert response.status_code == 409
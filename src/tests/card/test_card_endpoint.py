@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import patch, ANY
+import json
 import uuid
+from datetime import datetime, timezone
 import os
 import sys
 
@@ -11,9 +13,13 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 with patch('db.connection.Connection'):
     from fastapi.testclient import TestClient
     from main import app
-    from model.dto.card_dto import CardCreateDTO, CardUpdateDTO, CardResponseDTO
+    from model.dto.card_dto import (
+        CardCreateDTO, CardUpdateDTO, CardResponseDTO, CardBulkResponseDTO, CardBulkItemResultDTO,
+        CardTemposDTO, CardTransicaoDTO, CardFluxoRelatorioDTO, CardStatsDTO, CardStatsGrupoDTO,
+    )
     from model.card_status import CardStatus
-    from service.card_service import CardService
+    from service.card_service import CardService, CardVersionConflictError
+    from utils.pagination import Page, encode_cursor
 
 client = TestClient(app)
 
@@ -91,6 +97,36 @@ def test_criar_card_erro_validacao(mock_create_card, card_create):
     assert response.status_code == 400
     assert "Ciclo não encontrado" in response.json()["detail"]
 
+# Testes de Criação em Lote
+@patch("service.card_service.CardService.bulk_create_cards")
+def test_criar_cards_em_lote_ndjson(mock_bulk_create_cards):
+    cards = cards_fake(2)
+    for card in cards:
+        del card["id"]
+    mock_bulk_create_cards.return_value = CardBulkResponseDTO(
+        criados=1,
+        rejeitados=1,
+        resultados=[
+            CardBulkItemResultDTO(index=0, status="criado", id=str(uuid.uuid4())),
+            CardBulkItemResultDTO(index=1, status="erro", erros=["ciclo_id: não encontrado"]),
+        ],
+    )
+
+    response = client.post(
+        "/card/bulk",
+        content="\n".join(json.dumps(card) for card in cards),
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 207
+    assert response.json()["criados"] == 1
+    assert mock_bulk_create_cards.call_args[0][1] == cards
+
+def test_criar_cards_em_lote_corpo_invalido():
+    response = client.post("/card/bulk", json={"nao": "é uma lista"})
+
+    assert response.status_code == 400
+
 # Testes de Listar Cards
 @patch("service.card_service.CardService.get_all_cards")
 def test_listar_cards(mock_get_all_cards):
@@ -128,6 +164,178 @@ def test_listar_cards_vazio(mock_get_all_cards):
     assert response.status_code == 200
     assert len(data) == 0
 
+# Testes de Paginação
+@patch("service.card_service.CardService.get_all_cards")
+def test_listar_cards_paginado(mock_get_all_cards):
+    cards_disponiveis = cards_fake(2)
+    next_cursor = encode_cursor(["2025-10-29T16:00:28+00:00", cards_disponiveis[-1]["id"]])
+    mock_get_all_cards.return_value = Page(
+        [CardResponseDTO(**card) for card in cards_disponiveis],
+        next_cursor=next_cursor,
+    )
+
+    response = client.get("/card/?limit=2")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["X-Next-Cursor"] == next_cursor
+    assert 'rel="next"' in response.headers["Link"]
+    assert "X-Prev-Cursor" not in response.headers
+    assert mock_get_all_cards.call_args[0][1].limit == 2
+
+@patch("service.card_service.CardService.get_all_cards")
+def test_listar_cards_cursor_invalido(mock_get_all_cards):
+    response = client.get("/card/?cursor=invalido")
+
+    assert response.status_code == 400
+    mock_get_all_cards.assert_not_called()
+
+# Testes de Filtros Combinados
+@patch("service.card_service.CardService.get_cards_filtered")
+def test_listar_cards_filtros_combinados(mock_get_cards_filtered):
+    cards_disponiveis = cards_fake(1)
+    mock_get_cards_filtered.return_value = [CardResponseDTO(**card) for card in cards_disponiveis]
+    ciclo_id = cards_disponiveis[0]["ciclo_id"]
+    fase_id = cards_disponiveis[0]["fase_id"]
+
+    response = client.get(
+        f"/card/?status_filtro={CardStatus.A_FAZER.value}&ciclo_id={ciclo_id}&fase_id={fase_id}&criado_de=2025-01-01T00:00:00"
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    filtro = mock_get_cards_filtered.call_args[0][1]
+    assert filtro.ativos() == {"status", "ciclo_id", "fase_id", "criado_de"}
+    assert str(filtro.fase_id) == fase_id
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_listar_cards_mesmo_formato_com_qualquer_filtro(mocker, fast_path):
+    from core.config import settings
+
+    linha = {**cards_fake(1)[0], "projeto_id": None, "version": 1}
+    ciclo_id = linha["ciclo_id"]
+    for nome in ("get_all_cards", "get_cards_by_ciclo", "get_cards_filtered"):
+        mocker.patch(f"repository.card_repository.{nome}", return_value=Page([{**linha, "projeto_id": str(uuid.uuid4())}]))
+    # Card de ciclo órfão: a subconsulta do projeto devolve NULL, mas o campo continua lá
+    mocker.patch("repository.card_repository.get_cards_by_status", return_value=Page([linha]))
+
+    urls = [
+        "/card/",
+        f"/card/?ciclo_id={ciclo_id}",
+        f"/card/?ciclo_id={ciclo_id}&fase_id={linha['fase_id']}",
+        f"/card/?status_filtro={CardStatus.A_FAZER.value}",
+    ]
+    with patch.object(settings, "JSON_FAST_PATH", fast_path):
+        formatos = [set(client.get(url).json()[0]) for url in urls]
+
+    assert all(formato == formatos[0] for formato in formatos)
+    assert "projeto_id" in formatos[0]
+
+@pytest.mark.parametrize("url", ["/card/?ciclo_id=abc", "/card/?fase_id=1&status_filtro=a_fazer", "/card/stats?projeto_id=abc"])
+def test_filtro_de_id_invalido_responde_422_sem_consultar(mocker, url):
+    repositorio = mocker.patch("repository.card_repository.build_card_filter")
+
+    response = client.get(url)
+
+    assert response.status_code == 422
+    repositorio.assert_not_called()
+
+# Testes de Exportação
+@patch("service.card_service.CardService.export_cards")
+def test_exportar_cards_ndjson(mock_export_cards):
+    cards_disponiveis = cards_fake(2)
+
+    async def fake_export(conn, formato, filtro):
+        for card in cards_disponiveis:
+            yield (json.dumps(card) + "\n").encode()
+
+    mock_export_cards.side_effect = fake_export
+
+    response = client.get("/card/export?format=ndjson")
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [card["id"] for card in linhas] == [card["id"] for card in cards_disponiveis]
+
+
+@patch("service.card_service.CardService.export_cards")
+def test_exportar_cards_filtro_invalido_responde_422_antes_do_streaming(mock_export_cards):
+    response = client.get("/card/export?format=json&ciclo_id=abc")
+
+    assert response.status_code == 422
+    assert "content-disposition" not in response.headers
+    mock_export_cards.assert_not_called()
+
+def test_exportar_cards_usa_o_codificador_das_listagens(mocker):
+    import asyncio
+    from utils.serialization import dumps
+
+    linhas = [
+        {"id": uuid.uuid4(), "status": "a_fazer", "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)},
+        {"id": uuid.uuid4(), "status": "concluido", "created_at": datetime(2025, 1, 3, tzinfo=timezone.utc)},
+    ]
+
+    async def stream_cards(conn, batch_size, filtro):
+        yield linhas
+
+    mocker.patch("repository.card_repository.stream_cards", side_effect=stream_cards)
+
+    async def exportar(formato):
+        return b"".join([chunk async for chunk in CardService.export_cards(None, formato)])
+
+    assert asyncio.run(exportar("ndjson")) == b"".join(dumps(linha) + b"\n" for linha in linhas)
+    exportado = json.loads(asyncio.run(exportar("json")))
+    assert exportado == json.loads(dumps(linhas))
+
+@patch("service.card_service.CardService.get_all_cards")
+def test_listar_cards_compressao(mock_get_all_cards):
+    mock_get_all_cards.return_value = Page(items=cards_fake(30))
+    comprimido = client.get("/card/", headers={"Accept-Encoding": "gzip"})
+
+    mock_get_all_cards.return_value = Page(items=cards_fake(1))
+    pequeno = client.get("/card/", headers={"Accept-Encoding": "gzip"})
+    sem_suporte = client.get("/card/", headers={"Accept-Encoding": "identity"})
+
+    assert comprimido.headers["content-encoding"] == "gzip"
+    assert len(comprimido.json()) == 30
+    # Abaixo de COMPRESSION_MIN_SIZE ou sem gzip no Accept-Encoding vai sem compressão
+    assert "content-encoding" not in pequeno.headers
+    assert "content-encoding" not in sem_suporte.headers
+
+@patch("service.card_service.CardService.get_all_cards")
+def test_listar_cards_json_fast_path(mock_get_all_cards):
+    from core.config import settings
+
+    cards = cards_fake(3)
+    mock_get_all_cards.return_value = Page([CardService._map_to_response_row(card) for card in cards], next_cursor="abc")
+
+    with patch.object(settings, "JSON_FAST_PATH", True):
+        response = client.get("/card/")
+
+    assert response.status_code == 200
+    assert response.headers["x-next-cursor"] == "abc"
+    assert [card["id"] for card in response.json()] == [card["id"] for card in cards]
+    assert mock_get_all_cards.call_args.kwargs["raw"] is True
+
+def test_map_to_response_row_igual_ao_dto():
+    from datetime import timedelta
+    from utils.serialization import dumps
+
+    card = cards_fake(1)[0]
+    card.update(
+        version=2,
+        started=datetime(2025, 1, 2, 8, 30, tzinfo=timezone.utc),
+        progress=datetime(2025, 1, 3, tzinfo=timezone(timedelta(hours=-3))),
+        updated_at=datetime(2025, 1, 3, tzinfo=timezone.utc),
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+    # O caminho rápido gera o mesmo JSON que o DTO (sem os campos exclude, como updated_at)
+    for linha in (card, {**card, "projeto_id": str(uuid.uuid4())}):
+        esperado = CardService._map_to_response_dto(linha).model_dump(mode="json")
+        assert json.loads(dumps(CardService._map_to_response_row(linha))) == esperado
+
 # Testes de Listar Cards por Status
 @patch("service.card_service.CardService.get_cards_by_status")
 def test_listar_cards_por_status(mock_get_cards_by_status):
@@ -222,6 +430,131 @@ def test_obter_card_por_id_nao_encontrado(mock_get_card_by_id):
     assert response.status_code == 404
     assert "Card não encontrado" in response.json()["detail"]
 
+@patch("service.card_service.CardService.get_card_by_id")
+@patch("service.card_service.CardService.get_card_validator")
+def test_obter_card_nao_modificado(mock_get_card_validator, mock_get_card_by_id):
+    card_id = str(uuid.uuid4())
+    mock_get_card_validator.return_value = {"version": 3, "updated_at": datetime(2025, 1, 2, tzinfo=timezone.utc)}
+
+    response = client.get(f"/card/{card_id}", headers={"If-None-Match": '"3"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == '"3"'
+    mock_get_card_by_id.assert_not_called()
+
+@patch("service.card_service.CardService.get_all_cards")
+def test_listar_cards_nao_modificado(mock_get_all_cards):
+    mock_get_all_cards.return_value = Page(items=cards_fake(2))
+
+    primeira = client.get("/card/")
+    etag = primeira.headers["etag"]
+    response = client.get("/card/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+# Testes de Estatísticas
+@patch("service.card_service.CardService.get_card_stats")
+def test_estatisticas_dos_cards(mock_get_card_stats):
+    ciclo_id = str(uuid.uuid4())
+    mock_get_card_stats.return_value = CardStatsDTO(
+        total=CardStatsGrupoDTO(cards=3, horas=12.5),
+        por_status=[CardStatsGrupoDTO(chave="a_fazer", cards=2, horas=8.0), CardStatsGrupoDTO(chave="concluido", cards=1, horas=4.5)],
+        por_responsavel=[CardStatsGrupoDTO(chave=str(uuid.uuid4()), cards=3, horas=12.5)],
+        por_fase=[CardStatsGrupoDTO(chave=str(uuid.uuid4()), cards=3, horas=12.5)],
+    )
+
+    response = client.get("/card/stats", params={"ciclo_id": ciclo_id})
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["total"] == {"chave": None, "cards": 3, "horas": 12.5}
+    assert [grupo["chave"] for grupo in data["por_status"]] == ["a_fazer", "concluido"]
+    filtro = mock_get_card_stats.call_args.args[1]
+    assert filtro.ativos() == {"ciclo_id"}
+
+@patch("service.card_service.CardService.get_card_stats")
+def test_estatisticas_dos_cards_por_projeto(mock_get_card_stats):
+    projeto_id = str(uuid.uuid4())
+    mock_get_card_stats.return_value = CardStatsDTO(
+        total=CardStatsGrupoDTO(cards=0, horas=0), por_status=[], por_responsavel=[], por_fase=[],
+    )
+
+    response = client.get(f"/card/stats/projeto/{projeto_id}")
+
+    assert response.status_code == 200
+    assert str(mock_get_card_stats.call_args.args[1].projeto_id) == projeto_id
+
+@pytest.mark.parametrize("url", ["/card/stats/ciclo/abc", "/card/stats/projeto/abc"])
+@patch("service.card_service.CardService.get_card_stats")
+def test_estatisticas_com_id_invalido_responde_422(mock_get_card_stats, url):
+    response = client.get(url)
+
+    assert response.status_code == 422
+    mock_get_card_stats.assert_not_called()
+
+@patch("service.card_service.CardService.get_card_stats")
+def test_estatisticas_sem_conexao_livre_responde_503(mock_get_card_stats):
+    from psycopg_pool import PoolTimeout
+
+    mock_get_card_stats.side_effect = PoolTimeout("pool esgotado")
+
+    response = client.get(f"/card/stats/ciclo/{uuid.uuid4()}")
+
+    assert response.status_code == 503
+
+# Testes de Tempo por Status / Relatório de Fluxo
+@patch("service.card_service.CardService.get_card_tempos")
+def test_obter_tempos_do_card(mock_get_card_tempos):
+    card_id = str(uuid.uuid4())
+    mock_get_card_tempos.return_value = CardTemposDTO(
+        card_id=card_id,
+        status=CardStatus.CONCLUIDO,
+        status_desde="2025-01-03T00:00:00Z",
+        iniciado_em="2025-01-02T00:00:00Z",
+        concluido_em="2025-01-03T00:00:00Z",
+        horas_por_status={"a_fazer": 24.0, "em_andamento": 24.0, "concluido": 1.0},
+        cycle_time_horas=24.0,
+        lead_time_horas=48.0,
+        transicoes=[
+            CardTransicaoDTO(status_novo=CardStatus.A_FAZER, alterado_em="2025-01-01T00:00:00Z"),
+            CardTransicaoDTO(status_anterior=CardStatus.A_FAZER, status_novo=CardStatus.EM_ANDAMENTO, alterado_em="2025-01-02T00:00:00Z", horas_no_anterior=24.0),
+        ],
+    )
+
+    response = client.get(f"/card/{card_id}/tempos")
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["cycle_time_horas"] == 24.0
+    assert data["horas_por_status"]["em_andamento"] == 24.0
+    assert len(data["transicoes"]) == 2
+    mock_get_card_tempos.assert_called_once_with(ANY, card_id)
+
+@patch("service.card_service.CardService.get_card_tempos")
+def test_obter_tempos_do_card_nao_encontrado(mock_get_card_tempos):
+    mock_get_card_tempos.return_value = None
+
+    response = client.get(f"/card/{uuid.uuid4()}/tempos")
+
+    assert response.status_code == 404
+
+@patch("service.card_service.CardService.get_fluxo_report")
+def test_relatorio_de_fluxo(mock_get_fluxo_report):
+    ciclo_id = str(uuid.uuid4())
+    mock_get_fluxo_report.return_value = CardFluxoRelatorioDTO(
+        cards_concluidos=3, cycle_time_medio_horas=10.0, cycle_time_p50_horas=8.0, cycle_time_p85_horas=15.0,
+        lead_time_medio_horas=30.0, lead_time_p50_horas=28.0, lead_time_p85_horas=40.0,
+    )
+
+    response = client.get("/card/relatorio/fluxo", params={"ciclo_id": ciclo_id})
+
+    assert response.status_code == 200
+    assert response.json()["cards_concluidos"] == 3
+    mock_get_fluxo_report.assert_called_once_with(ANY, ciclo_id, None, None, None)
+
 # Testes de Atualizar Card
 @patch("service.card_service.CardService.update_card")
 def test_atualizar_card(mock_update_card, card_update):
@@ -274,6 +607,21 @@ def test_atualizar_card_erro_validacao(mock_update_card, card_update):
     assert response.status_code == 400
     assert "Fase não encontrada" in response.json()["detail"]
 
+@patch("service.card_service.CardService.update_card")
+def test_atualizar_card_conflito_de_versao(mock_update_card, card_update):
+    mock_update_card.side_effect = CardVersionConflictError(5)
+    card_id = str(uuid.uuid4())
+
+    response = client.patch(
+        f"/card/{card_id}",
+        json=card_update.model_dump(exclude_unset=True),
+        headers={"If-Match": '"4"'},
+    )
+
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"5"'
+    assert mock_update_card.call_args[0][3] == 4
+
 # Testes de Deletar Card
 @patch("service.card_service.CardService.delete_card")
 def test_deletar_card(mock_delete_card):
@@ -391,3 +739,26 @@ def test_obter_card_por_id_service(mocker):
     assert result is not None
     assert result.id == card_disponivel["id"]
     assert result.descricao == card_disponivel["descricao"]
+
+
+def test_alterar_status_devolve_a_conexao_ao_pool(mocker):
+    # Regressão: a rota fechava a conexão emprestada em vez de devolvê-la ao pool
+    conn = mocker.AsyncMock()
+    pool = mocker.MagicMock()
+    pool.get_conn = mocker.AsyncMock(return_value=conn)
+    pool.release_conn = mocker.AsyncMock()
+    mocker.patch("db.database._connection", pool)
+
+    async def update_card_status(db, card_id, status):
+        await db.connection()
+        return {"id": card_id, "status": status}
+
+    mocker.patch("repository.card_repository.update_card_status", side_effect=update_card_status)
+    card_id = str(uuid.uuid4())
+
+    response = client.patch(f"/card/alterarStatus/{card_id}", json={"status": "em_andamento", "tempo_planejado_horas": 2})
+
+    assert response.status_code == 200
+    pool.get_conn.assert_awaited_once()
+    pool.release_conn.assert_awaited_once_with(conn)
+    conn.close.assert_not_awaited()
@@ -0,0 +1,113 @@
+import asyncio
+
+from psycopg import AsyncConnection
+
+from db.connection import _configure_conn
+from model.dto.card_dto import CardFiltroDTO
+from repository import card_repository
+
+
+def test_conflito_de_versao_informa_a_versao_commitada_durante_a_espera(pg_conninfo, card_de_teste):
+    async def cenario():
+        async with await AsyncConnection.connect(pg_conninfo) as outro, await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            # Outro escritor segura o lock da linha e leva o card da versão 1 para a 2
+            await outro.execute("UPDATE card SET version = version + 1 WHERE id = %s", (card_de_teste,))
+
+            # PATCH com If-Match "1": fica esperando o lock
+            patch = asyncio.create_task(
+                card_repository.update_card(conn, card_de_teste, {"descricao": "patch"}, expected_version=1)
+            )
+            await asyncio.sleep(0.3)
+            assert not patch.done()
+            await outro.commit()
+
+            return await patch
+
+    atualizado, versao_atual = asyncio.run(cenario())
+
+    assert atualizado is None
+    assert versao_atual == 2
+
+
+def test_update_card_inexistente_sem_versao(pg_conninfo):
+    async def cenario():
+        async with await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            return await card_repository.update_card(
+                conn, "00000000-0000-0000-0000-000000000000", {"descricao": "x"}, expected_version=1
+            )
+
+    assert asyncio.run(cenario()) == (None, None)
+
+
+def test_iniciado_em_marca_a_saida_de_a_fazer_mesmo_sem_passar_por_em_andamento(pg_conninfo, card_de_teste):
+    async def cenario():
+        async with await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            await card_repository.update_card_status(conn, card_de_teste, "testes_validacao")
+            await card_repository.update_card_status(conn, card_de_teste, "concluido")
+            cursor = await conn.execute(
+                "SELECT iniciado_em, concluido_em FROM card WHERE id = %s", (card_de_teste,)
+            )
+            marcos = await cursor.fetchone()
+            cursor = await conn.execute(
+                "SELECT alterado_em FROM card_status_transicao WHERE card_id = %s AND status_novo = 'testes_validacao'",
+                (card_de_teste,),
+            )
+            saida = (await cursor.fetchone())[0]
+            await conn.commit()
+            return marcos, saida
+
+    (iniciado_em, concluido_em), saida_de_a_fazer = asyncio.run(cenario())
+
+    # Mesma regra do INSERT: o início é a primeira saída de a_fazer, mantido na conclusão
+    assert iniciado_em == saida_de_a_fazer
+    assert concluido_em is not None and concluido_em >= iniciado_em
+
+
+def test_listagens_trazem_o_projeto_do_ciclo_com_qualquer_filtro(pg_conninfo, card_de_teste):
+    async def cenario():
+        async with await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            card = await card_repository.get_card_by_id(conn, card_de_teste)
+            cursor = await conn.execute("SELECT projeto_id::text FROM ciclo WHERE id = %s", (card["ciclo_id"],))
+            projeto_id = (await cursor.fetchone())[0]
+            filtro = CardFiltroDTO(ciclo_id=card["ciclo_id"], fase_id=card["fase_id"])
+            paginas = [
+                await card_repository.get_cards_by_ciclo(conn, card["ciclo_id"]),
+                await card_repository.get_cards_filtered(conn, filtro),
+                await card_repository.get_cards_by_status(conn, "a_fazer"),
+                await card_repository.get_all_cards(conn),
+            ]
+            await conn.commit()
+            return projeto_id, paginas
+
+    projeto_id, paginas = asyncio.run(cenario())
+
+    for pagina in paginas:
+        assert all("projeto_id" in linha for linha in pagina)
+    # O card de teste é o mais recente: aparece na primeira página das listagens
+    assert [linha["projeto_id"] for linha in paginas[0] if linha["id"] == card_de_teste] == [projeto_id]
+    assert [linha["projeto_id"] for linha in paginas[1] if linha["id"] == card_de_teste] == [projeto_id]
+
+
+def test_patch_vazio_nao_muda_a_versao(pg_conninfo, card_de_teste):
+    async def cenario():
+        async with await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            vazio = await card_repository.update_card(conn, card_de_teste, {}, expected_version=1)
+            so_campos_ignorados = await card_repository.update_card(conn, card_de_teste, {"id": "x"})
+            versao_antiga = await card_repository.update_card(conn, card_de_teste, {}, expected_version=7)
+            cursor = await conn.execute("SELECT version, updated_at = created_at FROM card WHERE id = %s", (card_de_teste,))
+            atual = await cursor.fetchone()
+            await conn.commit()
+            return vazio, so_campos_ignorados, versao_antiga, atual
+
+    (card, versao), (_, versao_ignorados), conflito, (versao_no_banco, intocado) = asyncio.run(cenario())
+
+    assert card["id"] == card_de_teste and versao == 1
+    assert versao_ignorados == 1
+    # If-Match desatualizado continua sendo um conflito, mesmo sem campos
+    assert conflito == (None, 1)
+    assert versao_no_banco == 1 and intocado
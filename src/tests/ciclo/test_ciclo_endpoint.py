@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 with patch('db.connection.Connection'):
     from fastapi.testclient import TestClient
     from main import app
-    from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO, CicloResponseDTO
+    from model.dto.ciclo_dto import CicloCreateDTO, CicloUpdateDTO, CicloResponseDTO, CicloBoardDTO
     from service.ciclo_service import CicloService
 
 client = TestClient(app)
@@ -256,6 +256,49 @@ def test_obter_ciclo_por_id_nao_encontrado(mock_get_ciclo_by_id):
     assert response.status_code == 404
     assert "Ciclo não encontrado" in response.json()["detail"]
 
+# Testes do Quadro do Ciclo
+@patch("service.ciclo_service.CicloService.get_ciclo_board")
+def test_obter_quadro_do_ciclo(mock_get_ciclo_board):
+    ciclo_id = str(uuid.uuid4())
+    fase_id = str(uuid.uuid4())
+    card = {
+        "id": str(uuid.uuid4()), "status": "em_andamento", "tempo_planejado_horas": 3.0,
+        "link": None, "descricao": "Card", "artefato_id": str(uuid.uuid4()),
+        "responsavel_id": str(uuid.uuid4()), "version": 2, "status_desde": "2025-01-01T00:00:00+00:00",
+    }
+    mock_get_ciclo_board.return_value = CicloBoardDTO.model_validate({
+        "ciclo": {"id": ciclo_id, "nome": "Ciclo 1", "versao": "1.0", "projeto_id": str(uuid.uuid4())},
+        "total_cards": 1,
+        "total_horas": 3.0,
+        "fases": [{
+            "id": fase_id, "nome": "Desenvolvimento", "descritivo": None, "ordem": 1,
+            "artefatos": [{"id": card["artefato_id"], "nome": "Código"}],
+            "total_cards": 1, "total_horas": 3.0,
+            "status": [
+                {"status": "a_fazer", "total": 0, "horas": 0, "cards": []},
+                {"status": "em_andamento", "total": 1, "horas": 3.0, "cards": [card]},
+            ],
+        }],
+    })
+
+    response = client.get(f"/ciclos/{ciclo_id}/board")
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["ciclo"]["id"] == ciclo_id
+    assert data["fases"][0]["status"][1]["cards"][0]["id"] == card["id"]
+    assert data["fases"][0]["total_horas"] == 3.0
+    mock_get_ciclo_board.assert_called_once()
+
+@patch("service.ciclo_service.CicloService.get_ciclo_board")
+def test_obter_quadro_do_ciclo_nao_encontrado(mock_get_ciclo_board):
+    mock_get_ciclo_board.return_value = None
+
+    response = client.get(f"/ciclos/{uuid.uuid4()}/board")
+
+    assert response.status_code == 404
+    assert "Ciclo não encontrado" in response.json()["detail"]
+
 # Testes de Atualizar Ciclo
 @patch("service.ciclo_service.CicloService.update_ciclo")
 def test_atualizar_ciclo(mock_update_ciclo, ciclo_update):
@@ -325,6 +368,17 @@ def test_deletar_ciclo_nao_encontrado(mock_delete_ciclo):
     assert response.status_code == 404
     assert "Ciclo não encontrado" in response.json()["detail"]
 
+@patch("service.ciclo_service.CicloService.delete_ciclo")
+def test_deletar_ciclo_com_cards_responde_409(mock_delete_ciclo):
+    from db.errors import RegistroEmUsoError
+
+    mock_delete_ciclo.side_effect = RegistroEmUsoError("O ciclo possui cards e não pode ser removido.")
+
+    response = client.delete(f"/ciclos/{uuid.uuid4()}")
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "O ciclo possui cards e não pode ser removido."
+
 # Testes de Serviço (Unit tests)
 def test_criar_ciclo_sucesso_service(mocker, ciclo_create):
     fake_id = str(uuid.uuid4())
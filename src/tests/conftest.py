@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+# |=======| TESTES CONTRA UM POSTGRES DE VERDADE |=======|
+# Concorrência, triggers e constraints não dão para simular com mocks. Estes testes usam o
+# banco das variáveis POSTGRES_* (com as migrações aplicadas) e são pulados se ele não
+# estiver acessível.
+@pytest.fixture
+def pg_conninfo():
+    import psycopg
+    from db.connection import make_database_conninfo
+
+    conninfo = make_database_conninfo()
+    try:
+        psycopg.connect(conninfo, connect_timeout=2).close()
+    except psycopg.OperationalError as e:
+        pytest.skip(f"Postgres indisponível: {e}")
+    return conninfo
+
+
+@pytest.fixture
+def card_de_teste(pg_conninfo):
+    """Card novo (a_fazer, versão 1) ligado a registros já existentes; removido no fim do teste."""
+    import psycopg
+
+    with psycopg.connect(pg_conninfo, autocommit=True) as conn:
+        row = conn.execute("""
+            INSERT INTO card (status, tempo_planejado_horas, descricao, ciclo_id, fase_id, artefato_id, responsavel_id)
+            SELECT 'a_fazer', 1, 'card de teste', c.id, f.id, a.id, u.id
+            FROM (SELECT id FROM ciclo LIMIT 1) c, (SELECT id FROM fase LIMIT 1) f,
+                 (SELECT id FROM artefato LIMIT 1) a, (SELECT id FROM usuario LIMIT 1) u
+            RETURNING id::text;
+        """).fetchone()
+        if row is None:
+            pytest.skip("Banco sem ciclo/fase/artefato/usuário para montar um card de teste")
+        try:
+            yield row[0]
+        finally:
+            conn.execute("DELETE FROM card WHERE id = %s", (row[0],))
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from psycopg._preparing import PrepareManager
+from psycopg.pq import TransactionStatus
+
+from core.config import settings
+from db import prepared
+from db.connection import Connection
+
+
+@pytest.fixture
+def pool(mocker):
+    """`Connection` com o pool do psycopg simulado (sem banco, sem watchdog)."""
+    pool = object.__new__(Connection)
+    pool._pool = mocker.AsyncMock()
+    pool._pool.getconn.side_effect = lambda: mocker.AsyncMock()
+    pool._pool.get_stats = mocker.Mock(return_value={})
+    pool._borrowed, pool._released_at = {}, {}
+    pool._reclaimed, pool._long_lived = set(), set()
+    pool._leaks_reported = pool._leaks_reclaimed = 0
+    pool._acquired = pool._timeouts = pool._discarded = 0
+    pool._wait_time_total = pool._wait_time_max = 0.0
+    pool._watchdog = object()
+    return pool
+
+
+@pytest.fixture
+def relogio(mocker):
+    """Relógio monotônico controlado pelo teste: `relogio.avancar(segundos)`."""
+    class Relogio:
+        agora = 1000.0
+
+        def avancar(self, segundos):
+            self.agora += segundos
+
+    relogio = Relogio()
+    mocker.patch("db.connection.time.monotonic", side_effect=lambda: relogio.agora)
+    return relogio
+
+
+# |=======| DETECÇÃO DE VAZAMENTOS |=======|
+def test_conexao_presa_alem_do_limite_e_avisada_uma_vez(pool, relogio, mocker, caplog):
+    mocker.patch.object(settings, "DB_POOL_LEAK_THRESHOLD", 30)
+    mocker.patch.object(settings, "DB_POOL_LEAK_RECLAIM", 0)
+
+    async def cenario():
+        conn = await pool.get_conn()
+        relogio.avancar(10)
+        await pool._check_leaks()
+        assert pool._leaks_reported == 0
+
+        relogio.avancar(25)
+        with caplog.at_level(logging.WARNING):
+            await pool._check_leaks()
+            await pool._check_leaks()
+        return conn
+
+    conn = asyncio.run(cenario())
+
+    assert pool._leaks_reported == 1
+    assert caplog.text.count("sem ser devolvida (possível vazamento)") == 1
+    # A pilha de quem pegou a conexão vai no aviso
+    assert "cenario" in caplog.text
+    stats = pool.stats()
+    assert stats["leaks_reported"] == 1
+    assert stats["leaks_reclaimed"] == 0
+    assert stats["held_max_s"] == 35.0
+    conn.close.assert_not_awaited()
+
+
+def test_conexao_recuperada_e_devolvida_depois_e_ignorada(pool, relogio, mocker, caplog):
+    mocker.patch.object(settings, "DB_POOL_LEAK_THRESHOLD", 30)
+    mocker.patch.object(settings, "DB_POOL_LEAK_RECLAIM", 60)
+
+    async def cenario():
+        conn = await pool.get_conn()
+        relogio.avancar(61)
+        with caplog.at_level(logging.WARNING):
+            await pool._check_leaks()
+            # O código que vazou a conexão finalmente a devolve
+            await pool.release_conn(conn)
+        return conn
+
+    conn = asyncio.run(cenario())
+
+    conn.close.assert_awaited_once()
+    pool._pool.putconn.assert_awaited_once_with(conn)
+    assert pool.stats()["leaks_reclaimed"] == 1
+    assert pool._borrowed == {}
+    assert "Recuperando conexão presa há 61.0s" in caplog.text
+    assert "devolvida após ter sido recuperada" in caplog.text
+    conn.commit.assert_not_awaited()
+    conn.rollback.assert_not_awaited()
+
+
+def test_emprestimo_longo_nao_e_tratado_como_vazamento(pool, relogio, mocker, caplog):
+    mocker.patch.object(settings, "DB_POOL_LEAK_THRESHOLD", 30)
+    mocker.patch.object(settings, "DB_POOL_LEAK_RECLAIM", 60)
+
+    async def cenario():
+        conn = await pool.get_conn(long_lived=True)
+        relogio.avancar(120)
+        with caplog.at_level(logging.WARNING):
+            await pool._check_leaks()
+        assert pool.stats()["long_lived_in_use"] == 1
+        await pool.release_conn(conn)
+        return conn
+
+    conn = asyncio.run(cenario())
+
+    # Uma exportação de 2 minutos não é avisada nem fechada no meio do streaming
+    conn.close.assert_not_awaited()
+    assert pool._leaks_reported == pool._leaks_reclaimed == 0
+    assert "vazamento" not in caplog.text
+    pool._pool.putconn.assert_awaited_once_with(conn)
+    assert pool._long_lived == set()
+
+
+def test_devolver_conexao_de_leitura_mantem_prepared_statements(pool, mocker):
+    conn = mocker.AsyncMock()
+    xid_nulo = conn.execute.return_value.fetchone
+
+    # Transação só de leitura (sem xid): COMMIT (o ROLLBACK descartaria os prepared statements)
+    conn.info.transaction_status = TransactionStatus.INTRANS
+    xid_nulo.return_value = (True,)
+    asyncio.run(pool.release_conn(conn))
+    conn.commit.assert_awaited_once()
+    conn.rollback.assert_not_awaited()
+
+    # Transação com erro continua sendo desfeita
+    conn.info.transaction_status = TransactionStatus.INERROR
+    asyncio.run(pool.release_conn(conn))
+    conn.rollback.assert_awaited_once()
+
+
+def test_devolver_conexao_com_escrita_sem_commit_desfaz(pool, mocker, caplog):
+    conn = mocker.AsyncMock()
+    conn.info.transaction_status = TransactionStatus.INTRANS
+    conn.execute.return_value.fetchone.return_value = (False,)
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(pool.release_conn(conn))
+
+    conn.commit.assert_not_awaited()
+    conn.rollback.assert_awaited_once()
+    assert "escritas sem commit" in caplog.text
+    pool._pool.putconn.assert_awaited_once_with(conn)
+
+
+def test_escrita_fora_da_unidade_de_trabalho_nao_e_gravada_na_devolucao(pool, pg_conninfo, card_de_teste):
+    from psycopg import AsyncConnection
+    from db.connection import _configure_conn
+
+    async def cenario():
+        async with await AsyncConnection.connect(pg_conninfo) as leitura, await AsyncConnection.connect(pg_conninfo) as escrita:
+            await _configure_conn(leitura)
+            await leitura.execute("SELECT 1")
+            await pool.release_conn(leitura)
+            leitura_encerrada = leitura.info.transaction_status
+
+            await escrita.execute("UPDATE card SET descricao = 'sem commit' WHERE id = %s", (card_de_teste,))
+            await pool.release_conn(escrita)
+            cursor = await escrita.execute("SELECT descricao FROM card WHERE id = %s", (card_de_teste,))
+            descricao = (await cursor.fetchone())[0]
+            await escrita.rollback()
+            return leitura_encerrada, descricao
+
+    leitura_encerrada, descricao = asyncio.run(cenario())
+
+    assert leitura_encerrada == TransactionStatus.IDLE
+    assert descricao == "card de teste"
+
+
+# |=======| PREPARED STATEMENTS |=======|
+def test_prepared_statements_contam_acertos_na_conexao():
+    conn = SimpleNamespace(_prepared=PrepareManager())
+    prepared.configure_prepared(conn)
+    assert conn.prepare_threshold == 1
+    manager = conn._prepared
+    manager.prepare_threshold = conn.prepare_threshold
+    antes = dict(prepared._stats)
+
+    # Mesma consulta de get_all_fases executada três vezes na mesma conexão
+    consulta = SimpleNamespace(query=b"SELECT f.id, f.nome FROM fase f ORDER BY f.ordem", types=())
+    for _ in range(3):
+        prep, name = manager.get(consulta)
+        manager.maybe_add_to_cache(consulta, prep, name)
+
+    assert prepared._stats["unprepared"] == antes["unprepared"] + 1
+    assert prepared._stats["prepared"] == antes["prepared"] + 1
+    assert prepared._stats["hits"] == antes["hits"] + 1
+    assert prepared.prepared_stats()["max_per_conn"] == 100
+    assert prepared.prepared_stats()["counting"] is True
+
+
+def test_conexao_sem_o_prepare_manager_esperado_nao_e_alterada(mocker):
+    mocker.patch.object(prepared, "_counting", True)
+    outro = object()
+    conn = SimpleNamespace(_prepared=outro)
+
+    prepared.configure_prepared(conn)
+
+    # O gerenciador desconhecido é mantido e os contadores se declaram indisponíveis
+    assert conn._prepared is outro
+    assert conn.prepared_max == 100
+    assert prepared.prepared_stats()["counting"] is False
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, field_serializer
+
+from db.database import DatabaseRoute, DatabaseSession, get_db
+
+
+@pytest.fixture
+def eventos():
+    return []
+
+
+@pytest.fixture
+def pool(mocker, eventos):
+    """Pool simulado que registra empréstimos e devoluções em `eventos`."""
+    conn = mocker.AsyncMock()
+    pool = mocker.MagicMock()
+    pool.get_conn = mocker.AsyncMock(side_effect=lambda: eventos.append("get_conn") or conn)
+    pool.release_conn = mocker.AsyncMock(side_effect=lambda c: eventos.append("release_conn"))
+    mocker.patch("db.database._connection", pool)
+    return pool
+
+
+@pytest.fixture
+def client(eventos):
+    class Resposta(BaseModel):
+        valor: int
+
+        @field_serializer("valor")
+        def registra_serializacao(self, valor: int) -> int:
+            eventos.append("serializa")
+            return valor
+
+    router = APIRouter(route_class=DatabaseRoute)
+
+    @router.get("/sem-consulta")
+    async def sem_consulta(db: DatabaseSession = Depends(get_db)):
+        return {"ok": True}
+
+    @router.get("/com-consulta", response_model=Resposta)
+    async def com_consulta(db: DatabaseSession = Depends(get_db)):
+        await db.connection()
+        return Resposta(valor=1)
+
+    @router.get("/com-erro")
+    async def com_erro(db: DatabaseSession = Depends(get_db)):
+        await db.connection()
+        raise RuntimeError("falha no handler")
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_handler_sem_consulta_nao_pega_conexao(client, pool):
+    response = client.get("/sem-consulta")
+
+    assert response.status_code == 200
+    pool.get_conn.assert_not_awaited()
+    pool.release_conn.assert_not_awaited()
+
+
+def test_conexao_volta_ao_pool_antes_da_serializacao(client, pool, eventos):
+    response = client.get("/com-consulta")
+
+    assert response.json() == {"valor": 1}
+    assert eventos == ["get_conn", "release_conn", "serializa"]
+
+
+def test_conexao_volta_ao_pool_quando_o_handler_falha(client, pool, eventos):
+    response = client.get("/com-erro")
+
+    assert response.status_code == 500
+    assert eventos == ["get_conn", "release_conn"]
@@ -103,12 +103,16 @@ def test_listar_fases(mock_get_all_fases):
 
 @patch("service.fase_service.FaseService.get_all_fases")
 def test_listar_fases_vazio(mock_get_all_fases):
-    mock_get_all_fases.return_value = None
-    
-    response = client.get("/fases/")
+    from utils.pagination import Page, encode_cursor
 
-    assert response.status_code == 404
-    assert "Nenhuma fase encontrada" in response.json()["detail"]
+    mock_get_all_fases.return_value = Page()
+
+    # Cursor um passo depois do fim: página vazia, sem próximo cursor
+    response = client.get("/fases/", params={"cursor": encode_cursor([99, str(uuid.uuid4())])})
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "x-next-cursor" not in response.headers
 
 # Testes de Obter Fase por ID
 @patch("service.fase_service.FaseService.get_fase_by_id")
@@ -285,3 +289,71 @@ def test_obter_fase_por_id_service(mocker):
     assert result is not None
     assert result.id == fase_disponivel["id"]
     assert result.nome == fase_disponivel["nome"]
+
+def test_cache_de_fases_service(mocker):
+    import asyncio
+    from service.fase_service import fases_cache
+
+    fases_cache.clear()
+    db = mocker.AsyncMock()
+    fase = fases_fake(1)[0]
+    mock_repo_get = mocker.patch("repository.fase_repository.get_fase_by_id", new_callable=mocker.AsyncMock, return_value=fase)
+    mocker.patch("repository.fase_repository.update_fase", new_callable=mocker.AsyncMock, return_value=fase)
+
+    # A segunda leitura vem do cache, sem ir ao banco
+    assert asyncio.run(FaseService.get_fase_by_id(None, fase["id"])) == fase
+    assert asyncio.run(FaseService.get_fase_by_id(None, fase["id"])) == fase
+    assert mock_repo_get.call_count == 1
+
+    # Uma escrita no mesmo processo invalida o cache
+    asyncio.run(FaseService.update_fase(db, fase["id"], FaseUpdate(nome="Nova", descritivo="Nova fase", ordem=1)))
+    db.commit.assert_awaited_once()
+    asyncio.run(FaseService.get_fase_by_id(None, fase["id"]))
+    assert mock_repo_get.call_count == 2
+
+def test_invalidacao_de_cache_vinda_de_outro_worker():
+    import json
+    from core.cache import apply_invalidation, _origem
+    from service.fase_service import fases_cache
+
+    fases_cache.clear()
+    fases_cache.set(("id", "1"), {"id": "1"})
+
+    # Notificação enviada por este mesmo processo: o cache já foi limpo na escrita
+    apply_invalidation(json.dumps({"origem": _origem(), "caches": ["fases"]}))
+    assert fases_cache.stats()["size"] == 1
+
+    apply_invalidation(json.dumps({"origem": "outro-worker", "caches": ["fases"]}))
+    assert fases_cache.stats()["size"] == 0
+    assert fases_cache.remote_invalidations == 1
+
+@patch("service.fase_service.FaseService.get_all_fases")
+def test_listar_fases_comprimido_com_cache(mock_get_all_fases):
+    from core.cache import get_cache
+
+    mock_get_all_fases.return_value = [FaseResponse(**fase) for fase in fases_fake(40)]
+    cache = get_cache("compressao")
+    cache.clear()
+    hits = cache.hits
+
+    primeira = client.get("/fases/", headers={"Accept-Encoding": "gzip"})
+    segunda = client.get("/fases/", headers={"Accept-Encoding": "gzip"})
+
+    assert primeira.status_code == segunda.status_code == 200
+    assert primeira.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in primeira.headers["vary"]
+    assert segunda.json() == primeira.json()
+    # O mesmo corpo não é comprimido de novo
+    assert cache.stats()["size"] == 1
+    assert cache.hits == hits + 1
+
+@patch("service.fase_service.FaseService.delete_fase")
+def test_deletar_fase_com_cards_responde_409(mock_delete_fase):
+    from db.errors import RegistroEmUsoError
+
+    mock_delete_fase.side_effect = RegistroEmUsoError("A fase possui cards e não pode ser removida.")
+
+    response = client.delete(f"/fases/{uuid.uuid4()}")
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "A fase possui cards e não pode ser removida."
@@ -0,0 +1,78 @@
+import asyncio
+
+import psycopg
+import pytest
+from psycopg import AsyncConnection
+
+from db.connection import _configure_conn
+from db.errors import RegistroEmUsoError
+from repository import artefato_repository, ciclo_repository, fase_repository, projeto_repository, usuario_repository
+
+
+def _referencias(conninfo: str, card_id: str) -> tuple:
+    with psycopg.connect(conninfo) as conn:
+        return conn.execute(
+            "SELECT fase_id::text, artefato_id::text, responsavel_id::text FROM card WHERE id = %s", (card_id,)
+        ).fetchone()
+
+
+def _contar_vinculos(conninfo: str, fase_id: str) -> int:
+    with psycopg.connect(conninfo) as conn:
+        return conn.execute("SELECT COUNT(*) FROM faseartefato WHERE fase_id = %s", (fase_id,)).fetchone()[0]
+
+
+def test_remover_registros_usados_por_cards_e_recusado(pg_conninfo, card_de_teste):
+    fase_id, artefato_id, usuario_id = _referencias(pg_conninfo, card_de_teste)
+    vinculos = _contar_vinculos(pg_conninfo, fase_id)
+
+    async def remover(delete, registro_id):
+        async with await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            await delete(conn, registro_id)
+
+    with pytest.raises(RegistroEmUsoError):
+        asyncio.run(remover(fase_repository.delete_fase, fase_id))
+    with pytest.raises(RegistroEmUsoError):
+        asyncio.run(remover(artefato_repository.delete_artefato, artefato_id))
+    with pytest.raises(RegistroEmUsoError):
+        asyncio.run(remover(usuario_repository.delete_usuario, usuario_id))
+
+    # Nada foi removido pela metade: os vínculos fase-artefato apagados antes da fase voltaram
+    assert _contar_vinculos(pg_conninfo, fase_id) == vinculos
+
+
+def test_remover_projeto_ou_ciclo_com_cards_e_recusado_sem_cascata(pg_conninfo, card_de_teste):
+    async def remover(delete, registro_id):
+        async with await AsyncConnection.connect(pg_conninfo) as conn:
+            await _configure_conn(conn)
+            await delete(conn, registro_id)
+
+    with psycopg.connect(pg_conninfo, autocommit=True) as conn:
+        # Projeto e ciclo próprios do teste, com o card de teste dentro
+        projeto_id = conn.execute(
+            "INSERT INTO projeto (nome) VALUES (%s) RETURNING id::text", (f"projeto de teste {card_de_teste}",)
+        ).fetchone()[0]
+        ciclo_id = conn.execute(
+            "INSERT INTO ciclo (nome, versao, projeto_id) VALUES (%s, '1', %s) RETURNING id::text",
+            (f"ciclo de teste {card_de_teste}", projeto_id),
+        ).fetchone()[0]
+        ciclo_original = conn.execute(
+            "UPDATE card SET ciclo_id = %s FROM card antigo WHERE card.id = %s AND antigo.id = card.id"
+            " RETURNING antigo.ciclo_id", (ciclo_id, card_de_teste),
+        ).fetchone()[0]
+        try:
+            with pytest.raises(RegistroEmUsoError, match="ciclo possui cards"):
+                asyncio.run(remover(ciclo_repository.delete_ciclo, ciclo_id))
+            with pytest.raises(RegistroEmUsoError, match="projeto possui ciclos"):
+                asyncio.run(remover(projeto_repository.delete_projeto, projeto_id))
+
+            # Nem o ciclo, nem o card, nem o histórico de status foram apagados em cascata
+            assert conn.execute("SELECT COUNT(*) FROM ciclo WHERE id = %s", (ciclo_id,)).fetchone()[0] == 1
+            assert conn.execute("SELECT COUNT(*) FROM card WHERE id = %s", (card_de_teste,)).fetchone()[0] == 1
+            assert conn.execute(
+                "SELECT COUNT(*) FROM card_status_transicao WHERE card_id = %s", (card_de_teste,)
+            ).fetchone()[0] == 1
+        finally:
+            conn.execute("UPDATE card SET ciclo_id = %s WHERE id = %s", (ciclo_original, card_de_teste))
+            conn.execute("DELETE FROM ciclo WHERE id = %s", (ciclo_id,))
+            conn.execute("DELETE FROM projeto WHERE id = %s", (projeto_id,))
@@ -74,6 +74,31 @@ def test_get_all_projetos_vazio(mock_get_all, mock_db):
     assert data == projetos
 
 
+@patch("routes.projeto_router.get_db", new_callable=AsyncMock)
+@patch("service.projeto_service.ProjetoService.get_projetos_summary", new_callable=AsyncMock)
+def test_get_projetos_summary(mock_summary, mock_db):
+    resumo = [{
+        "id": str(uuid.uuid4()),
+        "nome": "Projeto 1",
+        "ciclos": 2,
+        "cards": 5,
+        "cards_a_fazer": 1,
+        "cards_em_andamento": 2,
+        "cards_testes_validacao": 0,
+        "cards_concluidos": 2,
+        "horas_planejadas": 20.0,
+        "horas_concluidas": 8.0,
+    }]
+    mock_db.return_value = "fake_db"
+    mock_summary.return_value = resumo
+
+    response = client.get("/projetos/summary")
+
+    assert response.status_code == 200
+    assert response.json() == resumo
+    mock_summary.assert_called_once()
+
+
 @patch("routes.projeto_router.get_db", new_callable=AsyncMock)
 @patch("service.projeto_service.ProjetoService.get_projeto_by_id", new_callable=AsyncMock)
 def test_get_projeto_by_id(mock_get_one, mock_db):
@@ -151,5 +176,114 @@ def test_delete_projeto(mock_delete, mock_db):
     mock_delete.assert_called_once()
 
 
+@patch("service.projeto_service.ProjetoService.delete_projeto", new_callable=AsyncMock)
+def test_delete_projeto_com_ciclos_responde_409(mock_delete):
+    from db.errors import RegistroEmUsoError
+
+    mock_delete.side_effect = RegistroEmUsoError("O projeto possui ciclos e não pode ser removido.")
+
+    response = client.delete(f"/projetos/{uuid.uuid4()}")
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "O projeto possui ciclos e não pode ser removido."
+
+
+@patch("service.projeto_service.ProjetoService.update_projeto", new_callable=AsyncMock)
+def test_update_projeto_com_responsaveis(mock_update):
+    projeto = projetos_fake(1)[0]
+    responsaveis = [str(uuid.uuid4()), str(uuid.uuid4())]
+    mock_update.return_value = projeto
+
+    response = client.put(f"/projetos/{projeto['id']}", json={
+        "nome": projeto["nome"],
+        "responsaveis_id": responsaveis,
+    })
+
+    assert response.status_code == 200
+    assert mock_update.call_args.args[2]["responsaveis_id"] == responsaveis
+
+
+def test_sync_responsaveis_em_lote():
+    import asyncio
+    from repository.projeto_repository import sync_responsaveis
+
+    cursor = AsyncMock()
+    projeto_id = str(uuid.uuid4())
+    a, b = str(uuid.uuid4()), str(uuid.uuid4())
+
+    # Um INSERT e um DELETE para a equipe inteira, sem ids repetidos
+    asyncio.run(sync_responsaveis(cursor, projeto_id, [a, b, a]))
+    assert cursor.execute.await_count == 2
+    insert, delete = cursor.execute.await_args_list
+    assert "ON CONFLICT" in insert.args[0] and insert.args[1] == (projeto_id, [a, b])
+    assert "<> ALL" in delete.args[0] and delete.args[1] == (projeto_id, [a, b])
+
+    # Na criação não há vínculos antigos a remover
+    cursor.reset_mock()
+    asyncio.run(sync_responsaveis(cursor, projeto_id, [a], remover_ausentes=False))
+    assert cursor.execute.await_count == 1
+
+
+def _repositorio_projeto_fake(mocker, create_side_effect=None):
+    """Repositório que participa da unidade de trabalho como o real (sem commit próprio)."""
+    from db.transaction import transaction
+
+    async def create_projeto(conn, dados):
+        async with transaction(conn):
+            if create_side_effect:
+                raise create_side_effect
+            return {"id": "p1", "nome": dados["nome"]}
+
+    mocker.patch("repository.projeto_repository.create_projeto", side_effect=create_projeto)
+    mocker.patch("repository.projeto_repository.get_projeto_by_id", new_callable=AsyncMock, return_value={"id": "p1"})
+
+
+def test_create_projeto_um_commit_por_operacao(mocker):
+    import asyncio
+    from service.projeto_service import ProjetoService
+
+    _repositorio_projeto_fake(mocker)
+    db = AsyncMock()
+
+    # Escrita e releitura numa única transação: um só commit
+    assert asyncio.run(ProjetoService.create_projeto(db, {"nome": "P", "responsaveis_id": []})) == {"id": "p1"}
+    db.commit.assert_awaited_once()
+    db.rollback.assert_not_awaited()
+
+
+def test_create_projeto_rollback_atomico(mocker):
+    import asyncio
+    import pytest
+    from service.projeto_service import ProjetoService
+
+    _repositorio_projeto_fake(mocker, create_side_effect=ValueError("Responsável não encontrado."))
+    db = AsyncMock()
+
+    with pytest.raises(ValueError):
+        asyncio.run(ProjetoService.create_projeto(db, {"nome": "P", "responsaveis_id": ["x"]}))
+    db.commit.assert_not_awaited()
+    db.rollback.assert_awaited_once()
+
+
+def test_transacao_com_erro_tratado_numa_etapa_nao_grava():
+    import asyncio
+    import pytest
+    from db.transaction import TransactionRollbackError, transaction
+
+    db = AsyncMock()
+
+    async def operacao():
+        async with transaction(db):
+            try:
+                async with transaction(db):
+                    raise RuntimeError("falha numa etapa")
+            except RuntimeError:
+                pass
+
+    with pytest.raises(TransactionRollbackError):
+        asyncio.run(operacao())
+    db.commit.assert_not_awaited()
+    db.rollback.assert_awaited_once()
+
 #ver um nao existente
 
@@ -0,0 +1,48 @@
+import asyncio
+
+from core.cache import TTLCache, cached
+
+
+def test_leitura_anterior_a_invalidacao_nao_e_guardada():
+    cache = TTLCache("teste", maxsize=10, ttl=60)
+
+    async def cenario():
+        lendo = asyncio.Event()
+        liberar = asyncio.Event()
+
+        async def loader_lento():
+            # Lê o valor antigo e fica parado antes de devolvê-lo
+            lendo.set()
+            await liberar.wait()
+            return "antigo"
+
+        leitura = asyncio.create_task(cached(cache, "chave", loader_lento))
+        await lendo.wait()
+        # Uma escrita termina e invalida o cache enquanto a leitura está em andamento
+        cache.clear()
+        liberar.set()
+        valor = await leitura
+
+        async def loader_novo():
+            return "novo"
+
+        return valor, await cached(cache, "chave", loader_novo)
+
+    valor, depois = asyncio.run(cenario())
+
+    assert valor == "antigo"
+    assert depois == "novo"
+
+
+def test_invalidate_de_uma_chave_tambem_descarta_a_leitura_em_andamento():
+    cache = TTLCache("teste", maxsize=10, ttl=60)
+
+    async def loader():
+        cache.invalidate("chave")
+        return "antigo"
+
+    asyncio.run(cached(cache, "chave", loader))
+
+    assert cache.stats()["size"] == 0
+    asyncio.run(cached(cache, "chave", lambda: asyncio.sleep(0, "novo")))
+    assert cache.get("chave") == "novo"
@@ -0,0 +1,58 @@
+import base64
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+# Mock das conexões de banco antes de importar a aplicação
+with patch('db.connection.Connection'):
+    from fastapi.testclient import TestClient
+    from main import app
+    from core.auth import get_current_user
+    from utils.pagination import decode_cursor, encode_cursor
+
+client = TestClient(app)
+
+LISTAGENS = ["/fases/", "/artefatos/", "/card/", "/ciclos/", "/projetos/", "/projetos/summary", "/usuarios/"]
+
+
+def cursor(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+CURSORES_ADULTERADOS = [
+    cursor({"k": ["nope", "nope"], "d": "n"}),
+    cursor({"k": ["2024-01-01T00:00:00+00:00", "nope"], "d": "n"}),
+    cursor({"k": [None, str(uuid.uuid4())], "d": "p"}),
+    cursor({"k": [True, str(uuid.uuid4())], "d": "n"}),
+    "isto-nao-e-base64",
+]
+
+
+@pytest.mark.parametrize("url", LISTAGENS)
+@pytest.mark.parametrize("adulterado", CURSORES_ADULTERADOS)
+def test_cursor_adulterado_responde_400(url, adulterado):
+    app.dependency_overrides[get_current_user] = lambda: str(uuid.uuid4())
+    try:
+        response = client.get(url, params={"cursor": adulterado})
+    finally:
+        app.dependency_overrides = {}
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor de paginação inválido"
+
+
+def test_cursor_com_chave_de_outra_listagem_responde_400():
+    # Cursor de /card/ (created_at) usado nas fases (ordem inteira) e vice-versa
+    de_cards = encode_cursor(["2024-01-01T00:00:00+00:00", str(uuid.uuid4())])
+    de_fases = encode_cursor([3, str(uuid.uuid4())])
+
+    assert client.get("/fases/", params={"cursor": de_cards}).status_code == 400
+    assert client.get("/card/", params={"cursor": de_fases}).status_code == 400
+
+
+def test_cursor_valido_continua_decodificando():
+    chave = ["2024-01-01T00:00:00+00:00", str(uuid.uuid4())]
+    assert decode_cursor(encode_cursor(chave, backward=True)) == (chave, True)
+    assert decode_cursor(encode_cursor([3, chave[1]]), "integer") == ([3, chave[1]], False)
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+# Mock das conexões de banco antes de importar a aplicação
+with patch('db.connection.Connection'):
+    from fastapi.testclient import TestClient
+    from main import app
+
+
+def test_lifespan_abre_e_fecha_o_pool_do_worker(mocker):
+    pool = mocker.MagicMock()
+    pool.open = mocker.AsyncMock()
+    pool.close_all = mocker.AsyncMock()
+    mocker.patch("main.Connection", return_value=pool)
+    mocker.patch("main.start_background_tasks")
+    stop = mocker.patch("main.stop_background_tasks", new_callable=mocker.AsyncMock)
+
+    with TestClient(app) as c:
+        pool.open.assert_awaited_once()
+        assert c.get("/health").status_code == 200
+        pool.close_all.assert_not_awaited()
+
+    stop.assert_awaited_once()
+    pool.close_all.assert_awaited_once()
+
+
+def test_sigterm_encerra_todos_os_workers_em_paralelo(mocker):
+    from server import _Supervisor, worker_count
+
+    eventos = []
+    processos = []
+    for i in range(3):
+        processo = mocker.MagicMock()
+        processo.terminate.side_effect = lambda i=i: eventos.append(("terminate", i))
+        processo.join.side_effect = lambda i=i: eventos.append(("join", i))
+        processos.append(processo)
+    supervisor = object.__new__(_Supervisor)
+    sock = mocker.MagicMock()
+    supervisor.processes, supervisor.pid, supervisor.sockets = processos, 1, [sock]
+
+    supervisor.shutdown()
+
+    # Todos param de aceitar conexões antes de esperar a drenagem de qualquer um
+    assert [e[0] for e in eventos] == ["terminate"] * 3 + ["join"] * 3
+    sock.close.assert_called_once()
+    assert worker_count() >= 1
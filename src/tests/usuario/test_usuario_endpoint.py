@@ -385,4 +385,36 @@ def test_autenticar_usuario_credenciais_invalidas_service(mocker, usuario_login)
     import asyncio
     result = asyncio.run(UsuarioService.authenticate_user(None, "wrong@email.com", "wrong_password"))
     
-    assert result is None
\ No newline at end of file
+    assert result is None
+def test_criar_usuario_email_duplicado_detectado_no_insert(mocker, usuario_create):
+    import asyncio
+    from psycopg import errors
+    from repository import usuario_repository
+
+    # Sem consulta prévia: o INSERT é a única ida ao banco e o índice único acusa o conflito
+    cursor = mocker.AsyncMock()
+    cursor.execute.side_effect = errors.UniqueViolation("duplicate key value violates unique constraint")
+    db = mocker.AsyncMock()
+    db.cursor = MagicMock()
+    db.cursor.return_value.__aenter__.return_value = cursor
+
+    with pytest.raises(ValueError, match="Email já cadastrado"):
+        asyncio.run(UsuarioService.create_user(db, usuario_create))
+    cursor.execute.assert_awaited_once()
+    db.commit.assert_not_awaited()
+    db.rollback.assert_awaited_once()
+    assert not hasattr(usuario_repository, "email_exists")
+
+@patch("service.usuario_service.UsuarioService.delete_user")
+def test_deletar_usuario_responsavel_por_cards(mock_delete_user):
+    from db.errors import RegistroEmUsoError
+
+    setup_auth_mock()
+    mock_delete_user.side_effect = RegistroEmUsoError("O usuário é responsável por cards e não pode ser removido.")
+
+    response = client.delete(f"/usuarios/{uuid.uuid4()}")
+
+    assert response.status_code == 409
+    assert "cards" in response.json()["detail"]
+
+    teardown_auth_mock()
@@ -0,0 +1,164 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, Query, Request, Response, status
+
+from core.config import settings
+
+
+# |=======| PÁGINA DE RESULTADOS |=======|
+class Page(list):
+    """
+    Lista com os itens de uma página e os cursores opacos para navegar entre páginas.
+
+    Continua sendo uma `list`, então as rotas seguem devolvendo um array JSON; os
+    cursores vão nos headers (ver `set_page_headers`).
+    """
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def map(self, func: Callable) -> "Page":
+        return Page((func(item) for item in self), self.next_cursor, self.prev_cursor)
+
+
+# |=======| PARÂMETROS DE PAGINAÇÃO (DEPENDÊNCIA DAS ROTAS) |=======|
+class PageParams:
+    """
+    Parâmetros `limit` e `cursor` das rotas de listagem.
+
+    A paginação é por keyset: o cursor guarda a chave de ordenação (ex.: `created_at`)
+    e o `id` do último/primeiro item da página, de modo que a próxima consulta continua
+    a partir dali com `WHERE (created_at, id) < (...)`, sem OFFSET.
+    """
+
+    # Tipo da chave de ordenação guardada no cursor (ver `decode_cursor`)
+    sort_type = "timestamptz"
+
+    def __init__(
+        self,
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX, description="Quantidade máxima de itens por página"),
+        cursor: Optional[str] = Query(None, description="Cursor opaco devolvido em X-Next-Cursor / X-Prev-Cursor"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.key: Optional[list] = None
+        self.backward = False
+        if cursor:
+            try:
+                self.key, self.backward = decode_cursor(cursor, self.sort_type)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor de paginação inválido"
+                )
+
+    @classmethod
+    def first(cls, limit: int = settings.PAGE_SIZE_DEFAULT) -> "PageParams":
+        """Primeira página, para chamadas fora de uma rota."""
+        return cls(limit=limit, cursor=None)
+
+
+class OrdemPageParams(PageParams):
+    """Paginação das listagens ordenadas por `ordem` (inteiro), como as fases."""
+
+    sort_type = "integer"
+
+
+def encode_cursor(key: list, backward: bool = False) -> str:
+    payload = json.dumps({"k": key, "d": "p" if backward else "n"}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_type: str = "timestamptz") -> tuple[list, bool]:
+    """
+    Decodifica o cursor e valida a chave (`[valor da ordenação, id]`). O cursor vem do
+    cliente: uma chave com o tipo errado falharia só no cast do SQL, como erro 500.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key, direction = payload["k"], payload["d"]
+    except Exception:
+        raise ValueError("cursor inválido")
+    if not isinstance(key, list) or len(key) != 2 or direction not in ("n", "p"):
+        raise ValueError("cursor inválido")
+    value, row_id = key
+    try:
+        if sort_type == "integer":
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError("cursor inválido")
+        else:
+            datetime.fromisoformat(value)
+        uuid.UUID(row_id)
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("cursor inválido")
+    return key, direction == "p"
+
+
+# |=======| SQL DO KEYSET |=======|
+def keyset_sql(
+    page: PageParams,
+    sort: str = "created_at",
+    sort_type: str = "timestamptz",
+    alias: str = "",
+    descending: bool = True,
+) -> tuple[str, str, list[Any]]:
+    """
+    Monta o filtro, a ordenação e os parâmetros da consulta paginada.
+
+    Retorna `(where, order_by, params)`; `params` já inclui o LIMIT (limit + 1, para
+    saber se existe página seguinte) e deve ser passado depois dos demais parâmetros
+    da consulta.
+    """
+    prefix = f"{alias}." if alias else ""
+    columns = f"({prefix}{sort}, {prefix}id)"
+    # Voltando uma página a ordenação é invertida; `build_page` desfaz a inversão
+    desc = descending != page.backward
+    direction = "DESC" if desc else "ASC"
+    order_by = f"{prefix}{sort} {direction}, {prefix}id {direction}"
+
+    if page.key is None:
+        return "TRUE", order_by, [page.limit + 1]
+    operator = "<" if desc else ">"
+    where = f"{columns} {operator} (%s::{sort_type}, %s::uuid)"
+    return where, order_by, [*page.key, page.limit + 1]
+
+
+def build_page(rows: list, page: PageParams, sort: str = "created_at") -> Page:
+    """Corta a linha extra buscada pelo LIMIT e calcula os cursores vizinhos."""
+    has_more = len(rows) > page.limit
+    rows = list(rows[:page.limit])
+    if page.backward:
+        rows.reverse()
+    if not rows:
+        return Page()
+
+    def key(row) -> list:
+        value = row[sort]
+        return [value.isoformat() if isinstance(value, datetime) else value, str(row["id"])]
+
+    if page.backward:
+        next_cursor = encode_cursor(key(rows[-1]))
+        prev_cursor = encode_cursor(key(rows[0]), backward=True) if has_more else None
+    else:
+        next_cursor = encode_cursor(key(rows[-1])) if has_more else None
+        prev_cursor = encode_cursor(key(rows[0]), backward=True) if page.key is not None else None
+    return Page(rows, next_cursor, prev_cursor)
+
+
+# |=======| HEADERS DE NAVEGAÇÃO |=======|
+def set_page_headers(request: Request, response: Response, page: list) -> None:
+    """Expõe os cursores da página em X-Next-Cursor / X-Prev-Cursor e no header Link."""
+    links = []
+    for rel, header in (("next", "X-Next-Cursor"), ("prev", "X-Prev-Cursor")):
+        cursor = getattr(page, f"{rel}_cursor", None)
+        if cursor:
+            response.headers[header] = cursor
+            links.append(f'<{request.url.include_query_params(cursor=cursor)}>; rel="{rel}"')
+    if links:
+        response.headers["Link"] = ", ".join(links)
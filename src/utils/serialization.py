@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from utils.pagination import set_page_headers
+
+# orjson é opcional: sem ele a serialização rápida usa o json da biblioteca padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# |=======| CODIFICAÇÃO JSON |=======|
+def _default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # OPT_UTC_Z: datas em UTC saem com "Z", igual à serialização do pydantic
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """Resposta JSON codificada com orjson (quando instalado), sem passar pelo `jsonable_encoder`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# |=======| LINHAS DO BANCO -> JSON SEM DTO |=======|
+@lru_cache(maxsize=None)
+def response_fields(model: type[BaseModel]) -> tuple[str, ...]:
+    """Campos que o DTO envia na resposta (os marcados com `exclude=True` ficam de fora)."""
+    return tuple(name for name, field in model.model_fields.items() if not field.exclude)
+
+
+def project_row(row: dict, fields: tuple[str, ...]) -> dict:
+    """
+    Recorta a linha do repositório nos campos do DTO, sem instanciar nem validar o
+    modelo. Só vale para linhas cujos tipos já são os da resposta (uuid como texto,
+    enum como texto), como as das listagens.
+    """
+    return {name: row.get(name) for name in fields}
+
+
+def fast_page_response(request: Request, page: list) -> FastJSONResponse:
+    """Resposta de uma página de linhas já recortadas, com os headers de navegação."""
+    response = FastJSONResponse(page)
+    set_page_headers(request, response, page)
+    return response